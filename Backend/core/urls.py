@@ -1,9 +1,16 @@
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
+from poke import metrics, sprites
 from poke.urls import urlpatterns as urlpatter
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('poke.auth_urls')),
+    path('api/sprites/<str:variant>/<str:host>/<path:path>', sprites.view, name='sprite'),
     path('api/', include(urlpatter)),
+    path('metrics', metrics.view, name='metrics'),
 ]
+
+# O uvicorn não serve arquivos estáticos como o runserver; em DEBUG o Django cuida deles.
+urlpatterns += staticfiles_urlpatterns()
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+from poke import warmup  # noqa: E402
+
+# Sob o gunicorn com preload a thread sobe no post_fork de cada worker (gunicorn.conf.py).
+if settings.POKEAPI_WARM_INTERVAL and not os.environ.get('WARMUP_POST_FORK'):
+    warmup.start_scheduler()
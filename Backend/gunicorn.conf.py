@@ -0,0 +1,63 @@
+"""
+Configuração do gunicorn usada pelo ``script.sh`` (SERVER=gunicorn). Todos os valores
+vêm do ambiente, com os mesmos nomes do .env.django.
+
+O worker padrão é o gthread servindo ``core.wsgi`` com GUNICORN_THREADS threads por
+processo. ASGI é opcional: com GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker o
+mesmo config serve ``core.asgi``, mas aí as views síncronas (o CRUD do usuário) e todo
+``sync_to_async`` com thread_sensitive (ORM, índices, catálogo local) dividem uma
+única thread por worker, e GUNICORN_THREADS não vale. Só compensa quando o tráfego é
+quase todo dos proxies assíncronos da PokeAPI. Nos dois casos as buscas ao upstream
+rodam no loop do processo (``pokeapi.get_loop``): o pool de conexões e a coalescência
+de misses valem entre todas as requisições do worker.
+"""
+
+import multiprocessing
+import os
+
+from core.environ import env
+
+bind = env('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = env.int('WEB_CONCURRENCY', default=multiprocessing.cpu_count() * 2 + 1)
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread')
+threads = env.int('GUNICORN_THREADS', default=4)
+
+# Django, DRF e os índices em memória são carregados uma vez no master e
+# compartilhados com os workers por copy-on-write.
+preload_app = env.bool('GUNICORN_PRELOAD', default=True)
+
+# Recicla cada worker depois de N requisições (com jitter para não reiniciarem juntos),
+# o que segura o crescimento de memória de caches e fragmentação ao longo dos dias.
+max_requests = env.int('GUNICORN_MAX_REQUESTS', default=5000)
+max_requests_jitter = env.int('GUNICORN_MAX_REQUESTS_JITTER', default=500)
+
+# No SIGTERM os workers param de aceitar conexões e têm graceful_timeout segundos
+# para terminar o que está em andamento (o stop_grace_period do compose é maior).
+graceful_timeout = env.int('GUNICORN_GRACEFUL_TIMEOUT', default=30)
+timeout = env.int('GUNICORN_TIMEOUT', default=60)
+keepalive = env.int('GUNICORN_KEEPALIVE', default=5)
+
+accesslog = env('GUNICORN_ACCESS_LOG', default=None)
+errorlog = '-'
+
+# Avisa o core.wsgi/core.asgi de que o agendador do warm-up sobe por worker (post_fork), não no master.
+os.environ['WARMUP_POST_FORK'] = '1' if preload_app else ''
+
+
+def pre_fork(server, worker):
+    # Nada deveria consultar o banco durante o preload, mas se algo consultou a
+    # conexão fecha aqui, no master: um socket herdado pelos workers seria
+    # compartilhado entre processos.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    # A thread do warm-up não sobrevive ao fork: com preload ela sobe em cada worker.
+    from django.conf import settings
+
+    if preload_app and settings.POKEAPI_WARM_INTERVAL:
+        from poke import warmup
+
+        warmup.start_scheduler()
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Usuario, TipoPokemon, PokemonUsuario
+from . import resumo
+from .models import Usuario, TipoPokemon, PokemonUsuario, Geracao, EspeciePokemon, Pokemon, TarefaTipos
 
 from django.utils.translation import gettext_lazy as _
 
@@ -8,7 +9,7 @@ from django.contrib.auth.admin import UserAdmin
 
 @admin.register(TipoPokemon)
 class TipoPokemonAdmin(admin.ModelAdmin):
-    list_display = ("idTipoPokemon", "descricao")
+    list_display = ("idTipoPokemon", "descricao", "codigo")
     search_fields = ("descricao",)
     list_per_page = 20
 
@@ -101,4 +102,49 @@ class PokemonUsuarioAdmin(admin.ModelAdmin):
     search_fields = ("nome", "codigo", "idUsuario__nome", "idUsuario__login")
     list_filter = ("grupoBatalha", "favorito")
     filter_horizontal = ("tipos",)
+    list_per_page = 20
+
+    # O admin grava direto no ORM: recalcula os contadores (equipe inclusive) e o resumo
+    # por tipo dos donos afetados, depois que os tipos também foram salvos.
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        resumo.reconstruir({form.instance.idUsuario_id, form.initial.get("idUsuario")} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        resumo.reconstruir([obj.idUsuario_id])
+
+    def delete_queryset(self, request, queryset):
+        usuarios = set(queryset.values_list("idUsuario", flat=True))
+        super().delete_queryset(request, queryset)
+        resumo.reconstruir(usuarios)
+
+
+@admin.register(Geracao)
+class GeracaoAdmin(admin.ModelAdmin):
+    list_display = ("idGeracao", "nome")
+    search_fields = ("nome",)
+
+
+@admin.register(EspeciePokemon)
+class EspeciePokemonAdmin(admin.ModelAdmin):
+    list_display = ("idEspecie", "nome", "geracao")
+    search_fields = ("nome",)
+    list_filter = ("geracao",)
+    list_per_page = 20
+
+
+@admin.register(Pokemon)
+class PokemonAdmin(admin.ModelAdmin):
+    list_display = ("idPokemon", "nome", "especie", "dtAtualizacao")
+    search_fields = ("nome",)
+    list_select_related = ("especie",)
+    list_per_page = 20
+
+
+@admin.register(TarefaTipos)
+class TarefaTiposAdmin(admin.ModelAdmin):
+    list_display = ("idTarefa", "nome", "status", "tentativas", "dtAlteracao")
+    search_fields = ("nome",)
+    list_filter = ("status",)
     list_per_page = 20
\ No newline at end of file
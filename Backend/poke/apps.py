@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class PokeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'poke'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import authentication, metrics, resumo  # noqa: F401 (authentication e resumo conectam signals)
+
+        connection_created.connect(metrics.install_query_wrapper)
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Usuario
+
+
+class CacheExpiravel:
+    """
+    LRU em processo com validade por entrada. ``versao`` muda a cada invalidação,
+    e ``set`` com a versão lida antes da consulta ao banco não grava um registro
+    que um signal invalidou no meio do caminho.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.versao = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expira_em, value = entry
+            if time.monotonic() >= expira_em:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, versao=None):
+        with self._lock:
+            if versao is not None and versao != self.versao:
+                return
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.AUTH_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self.versao += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.versao += 1
+            self._entries.clear()
+
+
+usuarios = CacheExpiravel()
+tokens = CacheExpiravel()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication sem a query do usuário a cada requisição: o registro fica
+    AUTH_USER_CACHE_TTL segundos em memória, indexado pelo claim ``user_id``, e
+    sai na hora quando o Usuario é salvo ou removido neste processo. Tokens já
+    validados também ficam em memória até expirarem, então um cliente que faz
+    polling não paga a verificação da assinatura a cada chamada.
+
+    Com AUTH_USER_CACHE_TTL=0 se comporta exatamente como o JWTAuthentication.
+    """
+
+    def get_validated_token(self, raw_token):
+        if not settings.AUTH_USER_CACHE_TTL:
+            return super().get_validated_token(raw_token)
+
+        token = tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            restante = token.payload.get("exp", 0) - time.time()
+            if restante > 0:
+                tokens.set(raw_token, token, restante)
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not settings.AUTH_USER_CACHE_TTL or user_id is None:
+            return super().get_user(validated_token)
+
+        # O simplejwt grava o claim como texto; o signal invalida pela mesma chave.
+        user_id = str(user_id)
+        campos = usuarios.get(user_id)
+        if campos is None:
+            versao = usuarios.versao
+            user = super().get_user(validated_token)
+            usuarios.set(user_id, (user._state.db, self.campos(user)), settings.AUTH_USER_CACHE_TTL, versao)
+            return user
+
+        # Uma instância nova por requisição: nada do que a view fizer com request.user
+        # vaza para a próxima.
+        db, valores = campos
+        user = self.user_model.from_db(db, [f.attname for f in self.user_model._meta.concrete_fields], valores)
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("A senha do usuário foi alterada.", code="password_changed")
+        return user
+
+    def campos(self, user):
+        return [getattr(user, f.attname) for f in self.user_model._meta.concrete_fields]
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario(sender, instance, **kwargs):
+    usuarios.delete(str(getattr(instance, api_settings.USER_ID_FIELD)))
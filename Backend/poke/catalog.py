@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+
+from django.db.models import Prefetch, Q
+
+from . import sprites
+from .models import EspeciePokemon, Geracao, Pokemon, PokemonTipo, TipoPokemon
+
+
+def is_id(key):
+    # str.isdigit() também aceita "²" (que o int() recusa) e "٣" (que ele lê como 3).
+    return key.isascii() and key.isdigit()
+
+
+def id_from_url(url):
+    return int(url.rstrip("/").split("/")[-1])
+
+
+def imagem_url(data):
+    sprites = data["sprites"]
+    if sprites["other"].get("official-artwork"):
+        return sprites["other"]["official-artwork"]["front_default"]
+    return sprites["front_default"]
+
+
+@dataclass(slots=True)
+class PokemonResumo:
+    """
+    O pokémon como o catálogo responde no ``retrieve`` e no ``list``, venha ele do
+    upstream ou do banco. Com ``__slots__`` não há ``__dict__`` por instância, e o
+    ``ORJSONRenderer`` serializa a dataclass direto, sem montar um dict antes.
+    """
+
+    id: int
+    nome: str
+    tipos: list
+    imagemUrl: str | None
+
+    @classmethod
+    def from_upstream(cls, data, variant="card"):
+        return cls(
+            id=data["id"],
+            nome=data["name"],
+            tipos=[t["type"]["name"] for t in data["types"]],
+            imagemUrl=sprites.proxy_url(imagem_url(data), variant),
+        )
+
+    @classmethod
+    def from_model(cls, pokemon, variant="card"):
+        return cls(
+            id=pokemon.idPokemon,
+            nome=pokemon.nome,
+            tipos=[slot.tipo.descricao for slot in pokemon.slots.all()],
+            imagemUrl=sprites.proxy_url(pokemon.imagemUrl, variant),
+        )
+
+
+def pokemon_queryset():
+    return Pokemon.objects.prefetch_related(
+        Prefetch("slots", queryset=PokemonTipo.objects.select_related("tipo"))
+    )
+
+
+def retrieve(key):
+    key = str(key).lower()
+    lookup = {"idPokemon": int(key)} if is_id(key) else {"nome": key}
+    pokemon = pokemon_queryset().filter(**lookup).first()
+    return PokemonResumo.from_model(pokemon, variant="full") if pokemon else None
+
+
+def retrieve_many(keys):
+    """
+    Os pokémons de ``keys`` (ids ou nomes já normalizados) numa query só, num dict
+    por id e por nome; chave sem pokémon fica de fora.
+    """
+    ids = [int(key) for key in keys if is_id(key)]
+    names = [key for key in keys if not is_id(key)]
+    found = {}
+    for pokemon in pokemon_queryset().filter(Q(idPokemon__in=ids) | Q(nome__in=names)):
+        found[str(pokemon.idPokemon)] = found[pokemon.nome] = PokemonResumo.from_model(pokemon)
+    return found
+
+
+def list_page(offset, limit):
+    count = Pokemon.objects.count()
+    page = pokemon_queryset().order_by("idPokemon")[offset:offset + limit]
+    return count, [PokemonResumo.from_model(pokemon) for pokemon in page]
+
+
+def tipos():
+    return [
+        {"id": codigo, "name": descricao}
+        for codigo, descricao in TipoPokemon.objects.filter(codigo__isnull=False)
+        .order_by("codigo").values_list("codigo", "descricao")
+    ]
+
+
+def generations():
+    return list(Geracao.objects.order_by("idGeracao").values_list("idGeracao", "nome"))
+
+
+def generation_species(gen_id):
+    if not Geracao.objects.filter(idGeracao=gen_id).exists():
+        return None
+    return [
+        {"id": id_especie, "name": nome}
+        for id_especie, nome in EspeciePokemon.objects.filter(geracao_id=gen_id)
+        .order_by("idEspecie").values_list("idEspecie", "nome")
+    ]
+
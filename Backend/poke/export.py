@@ -0,0 +1,140 @@
+import csv
+from dataclasses import asdict
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+from . import pokeapi, warmup
+from .catalog import PokemonResumo, pokemon_queryset
+from .renderers import dumps
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class Linha:
+    """Destino do ``csv.writer`` que devolve a linha formatada em vez de acumulá-la."""
+
+    def write(self, value):
+        return value
+
+
+def as_dict(row):
+    return row if isinstance(row, dict) else asdict(row)
+
+
+def csv_value(value):
+    if isinstance(value, list):
+        return "|".join(str(v["descricao"] if isinstance(v, dict) else v) for v in value)
+    return "" if value is None else value
+
+
+def ndjson():
+    return lambda batch: b"".join(dumps(row) + b"\n" for row in batch)
+
+
+def csv_rows():
+    writer = csv.writer(Linha())
+    header = None
+
+    def encode(batch):
+        nonlocal header
+        rows = [as_dict(row) for row in batch]
+        lines = []
+        if header is None and rows:
+            header = list(rows[0])
+            lines.append(writer.writerow(header))
+        lines.extend(writer.writerow([csv_value(row.get(campo)) for campo in header]) for row in rows)
+        return "".join(lines).encode()
+
+    return encode
+
+
+def in_batches(rows, size, encode):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield encode(batch)
+            batch = []
+    if batch:
+        yield encode(batch)
+
+
+async def ain_batches(rows, size, encode):
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield encode(batch)
+            batch = []
+    if batch:
+        yield encode(batch)
+
+
+def asynchronous(request):
+    """
+    A exportação é servida por ASGI? Sob WSGI o ``StreamingHttpResponse`` junta um
+    iterador assíncrono inteiro numa lista antes de enviar o primeiro byte, então lá
+    as fontes abaixo devolvem iteradores síncronos.
+    """
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+def local_catalog(asynchronous):
+    queryset = pokemon_queryset().order_by("idPokemon")
+    if asynchronous:
+        return (PokemonResumo.from_model(p) async for p in queryset.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+    return (PokemonResumo.from_model(p) for p in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+
+def upstream_catalog(first_page, asynchronous):
+    """Percorre o list da PokeAPI página a página: só uma página de detalhes em memória por vez."""
+    return aupstream_pages(first_page) if asynchronous else upstream_pages(first_page)
+
+
+def upstream_pages(page):
+    while True:
+        for data in pokeapi.fetch_many(warmup.detail_paths(page)):
+            if data is not None:
+                yield PokemonResumo.from_upstream(data)
+        if not page.get("next"):
+            return
+        page = pokeapi.get(page["next"])
+
+
+async def aupstream_pages(page):
+    while True:
+        for data in await pokeapi.afetch_many(warmup.detail_paths(page)):
+            if data is not None:
+                yield PokemonResumo.from_upstream(data)
+        if not page.get("next"):
+            return
+        page = await pokeapi.aget(page["next"])
+
+
+def user_collection(queryset, serializer, asynchronous):
+    if asynchronous:
+        return (
+            serializer.to_representation(p)
+            async for p in queryset.aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+        )
+    return (serializer.to_representation(p) for p in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+
+
+def stream(rows, output, filename, batch_size):
+    """
+    ``StreamingHttpResponse`` sobre ``rows`` (síncrono ou assíncrono): cada lote de
+    ``batch_size`` linhas é codificado e enviado assim que fica pronto, então a memória
+    não cresce com o tamanho da exportação e o primeiro byte sai com o primeiro lote.
+    """
+    encode = (ndjson if output == "ndjson" else csv_rows)()
+    batches = ain_batches if hasattr(rows, "__aiter__") else in_batches
+    response = StreamingHttpResponse(batches(rows, batch_size, encode), content_type=FORMATS[output])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    # Sem buffer no nginx: cada lote segue para o cliente assim que sai daqui.
+    response["X-Accel-Buffering"] = "no"
+    return response
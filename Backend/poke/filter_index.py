@@ -0,0 +1,157 @@
+import threading
+import time
+
+from django.conf import settings
+
+from . import pokeapi, sprites
+from .catalog import id_from_url
+from .models import Pokemon, PokemonTipo
+
+
+def to_bitset(ids):
+    bits = 0
+    for pokemon_id in ids:
+        bits |= 1 << pokemon_id
+    return bits
+
+
+def iter_ids(bits, offset=0, limit=None):
+    """Percorre, em ordem crescente, os ids ligados no bitset."""
+    digits = bin(bits)[:1:-1]
+    position = digits.find("1")
+    skipped = taken = 0
+    while position != -1:
+        if limit is not None and taken >= limit:
+            return
+        if skipped < offset:
+            skipped += 1
+        else:
+            taken += 1
+            yield position
+        position = digits.find("1", position + 1)
+
+
+class PokemonIndex:
+    """
+    Índice invertido tipo -> pokémons e geração -> pokémons, com cada lista
+    guardada como um bitset (um ``int`` onde o bit N indica o pokémon de id N).
+    """
+
+    def __init__(self, types, generations, names, images):
+        self.types = types
+        self.generations = generations
+        self.names = names
+        self.images = images
+        self.built_at = time.monotonic()
+        self.version = pokeapi.catalog_version()
+
+    def is_stale(self):
+        return (
+            time.monotonic() - self.built_at > settings.POKEAPI_INDEX_TTL
+            or self.version != pokeapi.catalog_version()
+        )
+
+    @classmethod
+    def from_local(cls):
+        types, generations = {}, {}
+        for codigo, pokemon_id in PokemonTipo.objects.values_list("tipo__codigo", "pokemon_id"):
+            types[codigo] = types.get(codigo, 0) | 1 << pokemon_id
+
+        names, images = {}, {}
+        for pokemon_id, nome, imagem, id_geracao in Pokemon.objects.values_list(
+            "idPokemon", "nome", "imagemUrl", "especie__geracao_id"
+        ):
+            generations[id_geracao] = generations.get(id_geracao, 0) | 1 << pokemon_id
+            names[pokemon_id] = nome
+            images[pokemon_id] = imagem
+
+        return cls(types, generations, names, images)
+
+    @classmethod
+    def from_upstream(cls):
+        type_ids = [id_from_url(t["url"]) for t in pokeapi.get("type/?limit=100")["results"]]
+        gen_ids = [id_from_url(g["url"]) for g in pokeapi.get("generation/?limit=100")["results"]]
+        details = pokeapi.fetch_many(
+            [f"type/{i}/" for i in type_ids] + [f"generation/{i}/" for i in gen_ids]
+        )
+        if any(data is None for data in details):
+            raise ValueError("Não foi possível baixar todos os tipos e gerações da PokeAPI")
+
+        names, types, generations = {}, {}, {}
+        for type_id, data in zip(type_ids, details[:len(type_ids)]):
+            ids = []
+            for p in data["pokemon"]:
+                pokemon_id = id_from_url(p["pokemon"]["url"])
+                names[pokemon_id] = p["pokemon"]["name"]
+                ids.append(pokemon_id)
+            types[type_id] = to_bitset(ids)
+
+        # A geração lista espécies; o pokémon padrão de cada espécie tem o mesmo id dela.
+        for gen_id, data in zip(gen_ids, details[len(type_ids):]):
+            ids = []
+            for s in data["pokemon_species"]:
+                species_id = id_from_url(s["url"])
+                names.setdefault(species_id, s["name"])
+                ids.append(species_id)
+            generations[gen_id] = to_bitset(ids)
+
+        images = {pokemon_id: settings.POKEAPI_ARTWORK_URL.format(id=pokemon_id) for pokemon_id in names}
+        return cls(types, generations, names, images)
+
+    def union(self, table, keys):
+        bits = 0
+        for key in keys:
+            bits |= table.get(key, 0)
+        return bits
+
+    def intersection(self, table, keys):
+        bits = None
+        for key in keys:
+            bits = table.get(key, 0) if bits is None else bits & table.get(key, 0)
+        return bits or 0
+
+    def query(self, type_ids=(), gen_ids=(), type_op="or", op="and"):
+        type_bits = gen_bits = None
+        if type_ids:
+            combine = self.intersection if type_op == "and" else self.union
+            type_bits = combine(self.types, type_ids)
+        if gen_ids:
+            gen_bits = self.union(self.generations, gen_ids)
+
+        if type_bits is None:
+            return gen_bits or 0
+        if gen_bits is None:
+            return type_bits
+        return type_bits & gen_bits if op == "and" else type_bits | gen_bits
+
+    def page(self, bits, offset, limit):
+        return [
+            {"id": pokemon_id, "name": self.names.get(pokemon_id), "imagemUrl": sprites.proxy_url(self.images.get(pokemon_id))}
+            for pokemon_id in iter_ids(bits, offset, limit)
+        ]
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    index = _index
+    if index is None or index.is_stale():
+        with _lock:
+            index = _index
+            if index is None or index.is_stale():
+                if settings.POKEAPI_LOCAL_CATALOG:
+                    index = PokemonIndex.from_local()
+                else:
+                    index = PokemonIndex.from_upstream()
+                _index = index
+    return index
+
+
+def invalidate():
+    global _index
+    with _lock:
+        _index = None
+    pokeapi.bump_catalog_version()
@@ -0,0 +1,82 @@
+import json
+import os
+import threading
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode
+
+MANIFEST = "manifest.json"
+# Recursos cujo detalhe também é pedido pelo nome (``pokemon/pikachu/``): o stub
+# responde o nome com o mesmo arquivo gravado pelo id.
+NAMED_RESOURCES = ("pokemon", "pokemon-species", "type", "generation")
+
+_lock = threading.Lock()
+
+
+def normalize_key(path, query=""):
+    """A chave no formato do ``pokeapi.normalize_path``, a partir do caminho sem o ``/api/v2``."""
+    resource_path = path.strip("/").lower()
+    query = urlencode(sorted(parse_qsl(query)))
+    return f"{resource_path}/?{query}" if query else f"{resource_path}/"
+
+
+def path_for(root, key):
+    """
+    Arquivo de uma chave: ``pokemon/25/`` fica em ``pokemon/25.json`` e
+    ``pokemon/?limit=20&offset=0`` em ``pokemon@limit=20&offset=0.json``.
+    """
+    resource_path, _, query = key.partition("?")
+    name = resource_path.strip("/")
+    if query:
+        name = f"{name}@{query}"
+    return Path(root) / f"{name}.json"
+
+
+def record(root, key, body, base_url):
+    """
+    Grava o corpo de uma resposta da PokeAPI em ``root``. O manifesto guarda a URL
+    base de onde veio a gravação, que o stub troca pela dele ao responder.
+    """
+    path = path_for(root, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    partial.write_bytes(body)
+    os.replace(partial, path)
+
+    manifest = Path(root) / MANIFEST
+    with _lock:
+        if not manifest.exists():
+            manifest.write_text(json.dumps({"base_url": base_url.rstrip("/")}, indent=2))
+
+
+class FixtureStore:
+    """As respostas gravadas em ``root``, servidas pelo ``StubPokeAPI(fixtures=...)``."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        try:
+            self.base_url = json.loads((self.root / MANIFEST).read_text())["base_url"].encode()
+        except FileNotFoundError:
+            raise ValueError(f"{self.root} não tem {MANIFEST}: grave as fixtures com o record_pokeapi") from None
+        self.aliases = {}
+        for resource in NAMED_RESOURCES:
+            for path in (self.root / resource).glob("*.json"):
+                try:
+                    name = json.loads(path.read_bytes()).get("name")
+                except ValueError:
+                    continue
+                if name:
+                    self.aliases[f"{resource}/{name.lower()}/"] = path
+
+    def __len__(self):
+        return sum(1 for path in self.root.rglob("*.json") if path.name != MANIFEST)
+
+    def get(self, key, base_url):
+        """O corpo gravado para ``key`` com as URLs apontando para ``base_url``, ou ``None``."""
+        if ".." in key:
+            return None
+        path = path_for(self.root, key)
+        if not path.exists():
+            path = self.aliases.get(key)
+            if path is None:
+                return None
+        return path.read_bytes().replace(self.base_url, base_url.rstrip("/").encode())
@@ -0,0 +1,221 @@
+import functools
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from rest_framework.response import Response
+
+from . import pokeapi
+from .renderers import ORJSONRenderer, dumps
+
+try:
+    import brotli
+except ImportError:  # Sem o Brotli a negociação fica só entre gzip e identity.
+    brotli = None
+
+
+def payload_etag(data, media_type):
+    """ETag forte: o mesmo payload renderizado no mesmo formato gera sempre os mesmos bytes."""
+    digest = hashlib.blake2b(f"{media_type}\n".encode() + dumps(data, sort_keys=True), digest_size=16).hexdigest()
+    return quote_etag(digest)
+
+
+def normalized_url(request):
+    # ?limit=20&offset=0 e ?offset=0&limit=20 são a mesma página. O host fica: os
+    # links de next/previous do catálogo local saem absolutos.
+    return f"{request.build_absolute_uri(request.path)}?{urlencode(sorted(request.GET.lists()), doseq=True)}"
+
+
+async def validator_key(request):
+    # A versão do catálogo entra na chave: um sync_pokeapi invalida todos os ETags.
+    version = await pokeapi.shared_cache().aget("pokeapi:catalog-version", 0)
+    return f"pokeapi:etag:{version}:{request.accepted_media_type}:{normalized_url(request)}"
+
+
+def apply_policy(response, policy, etag):
+    response["ETag"] = etag
+    patch_cache_control(response, **settings.POKEAPI_HTTP_CACHE[policy])
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+class Blob:
+    """Uma resposta pronta: o corpo renderizado e as versões comprimidas dele."""
+
+    __slots__ = ("etag", "content_type", "variants", "size", "expires_at")
+
+    def __init__(self, etag, content_type, body, ttl):
+        self.etag = etag
+        self.content_type = content_type
+        self.variants = {"identity": body}
+        if len(body) >= settings.RESPONSE_CACHE_MIN_COMPRESS:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=settings.RESPONSE_CACHE_GZIP_LEVEL, mtime=0)
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(
+                    body, quality=settings.RESPONSE_CACHE_BROTLI_QUALITY, mode=brotli.MODE_TEXT
+                )
+        self.size = sum(len(variant) for variant in self.variants.values())
+        self.expires_at = time.monotonic() + ttl
+
+
+class BlobCache:
+    """
+    LRU em processo de respostas já renderizadas e comprimidas, limitado pelo total de
+    bytes (RESPONSE_CACHE_MAX_BYTES). A chave é a mesma do validador, então subir a
+    versão do catálogo tira todas as entradas de circulação.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                return None
+            if time.monotonic() >= blob.expires_at:
+                del self._entries[key]
+                self.size -= blob.size
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def set(self, key, blob):
+        max_bytes = settings.RESPONSE_CACHE_MAX_BYTES
+        if blob.size > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = blob
+            self.size += blob.size
+            while self.size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+blobs = BlobCache()
+
+
+def negotiate_encoding(header, available):
+    """
+    Escolhe entre as ``available`` pelo Accept-Encoding (com os pesos ``q``). Empate
+    fica com a menor: br antes de gzip antes de identity, que só sai da disputa com
+    ``identity;q=0`` explícito.
+    """
+    weights = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if coding:
+            weights[coding.strip().lower()] = weight
+
+    identity = weights.get("identity", 1.0)
+    for coding in ("br", "gzip"):
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if coding in available and weight > 0 and weight >= identity:
+            return coding
+    return "identity"
+
+
+def blob_response(request, blob, policy):
+    encoding = negotiate_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), blob.variants)
+    response = HttpResponse(blob.variants[encoding], content_type=blob.content_type)
+    apply_policy(response, policy, blob.etag)
+    if encoding != "identity":
+        response["Content-Encoding"] = encoding
+        # Como o GZipMiddleware do Django: o corpo comprimido não é byte a byte o mesmo,
+        # então o ETag vira fraco (e o If-None-Match continua batendo).
+        response["ETag"] = f"W/{blob.etag}"
+    if len(blob.variants) > 1:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def cacheable(request):
+    return settings.RESPONSE_CACHE_MAX_BYTES > 0 and isinstance(request.accepted_renderer, ORJSONRenderer)
+
+
+def build_blob(view, request, data, etag, ttl):
+    # Renderizar e comprimir uma página grande leva dezenas de ms: roda numa thread,
+    # fora do event loop que atende as outras requisições do worker.
+    body = request.accepted_renderer.render(data, request.accepted_media_type, {"request": request, "view": view})
+    return Blob(etag, request.accepted_media_type, body, ttl)
+
+
+def conditional(policy, resource):
+    """
+    Aplica a política de Cache-Control ``policy`` e responde a ``If-None-Match``.
+
+    O ETag de cada URL fica memorizado no cache compartilhado pelo mesmo TTL do
+    ``resource`` da PokeAPI de onde os dados vêm, então uma revalidação que bate
+    devolve 304 sem consultar o upstream nem remontar o payload.
+
+    Respostas JSON também ficam prontas em ``blobs`` (corpo e versões gzip/br), pelo
+    mesmo TTL: uma requisição nova é servida sem renderizar nem comprimir nada.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(self, request, *args, **kwargs):
+            cache = pokeapi.shared_cache()
+            key = await validator_key(request)
+
+            blob = blobs.get(key) if cacheable(request) else None
+            if blob is not None:
+                response = blob_response(request, blob, policy)
+                return get_conditional_response(request, etag=blob.etag, response=response)
+
+            etag = await cache.aget(key)
+            if etag is not None:
+                validators = apply_policy(Response(), policy, etag)
+                response = get_conditional_response(request, etag=etag, response=validators)
+                if response is not validators:
+                    return response
+
+            response = await view(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            etag = payload_etag(response.data, request.accepted_media_type)
+            # Payload montado com cache vencido não vira validador nem blob: quando o
+            # upstream voltar, a próxima requisição precisa remontar a resposta.
+            if pokeapi.served_stale():
+                apply_policy(response, policy, etag)
+                return get_conditional_response(request, etag=etag, response=response)
+
+            ttl = pokeapi.ttl_for(f"{resource}/")
+            await cache.aset(key, etag, ttl)
+            if not cacheable(request):
+                apply_policy(response, policy, etag)
+                return get_conditional_response(request, etag=etag, response=response)
+
+            blob = await sync_to_async(build_blob, thread_sensitive=False)(self, request, response.data, etag, ttl)
+            blobs.set(key, blob)
+            return get_conditional_response(request, etag=etag, response=blob_response(request, blob, policy))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+
+from poke import http_cache, pokeapi, search
+from poke.pokeapi_stub import StubPokeAPI
+
+
+REVALIDATION_PATHS = [
+    "/api/pokemon/types/",
+    "/api/pokemon/generations/",
+    "/api/pokemon/pokemon-25/",
+    "/api/pokemon/?offset=0&limit=100",
+]
+
+# Nomes exatos, um prefixo e erros de digitação: o search-name só acerta os exatos.
+SEARCH_QUERIES = ["pokemon-25", "pokemon-1000", "pokemon-7", "pokemn-25", "pokemon-52O"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Mede a latência dos endpoints do catálogo contra um stub local da PokeAPI."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limits", default="10,20,50,100", help="Valores de limit do list, separados por vírgula.")
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--latency", type=float, default=0.01, help="Latência simulada do upstream, em segundos.")
+        parser.add_argument("--max-inflight", default="1,16", help="Valores de POKEAPI_MAX_INFLIGHT a comparar.")
+        parser.add_argument("--concurrency", type=int, default=200,
+                            help="Requisições simultâneas ao retrieve, todas com cache frio.")
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        limits = [int(v) for v in options["limits"].split(",")]
+        inflights = [int(v) for v in options["max_inflight"].split(",")]
+
+        with StubPokeAPI(latency=options["latency"]) as stub:
+            self.stdout.write(f"upstream stub: {stub.base_url} (latência {options['latency'] * 1000:.0f} ms)")
+            self.stdout.write(f"{'max_inflight':>12} {'limit':>6} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+
+            for max_inflight in inflights:
+                with override_settings(POKEAPI_BASE_URL=stub.base_url, POKEAPI_MAX_INFLIGHT=max_inflight):
+                    for limit in limits:
+                        samples = asyncio.run(self.list_samples(limit, options["iterations"]))
+                        self.stdout.write(
+                            f"{max_inflight:>12} {limit:>6} {percentile(samples, 50):>9.1f} "
+                            f"{percentile(samples, 99):>9.1f} {statistics.mean(samples):>9.1f}"
+                        )
+
+            with override_settings(POKEAPI_BASE_URL=stub.base_url):
+                pokeapi.clear_cache()
+                concurrency = options["concurrency"]
+                elapsed = asyncio.run(self.concurrent_retrieves(concurrency))
+                self.stdout.write(
+                    f"{concurrency} retrieves simultâneos: {elapsed * 1000:.1f} ms no total, "
+                    f"{concurrency / elapsed:.0f} req/s"
+                )
+
+                self.stdout.write(f"{'revalidação':<32} {'200 bytes':>10} {'200 ms':>8} {'304 bytes':>10} {'304 ms':>8}")
+                for path in REVALIDATION_PATHS:
+                    full, revalidated = asyncio.run(self.revalidation(path, options["iterations"]))
+                    self.stdout.write(
+                        f"{path:<32} {full[0]:>10} {full[1]:>8.2f} {revalidated[0]:>10} {revalidated[1]:>8.2f}"
+                    )
+
+                self.stdout.write(
+                    f"{'busca':<14} {'resultados':>10} {'índice µs':>10} {'consultas/s':>12} "
+                    f"{'/search ms':>11} {'search-name ms':>15} {'status':>7}"
+                )
+                for query in SEARCH_QUERIES:
+                    count, per_query = self.index_search(query, options["iterations"] * 50)
+                    endpoint, upstream, upstream_status = asyncio.run(self.search_paths(query, options["iterations"]))
+                    self.stdout.write(
+                        f"{query:<14} {count:>10} {per_query * 1e6:>10.1f} {1 / per_query:>12.0f} "
+                        f"{endpoint:>11.2f} {upstream:>15.2f} {upstream_status:>7}"
+                    )
+
+                with_metrics, without_metrics = asyncio.run(self.instrumentation(options["iterations"] * 50))
+                self.stdout.write(
+                    f"retrieve com cache quente: {with_metrics * 1000:.3f} ms com MetricsMiddleware, "
+                    f"{without_metrics * 1000:.3f} ms sem ({(with_metrics / without_metrics - 1) * 100:+.1f}%)"
+                )
+
+    async def list_samples(self, limit, iterations):
+        # Um único event loop, como num worker ASGI: o AsyncClient da PokeAPI é reaproveitado.
+        client = AsyncClient()
+        samples = []
+        for _ in range(iterations):
+            # Cada amostra com os caches frios: o que se mede é o fan-out dos detalhes ao upstream.
+            pokeapi.clear_cache()
+            http_cache.blobs.clear()
+            started = time.perf_counter()
+            response = await client.get("/api/pokemon/", {"offset": 0, "limit": limit})
+            samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.content
+        return samples
+
+    async def concurrent_retrieves(self, concurrency):
+        client = AsyncClient()
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get(f"/api/pokemon/pokemon-{i % 1025 + 1}/") for i in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+        assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+        return elapsed
+
+    async def revalidation(self, path, iterations):
+        """Bytes e tempo médio de uma resposta completa (cache quente) contra um 304."""
+        client = AsyncClient()
+        first = await client.get(path)
+        etag = first.headers["ETag"]
+
+        results = []
+        for headers in ({}, {"if-none-match": etag}):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                response = await client.get(path, headers=headers)
+            elapsed = (time.perf_counter() - started) / iterations * 1000
+            results.append((len(response.content), elapsed))
+        return results
+
+    def index_search(self, query, iterations):
+        """Quantos nomes a busca devolve e o tempo médio de uma consulta direto no índice, em segundos."""
+        index = search.get_index()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            matches = index.search(query)
+        return len(matches), (time.perf_counter() - started) / iterations
+
+    async def search_paths(self, query, iterations):
+        """Tempo médio do ``/search`` contra o ``search-name``, que sempre vai ao upstream (cache frio)."""
+        client = AsyncClient()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response = await client.get("/api/pokemon/search/", {"q": query})
+            assert response.status_code == 200, response.content
+        endpoint = (time.perf_counter() - started) / iterations * 1000
+
+        key = pokeapi.normalize_path(f"pokemon/{query}")
+        # Os erros de digitação dão 404 no search-name; o aviso do django.request só polui a tabela.
+        logger = logging.getLogger("django.request")
+        level = logger.level
+        logger.setLevel(logging.ERROR)
+        elapsed = 0.0
+        try:
+            for _ in range(iterations):
+                pokeapi.memory_cache.clear()
+                await pokeapi.shared_cache().adelete(f"pokeapi:{key}")
+                started = time.perf_counter()
+                response = await client.get("/api/pokemon/search-name/", {"name": query})
+                elapsed += time.perf_counter() - started
+        finally:
+            logger.setLevel(level)
+        return endpoint, elapsed / iterations * 1000, response.status_code
+
+    async def instrumentation(self, iterations, rounds=5):
+        """Mediana, em segundos, de um retrieve servido do cache com e sem o MetricsMiddleware."""
+        path = "/api/pokemon/pokemon-25/"
+        without = [m for m in settings.MIDDLEWARE if m != "poke.middleware.MetricsMiddleware"]
+        samples = {True: [], False: []}
+        for _ in range(rounds):
+            for enabled in (True, False):
+                with override_settings(MIDDLEWARE=settings.MIDDLEWARE if enabled else without):
+                    client = AsyncClient()
+                    await client.get(path)
+                    started = time.perf_counter()
+                    for _ in range(iterations):
+                        await client.get(path)
+                    samples[enabled].append((time.perf_counter() - started) / iterations)
+        return statistics.median(samples[True]), statistics.median(samples[False])
@@ -0,0 +1,91 @@
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from poke.models import PokemonUsuario, TipoPokemon, Usuario
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o /api/pokemon-usuario/export/ com coleções de tamanhos crescentes: tempo até "
+        "o primeiro byte, tempo total e pico de memória. Os dados são criados numa transação "
+        "desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="100,1000,10000,100000", help="Tamanhos de coleção, separados por vírgula.")
+        parser.add_argument("--output", default="ndjson", choices=["ndjson", "csv"])
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'linhas':>8} {'1º byte ms':>11} {'total ms':>9} {'linhas/s':>9} {'pico KB':>8} {'MB':>7}")
+        for position, rows in enumerate(int(v) for v in options["rows"].split(",")):
+            try:
+                with transaction.atomic():
+                    usuario = self.populate(rows)
+                    # async_to_sync a partir da thread principal: o ORM assíncrono roda nesta
+                    # mesma thread e conexão, então enxerga a transação ainda aberta.
+                    export = async_to_sync(self.export)
+                    if position == 0:
+                        export(usuario, options["output"])
+                    first, total, _, size = export(usuario, options["output"])
+                    # O tracemalloc deixa tudo bem mais lento: o pico de memória sai de outra rodada.
+                    _, _, peak, _ = export(usuario, options["output"], trace=True)
+                    raise Rollback
+            except Rollback:
+                pass
+            self.stdout.write(
+                f"{rows:>8} {first * 1000:>11.1f} {total * 1000:>9.0f} {rows / total:>9.0f} "
+                f"{peak / 1024:>8.0f} {size / 1024 / 1024:>7.1f}"
+            )
+
+    def populate(self, rows):
+        usuario = Usuario.objects.create_user(
+            email="benchmark-export@teste.com", login="benchmark-export", password="benchmark", nome="Benchmark"
+        )
+        tipos = [TipoPokemon.objects.create(descricao=d) for d in ("fire", "flying")]
+        for start in range(0, rows, 5000):
+            pokemons = PokemonUsuario.objects.bulk_create(
+                PokemonUsuario(idUsuario=usuario, codigo=str(i), nome=f"pokemon-{i}")
+                for i in range(start + 1, min(start + 5000, rows) + 1)
+            )
+            PokemonUsuario.tipos.through.objects.bulk_create(
+                PokemonUsuario.tipos.through(pokemonusuario_id=pokemon.pk, tipopokemon_id=tipo.pk)
+                for pokemon in pokemons for tipo in tipos
+            )
+        return usuario
+
+    async def export(self, usuario, output, trace=False):
+        """
+        Consome o export como um cliente: devolve o tempo até o primeiro byte, o tempo
+        total, o pico de memória (só com ``trace``) e o tamanho do corpo.
+        """
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(usuario)}"}
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        response = await AsyncClient().get("/api/pokemon-usuario/export/", {"output": output}, headers=headers)
+        assert response.status_code == 200, response.content
+
+        first = None
+        size = 0
+        async for chunk in response.streaming_content:
+            if first is None:
+                first = time.perf_counter() - started
+            # Só conta os bytes: o cliente de verdade também não guarda o corpo inteiro.
+            size += len(chunk)
+        total = time.perf_counter() - started
+        peak = 0
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return first, total, peak, size
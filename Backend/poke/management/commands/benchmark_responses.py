@@ -0,0 +1,68 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, modify_settings, override_settings
+
+from poke import pokeapi, warmup
+from poke.pokeapi_stub import StubPokeAPI
+
+ENDPOINTS = [
+    ("list", "/api/pokemon/", {"offset": 0, "limit": 20}),
+    ("types", "/api/pokemon/types/", {}),
+    ("generations", "/api/pokemon/generations/", {}),
+    ("filter-generation", "/api/pokemon/filter-generation/", {"id": 1}),
+]
+ENCODINGS = [("identity", "identity"), ("gzip", "gzip"), ("br", "gzip, deflate, br")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede CPU por requisição e bytes trafegados nos endpoints do catálogo com o cache "
+        "de respostas prontas (http_cache.blobs) desligado, desligado com o GZipMiddleware "
+        "comprimindo a cada requisição, e ligado. O upstream vem do stub local e já está no "
+        "cache da PokeAPI em todas as rodadas: a diferença é só renderizar e comprimir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requisições por endpoint e modo.")
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        with StubPokeAPI() as stub, override_settings(POKEAPI_BASE_URL=stub.base_url):
+            pokeapi.clear_cache()
+            self.stdout.write(
+                f"{'endpoint':<18} {'CPU µs sem':>11} {'+ gzip':>8} {'com':>8} "
+                + " ".join(f"{name + ' B':>10}" for name, _ in ENCODINGS)
+            )
+            for name, url, params in ENDPOINTS:
+                with override_settings(RESPONSE_CACHE_MAX_BYTES=0):
+                    sem = async_to_sync(self.measure)(url, params, options["requests"])
+                    with modify_settings(MIDDLEWARE={"prepend": "django.middleware.gzip.GZipMiddleware"}):
+                        dinamico = async_to_sync(self.measure)(url, params, options["requests"])
+                com = async_to_sync(self.measure)(url, params, options["requests"])
+                sizes = async_to_sync(self.sizes)(url, params)
+                self.stdout.write(
+                    f"{name:<18} {sem:>11.0f} {dinamico:>8.0f} {com:>8.0f} " + " ".join(f"{size:>10}" for size in sizes)
+                )
+                warmup.wait_pending()
+
+    async def measure(self, url, params, requests):
+        """CPU do processo por requisição, com o cliente pedindo br como um navegador."""
+        # O AsyncClient ignora os headers do construtor: vão em cada requisição.
+        client = AsyncClient()
+        headers = {"accept-encoding": "gzip, deflate, br"}
+        # Aquece o cache da PokeAPI (e o de respostas, quando ligado) antes de medir.
+        await client.get(url, params, headers=headers)
+        started = time.process_time()
+        for _ in range(requests):
+            response = await client.get(url, params, headers=headers)
+            assert response.status_code == 200, response.content
+        return (time.process_time() - started) / requests * 1_000_000
+
+    async def sizes(self, url, params):
+        client = AsyncClient()
+        return [
+            len((await client.get(url, params, headers={"accept-encoding": header})).content)
+            for _, header in ENCODINGS
+        ]
@@ -0,0 +1,96 @@
+import json
+import time
+import tracemalloc
+
+import httpx
+import orjson
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from poke.catalog import PokemonResumo, imagem_url
+from poke.pokeapi_stub import StubPokeAPI
+from poke.renderers import ORJSONRenderer
+
+
+def dict_summary(data):
+    # Como o retrieve/list montavam a resposta antes do PokemonResumo.
+    return {
+        "id": data["id"],
+        "nome": data["name"],
+        "tipos": [t["type"]["name"] for t in data["types"]],
+        "imagemUrl": imagem_url(data),
+    }
+
+
+PIPELINES = {
+    "json + dict + JSONRenderer": (json.loads, dict_summary, JSONRenderer()),
+    "orjson + dict + ORJSONRenderer": (orjson.loads, dict_summary, ORJSONRenderer()),
+    "orjson + slots + ORJSONRenderer": (orjson.loads, PokemonResumo.from_upstream, ORJSONRenderer()),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark do parse + montagem + render de uma página do list sobre "
+        "payloads gravados do stub no tamanho real da PokeAPI: CPU e memória por requisição."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="Pokémons por página (requisição).")
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        limit, iterations = options["limit"], options["iterations"]
+        payloads = self.record(limit)
+        self.stdout.write(
+            f"{limit} detalhes gravados, {sum(map(len, payloads)) / limit / 1024:.0f} KB em média; "
+            f"{iterations} requisições por pipeline"
+        )
+        self.stdout.write(
+            f"{'pipeline':<34} {'parse ms':>9} {'montar ms':>10} {'render ms':>10} "
+            f"{'CPU ms':>8} {'pico KB':>9} {'bytes':>7}"
+        )
+        for name, pipeline in PIPELINES.items():
+            stages, cpu, peak, size = self.measure(pipeline, payloads, iterations)
+            self.stdout.write(
+                f"{name:<34} {stages[0]:>9.2f} {stages[1]:>10.3f} {stages[2]:>10.3f} "
+                f"{cpu:>8.2f} {peak / 1024:>9.0f} {size:>7}"
+            )
+
+    def record(self, limit):
+        """Bytes crus dos detalhes, como chegam do upstream, para não medir a rede."""
+        with StubPokeAPI(size=limit, full=True) as stub, httpx.Client(base_url=stub.base_url) as client:
+            return [client.get(f"/pokemon/{pokemon_id}/").content for pokemon_id in range(1, limit + 1)]
+
+    def request(self, pipeline, payloads, clock=None):
+        loads, summary, renderer = pipeline
+        marks = [clock()] if clock else None
+        parsed = [loads(payload) for payload in payloads]
+        if clock:
+            marks.append(clock())
+        results = [summary(data) for data in parsed]
+        if clock:
+            marks.append(clock())
+        body = renderer.render({"count": len(results), "next": None, "previous": None, "results": results})
+        if clock:
+            marks.append(clock())
+        return body, marks
+
+    def measure(self, pipeline, payloads, iterations):
+        self.request(pipeline, payloads)
+
+        stages = [0.0, 0.0, 0.0]
+        started = time.process_time()
+        for _ in range(iterations):
+            body, marks = self.request(pipeline, payloads, clock=time.perf_counter)
+            for i in range(3):
+                stages[i] += marks[i + 1] - marks[i]
+        cpu = (time.process_time() - started) / iterations * 1000
+        stages = [stage / iterations * 1000 for stage in stages]
+
+        # Pico de memória de uma requisição, medido à parte: o tracemalloc distorce o tempo.
+        tracemalloc.start()
+        self.request(pipeline, payloads)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return stages, cpu, peak, len(body)
@@ -0,0 +1,184 @@
+import asyncio
+import os
+import secrets
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from poke.pokeapi_stub import StubPokeAPI
+
+from .benchmark_writes import percentile
+
+PATHS = [
+    "/api/pokemon/?limit=20",
+    "/api/pokemon/pokemon-25/",
+    "/api/pokemon/search/?q=pokemon-1",
+    "/api/pokemon/types/",
+]
+# O servidor medido só expõe /metrics (usado para saber se subiu) com um token.
+METRICS_TOKEN = secrets.token_urlsafe(16)
+METRICS_HEADERS = {"Authorization": f"Bearer {METRICS_TOKEN}"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    """PIDs de ``pid`` e de todos os descendentes (lidos do /proc)."""
+    parents = {}
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        parents.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+    found, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        found.append(current)
+        pending.extend(parents.get(current, []))
+    return found
+
+
+def pss_mb(pid):
+    """
+    Memória proporcional (PSS) do servidor inteiro: páginas compartilhadas entre o
+    master e os workers entram divididas, então o ganho do preload aparece aqui.
+    """
+    total = 0
+    for child in children(pid):
+        try:
+            for line in Path(f"/proc/{child}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Pss:"):
+                    total += int(line.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Sobe a API em cada modo de servidor (runserver, uvicorn, gunicorn com workers do "
+        "uvicorn, gunicorn gthread com o WSGI) contra o stub local da PokeAPI e mede a vazão "
+        "com clientes HTTP simultâneos. O gerador de carga roda nesta mesma máquina: em "
+        "poucos núcleos ele disputa CPU com o servidor, então compare os modos entre si."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", default="runserver,uvicorn,gunicorn,gthread")
+        parser.add_argument("--workers", type=int, default=3, help="Processos do gunicorn (WEB_CONCURRENCY).")
+        parser.add_argument("--threads", type=int, default=4, help="Threads por worker no modo gthread.")
+        parser.add_argument("--concurrency", type=int, default=32, help="Conexões simultâneas do gerador de carga.")
+        parser.add_argument("--duration", type=float, default=10.0, help="Segundos de medição por modo.")
+        parser.add_argument("--latency", type=float, default=0.0, help="Atraso do stub por requisição, em segundos.")
+        parser.add_argument("--paths", default=",".join(PATHS), help="Caminhos requisitados em rodízio.")
+
+    def handle(self, *args, **options):
+        paths = options["paths"].split(",")
+        with StubPokeAPI(latency=options["latency"]) as stub:
+            self.stdout.write(f"PokeAPI stub em {stub.base_url}; {options['concurrency']} conexões, {options['duration']:.0f}s por modo")
+            self.stdout.write(f"{'modo':>10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'erros':>6} {'PSS MB':>7}")
+            for mode in options["modes"].split(","):
+                port = free_port()
+                server = self.start(mode, port, stub.base_url, options)
+                try:
+                    base_url = f"http://127.0.0.1:{port}"
+                    self.wait_ready(server, base_url)
+                    # Uma rodada curta antes de medir: caches e conexões de cada worker aquecidos.
+                    asyncio.run(self.load(base_url, paths, options["concurrency"], 2.0))
+                    elapsed, samples, errors = asyncio.run(
+                        self.load(base_url, paths, options["concurrency"], options["duration"])
+                    )
+                    memory = pss_mb(server.pid)
+                finally:
+                    self.stop(server)
+                self.stdout.write(
+                    f"{mode:>10} {len(samples) / elapsed:>8.0f} {percentile(samples, 50):>8.1f} "
+                    f"{percentile(samples, 99):>8.1f} {errors:>6} {memory:>7.0f}"
+                )
+
+    def start(self, mode, port, pokeapi_url, options):
+        env = {
+            **os.environ,
+            "POKEAPI_BASE_URL": pokeapi_url,
+            "DEBUG": "False",
+            "ALLOWED_HOSTS": "127.0.0.1",
+            "WEB_CONCURRENCY": str(options["workers"]),
+            "GUNICORN_BIND": f"127.0.0.1:{port}",
+            "GUNICORN_THREADS": str(options["threads"]),
+            "POKEAPI_WARM_INTERVAL": "0",
+            "METRICS_TOKEN": METRICS_TOKEN,
+        }
+        python = sys.executable
+        commands = {
+            # --noreload: o autoreloader só acrescenta um processo vigiando arquivos.
+            "runserver": [python, "manage.py", "runserver", f"127.0.0.1:{port}", "--noreload"],
+            # O que o script.sh rodava até aqui: um processo uvicorn, sem preload.
+            "uvicorn": [python, "-m", "uvicorn", "core.asgi:application", "--port", str(port), "--log-level", "warning"],
+            "gunicorn": [python, "-m", "gunicorn", "core.asgi:application"],
+            "gthread": [python, "-m", "gunicorn", "core.wsgi:application"],
+        }
+        if mode not in commands:
+            raise CommandError(f"Modo desconhecido: {mode} (use {', '.join(commands)})")
+        # O gunicorn.conf.py usa gthread por padrão; o modo ASGI precisa do worker do uvicorn.
+        env["GUNICORN_WORKER_CLASS"] = "uvicorn_worker.UvicornWorker" if mode == "gunicorn" else "gthread"
+        return subprocess.Popen(
+            commands[mode], cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def wait_ready(self, server, base_url, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"O servidor saiu com status {server.returncode} antes de responder.")
+            try:
+                if httpx.get(f"{base_url}/metrics", headers=METRICS_HEADERS, timeout=1.0).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"O servidor não respondeu em {timeout:.0f}s.")
+
+    def stop(self, server):
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+    async def load(self, base_url, paths, concurrency, duration):
+        samples, errors = [], 0
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            deadline = time.perf_counter() + duration
+
+            async def user(offset):
+                nonlocal errors
+                i = offset
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(paths[i % len(paths)])
+                        ok = response.status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    if ok:
+                        samples.append((time.perf_counter() - started) * 1000)
+                    else:
+                        errors += 1
+                    i += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(user(i) for i in range(concurrency)))
+            return time.perf_counter() - started, samples or [0.0], errors
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import logging
+import platform
+import re
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from poke import http_cache, pokeapi, tipos, warmup
+from poke.models import Usuario
+from poke.pokeapi_stub import StubPokeAPI
+
+from .benchmark import percentile
+
+SERVER_TIMING_QUERIES = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+# Colunas comparadas entre rodadas e o sentido em que cada uma piora.
+METRICS = [("rps", "req/s", -1), ("p95", "p95 ms", 1), ("upstream", "upstream/req", 1), ("queries", "queries/req", 1)]
+
+
+@dataclass(slots=True)
+class Scenario:
+    """Uma ação medida: ``request(i)`` devolve o caminho e os dados da i-ésima requisição."""
+
+    name: str
+    method: str
+    request: object
+    status: int = 200
+    # Fração do --requests que o cenário faz (o export percorre o catálogo inteiro).
+    share: float = 1.0
+    # Usa os PokemonUsuario do usuario-create: sem ele na rodada, o cenário é pulado.
+    uses_created: bool = False
+
+
+class Command(BaseCommand):
+    help = (
+        "Roda todas as ações do PokemonAPIViewSet e o CRUD do PokemonUsuarioViewSet contra o "
+        "stub local da PokeAPI (catálogo sintético ou respostas gravadas pelo record_pokeapi) e "
+        "mede vazão, p50/p95/p99, chamadas ao upstream e queries ao banco por requisição. O "
+        "resultado vai para um JSON em --output; --compare aponta as regressões contra outra "
+        "rodada. O CRUD escreve no banco configurado (com as migrações aplicadas) e apaga o "
+        "que criou no fim. O export percorre o catálogo inteiro: com --fixtures ele só passa "
+        "se a gravação foi feita com record_pokeapi --pokemon 0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas.")
+        parser.add_argument("--keys", type=int, default=50,
+                            help="Pokémons distintos pedidos em rodízio: o resto acerta o cache.")
+        parser.add_argument("--scenarios", help="Só estes cenários, separados por vírgula.")
+        parser.add_argument("--fixtures", help="Diretório do record_pokeapi: o stub responde com os dados gravados.")
+        parser.add_argument("--latency", type=float, default=0.01, help="Atraso do stub por requisição, em segundos.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fração das requisições do stub que falham.")
+        parser.add_argument("--full", action="store_true", help="Detalhes sintéticos com o tamanho dos da PokeAPI real.")
+        parser.add_argument("--output", default=str(Path(settings.BASE_DIR) / "benchmarks"),
+                            help="Diretório onde o JSON da rodada é salvo.")
+        parser.add_argument("--label", default="", help="Sufixo do nome do arquivo salvo.")
+        parser.add_argument("--compare", help="JSON de uma rodada anterior, ou 'latest' para a última em --output.")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Variação relativa a partir da qual uma métrica conta como regressão.")
+        parser.add_argument("--fail-on-regression", action="store_true", help="Sai com erro se houver regressão.")
+
+    @override_settings(ALLOWED_HOSTS=["testserver"], METRICS_SERVER_TIMING=True, POKEAPI_WARM_INTERVAL=0)
+    def handle(self, *args, **options):
+        output = Path(options["output"])
+        baseline = self.load_baseline(options["compare"], output) if options["compare"] else None
+        # 404 e 503 das falhas injetadas só poluiriam a tabela.
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+
+        stub = StubPokeAPI(latency=options["latency"], error_rate=options["error_rate"], full=options["full"],
+                           fixtures=options["fixtures"])
+        with stub, override_settings(POKEAPI_BASE_URL=stub.base_url):
+            self.stdout.write(
+                f"PokeAPI stub em {stub.base_url} ({'respostas gravadas' if options['fixtures'] else 'sintético'}, "
+                f"latência {options['latency'] * 1000:.0f} ms, erros {options['error_rate']:.0%}); "
+                f"{options['requests']} requisições por cenário, {options['concurrency']} simultâneas"
+            )
+            self.stdout.write(
+                f"{'cenário':<18} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6} "
+                f"{'upstream/req':>13} {'queries/req':>12}"
+            )
+            usuario = Usuario.objects.create_user(
+                email="benchmark-suite@teste.com", login="benchmark-suite", password="benchmark", nome="Benchmark",
+                is_staff=True,  # o cenário cache-stats exige administrador
+            )
+            try:
+                results = self.run_all(stub, usuario, options)
+            finally:
+                Usuario.objects.filter(pk=usuario.pk).delete()
+
+        path = self.save(results, output, options)
+        self.stdout.write(f"Resultados em {path}")
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{regressions} regressões acima de {options['threshold']:.0%}")
+
+    def run_all(self, stub, usuario, options):
+        self.reset()
+        pokemons = async_to_sync(self.discover)(options["keys"])
+        if not pokemons:
+            raise CommandError("O catálogo não devolveu nenhum pokémon para usar nos cenários.")
+
+        selected = options["scenarios"].split(",") if options["scenarios"] else None
+        created = self.created = []
+        results = {}
+        for scenario in self.scenarios(pokemons, created):
+            if selected and scenario.name not in selected or scenario.uses_created and not created:
+                continue
+            requests = len(created) if scenario.name == "usuario-destroy" else options["requests"]
+            requests = max(1, round(requests * scenario.share))
+            # Cada cenário começa com os caches da PokeAPI e das respostas frios: o
+            # upstream/req é o custo de --keys chaves diluído em --requests requisições.
+            self.reset()
+            requests_before = stub.requests
+            result = async_to_sync(self.measure)(scenario, requests, options["concurrency"], usuario)
+            warmup.wait_pending()
+            result["upstream"] = (stub.requests - requests_before) / requests
+            results[scenario.name] = result
+            self.stdout.write(
+                f"{scenario.name:<18} {result['rps']:>8.0f} {result['p50']:>8.1f} {result['p95']:>8.1f} "
+                f"{result['p99']:>8.1f} {result['errors']:>6} {result['upstream']:>13.2f} {result['queries']:>12.2f}"
+            )
+        return results
+
+    def reset(self):
+        warmup.wait_pending()
+        pokeapi.clear_cache()
+        http_cache.blobs.clear()
+        tipos.cache.clear()
+
+    async def discover(self, keys):
+        """Os (id, nome) dos primeiros ``keys`` pokémons, lidos do próprio list em páginas de 20."""
+        client = AsyncClient()
+        pokemons = []
+        while len(pokemons) < keys:
+            response = await client.get("/api/pokemon/", {"offset": len(pokemons), "limit": 20})
+            results = response.json().get("results", []) if response.status_code == 200 else []
+            if not results:
+                break
+            pokemons.extend((p["id"], p["nome"]) for p in results)
+        return pokemons[:keys]
+
+    def scenarios(self, pokemons, created):
+        """
+        Todas as ações do PokemonAPIViewSet e o CRUD do PokemonUsuarioViewSet. O CRUD
+        guarda em ``created`` os ids criados, que os cenários seguintes reaproveitam.
+        """
+        count = len(pokemons)
+        pages = max(count // 20, 1)
+
+        def pokemon(i):
+            return pokemons[i % count]
+
+        def own(i):
+            return created[i % len(created)]
+
+        return [
+            Scenario("list", "get", lambda i: ("/api/pokemon/", {"offset": i % pages * 20, "limit": 20})),
+            Scenario("retrieve", "get", lambda i: (f"/api/pokemon/{pokemon(i)[0]}/", {})),
+            Scenario("batch", "get", lambda i: ("/api/pokemon/batch/", {
+                "ids": ",".join(str(pokemon(i + j)[0]) for j in range(6)),
+            })),
+            Scenario("search-name", "get", lambda i: ("/api/pokemon/search-name/", {"name": pokemon(i)[1]})),
+            Scenario("search", "get", lambda i: ("/api/pokemon/search/", {"q": pokemon(i)[1][:4]})),
+            Scenario("types", "get", lambda i: ("/api/pokemon/types/", {})),
+            Scenario("generations", "get", lambda i: ("/api/pokemon/generations/", {})),
+            Scenario("filter-generation", "get", lambda i: ("/api/pokemon/filter-generation/", {"id": i % 3 + 1})),
+            Scenario("filter-combined", "get",
+                     lambda i: ("/api/pokemon/filter-combined/", {"type_id": i % 18 + 1, "gen_id": 1, "limit": 50})),
+            Scenario("cache-stats", "get", lambda i: ("/api/pokemon/cache-stats/", {})),
+            Scenario("export", "get", lambda i: ("/api/pokemon/export/", {}), share=0.01),
+            Scenario("usuario-create", "post", lambda i: ("/api/pokemon-usuario/", {
+                "nome": pokemon(i)[1], "codigo": str(pokemon(i)[0]), "favorito": False, "grupoBatalha": False,
+            }), status=201),
+            Scenario("usuario-list", "get", lambda i: ("/api/pokemon-usuario/", {})),
+            Scenario("usuario-retrieve", "get", lambda i: (f"/api/pokemon-usuario/{own(i)}/", {}), uses_created=True),
+            Scenario("usuario-update", "patch",
+                     lambda i: (f"/api/pokemon-usuario/{own(i)}/", {"favorito": i % 2 == 0}), uses_created=True),
+            Scenario("usuario-destroy", "delete", lambda i: (f"/api/pokemon-usuario/{created[i]}/", {}),
+                     status=204, uses_created=True),
+        ]
+
+    async def measure(self, scenario, requests, concurrency, usuario):
+        # O AsyncClient ignora os headers do construtor: vão em cada requisição.
+        client = AsyncClient()
+        headers = {"authorization": f"Bearer {AccessToken.for_user(usuario)}"}
+        pending = iter(range(requests))
+        samples, queries, errors = [], 0, 0
+
+        async def user():
+            nonlocal queries, errors
+            for i in pending:
+                path, data = scenario.request(i)
+                started = time.perf_counter()
+                try:
+                    if scenario.method == "get":
+                        response = await client.get(path, data, headers=headers)
+                    else:
+                        response = await getattr(client, scenario.method)(
+                            path, data, content_type="application/json", headers=headers,
+                        )
+                    body = await self.read(response)
+                except Exception:
+                    errors += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                match = SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+                queries += int(match.group(1)) if match else 0
+                if response.status_code != scenario.status:
+                    errors += 1
+                    continue
+                samples.append(elapsed)
+                if scenario.name == "usuario-create":
+                    self.created.append(json.loads(body)["idPokemonUsuario"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return {
+            "requests": requests,
+            "errors": errors,
+            "rps": len(samples) / elapsed,
+            "p50": percentile(samples or [0.0], 50),
+            "p95": percentile(samples or [0.0], 95),
+            "p99": percentile(samples or [0.0], 99),
+            "queries": queries / requests,
+        }
+
+    async def read(self, response):
+        if not response.streaming:
+            return response.content
+        if response.is_async:
+            return b"".join([chunk async for chunk in response.streaming_content])
+        return response.getvalue()
+
+    def save(self, results, output, options):
+        output.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = output / f"{stamp}{'-' + options['label'] if options['label'] else ''}.json"
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        payload = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "options": {
+                name: options[name]
+                for name in ("requests", "concurrency", "keys", "fixtures", "latency", "error_rate", "full")
+            },
+            "results": results,
+        }
+        path.write_text(json.dumps(payload, indent=2))
+        return path
+
+    def load_baseline(self, compare, output):
+        if compare == "latest":
+            runs = sorted(output.glob("*.json"))
+            if not runs:
+                raise CommandError(f"Nenhuma rodada anterior em {output}")
+            compare = runs[-1]
+        try:
+            return json.loads(Path(compare).read_text())
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Não foi possível ler {compare}: {e}") from e
+
+    def compare(self, baseline, results, threshold):
+        """Variação de cada métrica contra ``baseline``; devolve quantas pioraram além de ``threshold``."""
+        self.stdout.write(f"Comparado com {baseline.get('commit') or '?'} de {baseline.get('created_at', '?')}:")
+        self.stdout.write(f"{'cenário':<18} " + " ".join(f"{label:>14}" for _, label, _ in METRICS))
+        regressions = 0
+        for name, current in results.items():
+            previous = baseline["results"].get(name)
+            # Sem nenhuma resposta certa na rodada anterior não há com o que comparar.
+            if previous is None or not previous["rps"]:
+                continue
+            cells = []
+            for key, _, worse in METRICS:
+                before, after = previous[key], current[key]
+                change = (after - before) / before if before else (1.0 if after else 0.0)
+                regressed = change * worse > threshold
+                regressions += regressed
+                cells.append(f"{change:>+12.0%}{' !' if regressed else '  '}")
+            self.stdout.write(f"{name:<18} " + " ".join(cells))
+        return regressions
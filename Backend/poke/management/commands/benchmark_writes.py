@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from poke.models import LIMITE_EQUIPE_BATALHA, PokemonUsuario, TipoPokemon, Usuario
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a vazão de escrita de PokemonUsuario no banco configurado (DATABASE_URL), com "
+        "várias conexões inserindo ao mesmo tempo como os workers do servidor. Rode uma vez "
+        "com o SQLite e outra com o PostgreSQL para comparar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", default="1,4,8", help="Conexões simultâneas, separadas por vírgula.")
+        parser.add_argument("--rows", type=int, default=200, help="Inserções por conexão.")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                vendor = f"sqlite ({cursor.fetchone()[0]})"
+        self.stdout.write(f"banco: {vendor}")
+        self.stdout.write(f"{'conexões':>9} {'linhas/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'erros':>6}")
+
+        tipo, _ = TipoPokemon.objects.get_or_create(descricao="benchmark")
+        for threads in (int(v) for v in options["threads"].split(",")):
+            usuarios = [
+                Usuario.objects.create_user(
+                    email=f"benchmark-writes-{i}@teste.com", login=f"benchmark-writes-{i}",
+                    password="benchmark", nome="Benchmark",
+                )
+                for i in range(threads)
+            ]
+            try:
+                elapsed, samples, errors = self.run(usuarios, tipo, options["rows"])
+            finally:
+                Usuario.objects.filter(pk__in=[u.pk for u in usuarios]).delete()
+            self.stdout.write(
+                f"{threads:>9} {len(samples) / elapsed:>9.0f} {percentile(samples, 50):>8.2f} "
+                f"{percentile(samples, 99):>8.2f} {errors:>6}"
+            )
+        tipo.delete()
+
+    def run(self, usuarios, tipo, rows):
+        samples, errors = [], []
+        barrier = threading.Barrier(len(usuarios) + 1)
+
+        def worker(usuario):
+            barrier.wait()
+            try:
+                for i in range(rows):
+                    started = time.perf_counter()
+                    try:
+                        self.write(usuario, tipo, i)
+                    except OperationalError:
+                        errors.append(i)
+                    else:
+                        samples.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(usuario,)) for usuario in usuarios]
+        for thread in workers:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        return time.perf_counter() - started, samples or [0.0], len(errors)
+
+    def write(self, usuario, tipo, i):
+        # O mesmo que o create do PokemonUsuarioViewSet faz no banco: a vaga na equipe
+        # (UPDATE condicional no usuário), o INSERT e o vínculo com o tipo, numa transação.
+        with transaction.atomic():
+            grupo = i % 10 == 0 and bool(
+                Usuario.objects.filter(pk=usuario.pk, qtdEquipeBatalha__lte=LIMITE_EQUIPE_BATALHA - 1)
+                .update(qtdEquipeBatalha=F("qtdEquipeBatalha") + 1)
+            )
+            pokemon = PokemonUsuario.objects.create(
+                idUsuario=usuario, codigo=str(i), nome=f"pokemon-{i}", grupoBatalha=grupo,
+            )
+            pokemon.tipos.add(tipo)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from poke.pokeapi_stub import StubPokeAPI
+
+
+class Command(BaseCommand):
+    help = "Sobe um servidor local que imita a PokeAPI (aponte POKEAPI_BASE_URL para ele)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        parser.add_argument("--latency", type=float, default=0.0, help="Atraso por requisição, em segundos.")
+        parser.add_argument("--size", type=int, default=1025, help="Quantidade de pokémons no catálogo.")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fração das requisições que falham.")
+        parser.add_argument("--error-status", type=int, default=503, help="Status devolvido nas falhas injetadas.")
+        parser.add_argument("--full", action="store_true", help="Detalhes de pokémon com o tamanho dos da PokeAPI real.")
+        parser.add_argument("--fixtures", help="Diretório gravado pelo record_pokeapi: responde com as respostas gravadas.")
+
+    def handle(self, *args, **options):
+        stub = StubPokeAPI(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            size=options["size"],
+            error_rate=options["error_rate"],
+            error_status=options["error_status"],
+            full=options["full"],
+            fixtures=options["fixtures"],
+        )
+        origem = f"{len(stub.fixtures)} respostas gravadas" if stub.fixtures is not None else "catálogo sintético"
+        self.stdout.write(f"PokeAPI stub em {stub.base_url} ({origem})")
+        try:
+            stub.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.server.server_close()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from poke import tipos
+
+
+class Command(BaseCommand):
+    help = "Consome a fila de tarefas que resolvem na PokeAPI os tipos de pokémons ainda desconhecidos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=50, help="Tarefas reservadas por rodada.")
+        parser.add_argument("--loop", action="store_true", help="Continua consultando a fila em vez de sair quando ela esvaziar.")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Espera, em segundos, quando a fila está vazia.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            processadas = tipos.processar_pendentes(options["lote"])
+            total += processadas
+            if processadas:
+                self.stdout.write(f"{processadas} tarefas processadas")
+            elif not options["loop"]:
+                break
+            else:
+                time.sleep(options["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS(f"Fila vazia: {total} tarefas processadas"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from poke import resumo
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula a partir da coleção os contadores (pokémons, favoritos, equipe de batalha) "
+        "e o resumo por tipo dos usuários, corrigindo os que divergirem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuario", type=int, action="append", dest="usuarios",
+                            help="Só este usuário (repita para mais de um); padrão: todos.")
+
+    def handle(self, *args, **options):
+        divergentes = resumo.reconstruir(options["usuarios"])
+        self.stdout.write(self.style.SUCCESS(f"{divergentes} usuários corrigidos"))
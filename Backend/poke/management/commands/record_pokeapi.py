@@ -0,0 +1,65 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from poke import fixtures, pokeapi, warmup
+from poke.catalog import id_from_url
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava respostas reais da PokeAPI como fixtures para o stub local (pokeapi_stub "
+        "--fixtures, benchmark_suite --fixtures): tipos, gerações, as páginas do list e "
+        "o detalhe e a espécie dos N primeiros pokémons. Com o servidor rodando, "
+        "POKEAPI_RECORD_DIR grava também o que os endpoints pedirem."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=str(Path(settings.BASE_DIR) / "fixtures" / "pokeapi"),
+                            help="Diretório das fixtures.")
+        parser.add_argument("--base-url", help="PokeAPI de onde gravar (padrão: POKEAPI_BASE_URL).")
+        parser.add_argument("--pokemon", type=int, default=151,
+                            help="Grava os pokémons de id 1 a N; 0 grava o catálogo inteiro (o export precisa dele).")
+        parser.add_argument("--limits", help="Tamanhos de página do list gravados (padrão: 20 e EXPORT_UPSTREAM_PAGE).")
+        parser.add_argument("--workers", type=int, default=8, help="Requisições simultâneas ao upstream.")
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"] or settings.POKEAPI_BASE_URL
+        limits = options["limits"] or f"20,{settings.EXPORT_UPSTREAM_PAGE}"
+        limits = sorted({int(v) for v in limits.split(",")})
+        count = options["pokemon"]
+
+        started = time.perf_counter()
+        with override_settings(POKEAPI_RECORD_DIR=options["output"], POKEAPI_BASE_URL=base_url):
+            # Listagens primeiro: os ids de tipos e gerações vêm delas.
+            listings = [warmup.TYPES_PATH, warmup.GENERATIONS_PATH, "type/?limit=100", "generation/?limit=100"]
+            listed = self.fetch(listings, options["workers"])
+            types, generations = listed[:2]
+            if types is None or generations is None:
+                raise CommandError(f"Não foi possível listar tipos e gerações em {base_url}")
+            if not count:
+                count = pokeapi.get(warmup.list_path(0, 1), use_cache=False)["count"]
+
+            paths = [f"type/{id_from_url(t['url'])}/" for t in types["results"]]
+            paths += [f"generation/{id_from_url(g['url'])}/" for g in generations["results"]]
+            for limit in limits:
+                paths += [warmup.list_path(offset, limit) for offset in range(0, count, limit)]
+            for pokemon_id in range(1, count + 1):
+                paths += [f"pokemon/{pokemon_id}/", f"pokemon-species/{pokemon_id}/"]
+            results = self.fetch(paths, options["workers"])
+
+        failed = [path for path, data in zip(listings + paths, listed + results) if data is None]
+        for path in failed:
+            self.stderr.write(f"Falhou: {path}")
+        recorded = len(fixtures.FixtureStore(options["output"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"{recorded} respostas gravadas em {options['output']} em {time.perf_counter() - started:.1f}s "
+            f"({len(failed)} falhas)"
+        ))
+
+    def fetch(self, paths, workers):
+        # Sem cache: uma resposta servida da memória não passaria pelo gravador.
+        return pokeapi.fetch_many(paths, max_inflight=workers, use_cache=False)
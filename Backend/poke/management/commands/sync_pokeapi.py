@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from poke import filter_index, pokeapi
+from poke.catalog import id_from_url, imagem_url
+from poke.models import EspeciePokemon, Geracao, Pokemon, PokemonTipo, TipoPokemon
+
+
+class ApiSource:
+    def __init__(self, workers):
+        self.workers = workers
+
+    def list(self, resource):
+        data = pokeapi.get(f"{resource}/?offset=0&limit=100000", use_cache=False)
+        return [(id_from_url(r["url"]), r["name"]) for r in data["results"]]
+
+    def details(self, resource, ids):
+        paths = [f"{resource}/{i}/" for i in ids]
+        return pokeapi.fetch_many(paths, max_inflight=self.workers, use_cache=False)
+
+
+class DumpSource:
+    """Lê um dump offline no layout do PokeAPI/api-data: ``<dir>/<recurso>/<id>/index.json``."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise CommandError(f"Diretório de dump não encontrado: {root}")
+
+    def read(self, *parts):
+        path = self.root.joinpath(*parts, "index.json")
+        if not path.exists():
+            return None
+        with path.open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def list(self, resource):
+        data = self.read(resource)
+        if data is None:
+            raise CommandError(f"Listagem ausente no dump: {resource}/index.json")
+        return [(id_from_url(r["url"]), r["name"]) for r in data["results"]]
+
+    def details(self, resource, ids):
+        return [self.read(resource, str(i)) for i in ids]
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = "Sincroniza tipos, gerações, espécies e pokémons da PokeAPI para o catálogo local."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dump", help="Diretório com um dump JSON offline da PokeAPI.")
+        parser.add_argument("--workers", type=int, default=16, help="Requisições simultâneas ao upstream.")
+        parser.add_argument("--batch", type=int, default=100, help="Pokémons gravados por transação.")
+        parser.add_argument("--full", action="store_true", help="Rebaixa tudo, mesmo o que já está sincronizado.")
+
+    def handle(self, *args, **options):
+        if options["dump"]:
+            source = DumpSource(options["dump"])
+        else:
+            source = ApiSource(options["workers"])
+        full = options["full"]
+
+        self.sync_tipos(source)
+        self.sync_geracoes(source, full)
+        self.sync_pokemons(source, full, options["batch"])
+        filter_index.invalidate()
+
+    def sync_tipos(self, source):
+        remote = source.list("type")
+        existing = {t.descricao: t for t in TipoPokemon.objects.all()}
+        novos, alterados = [], []
+        for codigo, nome in remote:
+            tipo = existing.get(nome)
+            if tipo is None:
+                novos.append(TipoPokemon(descricao=nome, codigo=codigo))
+            elif tipo.codigo != codigo:
+                tipo.codigo = codigo
+                alterados.append(tipo)
+
+        with transaction.atomic():
+            TipoPokemon.objects.bulk_create(novos)
+            TipoPokemon.objects.bulk_update(alterados, ["codigo"])
+        self.stdout.write(f"tipos: {len(novos)} novos, {len(alterados)} atualizados")
+
+    def sync_geracoes(self, source, full):
+        remote = source.list("generation")
+        Geracao.objects.bulk_create(
+            [Geracao(idGeracao=id_geracao, nome=nome) for id_geracao, nome in remote],
+            update_conflicts=True,
+            unique_fields=["idGeracao"],
+            update_fields=["nome"],
+        )
+
+        # As espécies vêm dos detalhes de cada geração: ~10 chamadas em vez de uma por espécie.
+        local_species = EspeciePokemon.objects.count()
+        remote_species = len(source.list("pokemon-species"))
+        if not full and local_species >= remote_species:
+            self.stdout.write(f"gerações: {len(remote)}, espécies já sincronizadas ({local_species})")
+            return
+
+        especies = []
+        ids = [id_geracao for id_geracao, _ in remote]
+        for id_geracao, data in zip(ids, source.details("generation", ids)):
+            if data is None:
+                self.stderr.write(f"geração {id_geracao} indisponível, ignorada")
+                continue
+            especies.extend(
+                EspeciePokemon(idEspecie=id_from_url(s["url"]), nome=s["name"], geracao_id=id_geracao)
+                for s in data["pokemon_species"]
+            )
+
+        EspeciePokemon.objects.bulk_create(
+            especies,
+            update_conflicts=True,
+            unique_fields=["idEspecie"],
+            update_fields=["nome", "geracao"],
+        )
+        self.stdout.write(f"gerações: {len(remote)}, espécies: {len(especies)}")
+
+    def sync_pokemons(self, source, full, batch):
+        remote = source.list("pokemon")
+        local = dict(Pokemon.objects.values_list("idPokemon", "nome"))
+        pendentes = [
+            id_pokemon for id_pokemon, nome in remote
+            if full or local.get(id_pokemon) != nome
+        ]
+        self.stdout.write(f"pokémons: {len(remote)} no upstream, {len(pendentes)} a sincronizar")
+
+        tipos = dict(TipoPokemon.objects.filter(codigo__isnull=False).values_list("codigo", "idTipoPokemon"))
+        especies = set(EspeciePokemon.objects.values_list("idEspecie", flat=True))
+        gravados = ignorados = 0
+
+        for ids in chunked(pendentes, batch):
+            pokemons, slots = [], []
+            for id_pokemon, data in zip(ids, source.details("pokemon", ids)):
+                id_especie = id_from_url(data["species"]["url"]) if data else None
+                if id_especie not in especies:
+                    ignorados += 1
+                    continue
+                pokemons.append(Pokemon(
+                    idPokemon=data["id"],
+                    nome=data["name"],
+                    imagemUrl=imagem_url(data),
+                    especie_id=id_especie,
+                ))
+                slots.extend(
+                    PokemonTipo(pokemon_id=data["id"], tipo_id=tipos[id_from_url(t["type"]["url"])], slot=t["slot"])
+                    for t in data["types"] if id_from_url(t["type"]["url"]) in tipos
+                )
+
+            # Cada lote é gravado numa transação própria: se o comando for interrompido,
+            # a próxima execução retoma a partir do que ainda falta.
+            with transaction.atomic():
+                Pokemon.objects.bulk_create(
+                    pokemons,
+                    update_conflicts=True,
+                    unique_fields=["idPokemon"],
+                    update_fields=["nome", "imagemUrl", "especie", "dtAtualizacao"],
+                )
+                PokemonTipo.objects.filter(pokemon_id__in=[p.idPokemon for p in pokemons]).delete()
+                PokemonTipo.objects.bulk_create(slots)
+
+            gravados += len(pokemons)
+            self.stdout.write(f"  {gravados}/{len(pendentes)} gravados")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Catálogo sincronizado: {gravados} pokémons gravados, {ignorados} ignorados"
+        ))
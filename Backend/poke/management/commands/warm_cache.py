@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from poke import pokeapi, warmup
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-carrega no cache as páginas do catálogo mais acessadas, tipos, gerações e o índice de filtros. "
+        "Rodando fora do servidor, só serve se o POKEAPI_CACHE for compartilhado (Redis, Memcached, banco)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limits", help="Valores de limit do list, separados por vírgula (padrão: POKEAPI_WARM_LIMITS).")
+        parser.add_argument("--pages", type=int, help="Páginas do list aquecidas por limit (padrão: POKEAPI_WARM_PAGES).")
+        parser.add_argument("--max-keys", type=int, help="Aquece só as N primeiras chaves do plano.")
+        parser.add_argument("--workers", type=int, default=16, help="Requisições simultâneas ao upstream.")
+        parser.add_argument("--refresh", action="store_true", help="Rebusca mesmo o que ainda está válido no cache.")
+
+    def handle(self, *args, **options):
+        if pokeapi.shared_cache_is_local():
+            self.stderr.write(self.style.WARNING(
+                "POKEAPI_CACHE é local a este processo: os workers da API não vão ver o que for aquecido "
+                "aqui. Use um cache compartilhado ou o aquecimento periódico (POKEAPI_WARM_INTERVAL)."
+            ))
+
+        limits = [int(v) for v in options["limits"].split(",")] if options["limits"] else None
+        started = time.perf_counter()
+        warmed, failed = warmup.warm_all(
+            refresh=options["refresh"],
+            max_keys=options["max_keys"],
+            max_inflight=options["workers"],
+            limits=limits,
+            pages=options["pages"],
+        )
+
+        counters = pokeapi.cache_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Cache aquecido em {time.perf_counter() - started:.1f}s: {warmed} chaves, {failed} falhas, "
+            f"{counters['upstream_calls']} chamadas ao upstream"
+        ))
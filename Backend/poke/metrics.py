@@ -0,0 +1,202 @@
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """O que uma requisição gastou no banco e na PokeAPI; vive numa ContextVar."""
+
+    __slots__ = ("db_queries", "db_time", "upstream_calls", "upstream_time")
+
+    def __init__(self):
+        self.db_queries = self.upstream_calls = 0
+        self.db_time = self.upstream_time = 0.0
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Histograma no formato do Prometheus. Cada série guarda a contagem de cada faixa
+    (não acumulada) e a soma; o acumulado dos ``_bucket`` só é montado no scrape.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total) for labels, (counts, total) in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {cumulative}"
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Latência das requisições por view.", ("view", "method", "status"),
+)
+request_db_queries = Histogram(
+    "http_request_db_queries", "Queries ao banco por requisição.", ("view",), buckets=QUERY_BUCKETS,
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Tempo no banco por requisição.", ("view",),
+)
+upstream_requests = Counter(
+    "pokeapi_upstream_requests_total", "Chamadas à PokeAPI por recurso e status.", ("resource", "status"),
+)
+upstream_duration = Histogram(
+    "pokeapi_upstream_duration_seconds", "Latência das chamadas à PokeAPI por recurso.", ("resource",),
+)
+
+METRICS = [request_duration, request_db_queries, request_db_duration, upstream_requests, upstream_duration]
+
+
+def start_request():
+    state = RequestMetrics()
+    return state, _current.set(state)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """``execute_wrapper`` instalado em toda conexão: cronometra as queries da requisição atual."""
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        state.db_queries += 1
+        state.db_time += time.perf_counter() - started
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def record_upstream(resource, status, elapsed):
+    upstream_requests.inc(resource, status)
+    upstream_duration.observe(elapsed, resource)
+    state = _current.get()
+    if state is not None:
+        state.upstream_calls += 1
+        state.upstream_time += elapsed
+
+
+def cache_samples():
+    from . import pokeapi
+
+    stats = pokeapi.cache_stats()
+    yield "# HELP pokeapi_cache_events_total Eventos do cache da PokeAPI (acertos, faltas, despejos...)."
+    yield "# TYPE pokeapi_cache_events_total counter"
+    for event in pokeapi.CacheStats.FIELDS:
+        yield f'pokeapi_cache_events_total{{event="{event}"}} {stats[event]}'
+    for name, key, help in (
+        ("pokeapi_cache_hit_ratio", "hit_rate", "Fração das leituras do cache da PokeAPI que acertaram."),
+        ("pokeapi_cache_memory_entries", "memory_entries", "Entradas no cache em memória."),
+        ("pokeapi_cache_memory_bytes", "memory_bytes", "Bytes guardados no cache em memória."),
+    ):
+        yield f"# HELP {name} {help}"
+        yield f"# TYPE {name} gauge"
+        yield f"{name} {stats[key]}"
+    yield "# HELP pokeapi_breaker_open 1 enquanto o disjuntor da PokeAPI estiver aberto."
+    yield "# TYPE pokeapi_breaker_open gauge"
+    yield f"pokeapi_breaker_open {int(stats['breaker'] != pokeapi.CircuitBreaker.CLOSED)}"
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    lines.extend(cache_samples())
+    return "\n".join(lines) + "\n"
+
+
+def clear():
+    for metric in METRICS:
+        metric.clear()
+
+
+def view(request):
+    """``/metrics`` no formato texto do Prometheus. Cada worker expõe só os próprios números.
+
+    Sem ``METRICS_TOKEN`` a rota não existe; com ele, exige ``Authorization: Bearer <token>``.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), token.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
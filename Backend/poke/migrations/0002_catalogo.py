@@ -0,0 +1,75 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poke', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Geracao',
+            fields=[
+                ('idGeracao', models.IntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'db_table': 'Geracao',
+            },
+        ),
+        migrations.AddField(
+            model_name='tipopokemon',
+            name='codigo',
+            field=models.IntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.CreateModel(
+            name='EspeciePokemon',
+            fields=[
+                ('idEspecie', models.IntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100, unique=True)),
+                ('geracao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='especies', to='poke.geracao')),
+            ],
+            options={
+                'db_table': 'EspeciePokemon',
+            },
+        ),
+        migrations.CreateModel(
+            name='Pokemon',
+            fields=[
+                ('idPokemon', models.IntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100, unique=True)),
+                ('imagemUrl', models.URLField(blank=True, max_length=255, null=True)),
+                ('dtAtualizacao', models.DateTimeField(auto_now=True)),
+                ('especie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pokemons', to='poke.especiepokemon')),
+            ],
+            options={
+                'db_table': 'Pokemon',
+            },
+        ),
+        migrations.CreateModel(
+            name='PokemonTipo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField(default=1)),
+                ('pokemon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='poke.pokemon')),
+                ('tipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='poke.tipopokemon')),
+            ],
+            options={
+                'db_table': 'PokemonTipo',
+                'ordering': ['slot'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pokemon',
+            name='tipos',
+            field=models.ManyToManyField(related_name='catalogo', through='poke.PokemonTipo', to='poke.tipopokemon'),
+        ),
+        migrations.AddConstraint(
+            model_name='pokemontipo',
+            constraint=models.UniqueConstraint(fields=('pokemon', 'tipo'), name='pokemontipo_unico'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poke', '0002_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pokemonusuario',
+            index=models.Index(fields=['idUsuario', 'idPokemonUsuario'], name='pokemonusuario_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+def preencher_qtd_equipe_batalha(apps, schema_editor):
+    Usuario = apps.get_model("poke", "Usuario")
+    PokemonUsuario = apps.get_model("poke", "PokemonUsuario")
+    equipes = (
+        PokemonUsuario.objects.filter(grupoBatalha=True)
+        .values("idUsuario").annotate(total=models.Count("pk"))
+    )
+    for equipe in equipes:
+        Usuario.objects.filter(pk=equipe["idUsuario"]).update(qtdEquipeBatalha=min(equipe["total"], 6))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('poke', '0003_pokemonusuario_cursor_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='qtdEquipeBatalha',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(preencher_qtd_equipe_batalha, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usuario',
+            constraint=models.CheckConstraint(condition=models.Q(('qtdEquipeBatalha__lte', 6)), name='usuario_equipe_batalha_limite'),
+        ),
+    ]
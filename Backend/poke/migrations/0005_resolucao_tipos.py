@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poke', '0004_usuario_qtd_equipe_batalha'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TiposPokemonNome',
+            fields=[
+                ('nome', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('tipos', models.JSONField(default=list)),
+                ('dtAtualizacao', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'TiposPokemonNome',
+            },
+        ),
+        migrations.CreateModel(
+            name='TarefaTipos',
+            fields=[
+                ('idTarefa', models.AutoField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100, unique=True)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('erro', 'Erro')], default='pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('dtInclusao', models.DateTimeField(auto_now_add=True)),
+                ('dtAlteracao', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'TarefaTipos',
+                'indexes': [models.Index(fields=['status', 'dtAlteracao'], name='tarefatipos_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poke', '0005_resolucao_tipos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pokemonusuario',
+            name='idUsuario',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pokemons', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='pokemonusuario',
+            index=models.Index(fields=['idUsuario', 'grupoBatalha'], name='pokemonusuario_batalha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemonusuario',
+            index=models.Index(fields=['idUsuario', 'favorito'], name='pokemonusuario_favorito_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pokemonusuario',
+            index=models.Index(fields=['idUsuario', 'nome'], name='pokemonusuario_nome_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-18 14:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_resumos(apps, schema_editor):
+    Usuario = apps.get_model("poke", "Usuario")
+    PokemonUsuario = apps.get_model("poke", "PokemonUsuario")
+    ResumoTipoUsuario = apps.get_model("poke", "ResumoTipoUsuario")
+    colecoes = PokemonUsuario.objects.values("idUsuario").annotate(
+        total=models.Count("pk"), favoritos=models.Count("pk", filter=models.Q(favorito=True)),
+    )
+    for colecao in colecoes:
+        Usuario.objects.filter(pk=colecao["idUsuario"]).update(
+            qtdPokemons=colecao["total"], qtdFavoritos=colecao["favoritos"],
+        )
+    por_tipo = (
+        PokemonUsuario.tipos.through.objects
+        .values("pokemonusuario__idUsuario", "tipopokemon").annotate(total=models.Count("pk"))
+    )
+    ResumoTipoUsuario.objects.bulk_create([
+        ResumoTipoUsuario(usuario_id=linha["pokemonusuario__idUsuario"], tipo_id=linha["tipopokemon"],
+                          quantidade=linha["total"])
+        for linha in por_tipo
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poke', '0006_pokemonusuario_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='qtdFavoritos',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='qtdPokemons',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ResumoTipoUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('tipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='poke.tipopokemon')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumo_tipos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'ResumoTipoUsuario',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'tipo'), name='resumotipousuario_unico')],
+            },
+        ),
+        migrations.RunPython(preencher_resumos, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, UserManager
 
+LIMITE_EQUIPE_BATALHA = 6
+
 class UsuarioManager(UserManager):
     def create_user(self, email=None, login=None, password=None, **extra_fields):
         if not email:
@@ -33,6 +35,10 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    qtdEquipeBatalha = models.PositiveSmallIntegerField(default=0)
+    # Resumo da coleção mantido a cada escrita (poke.resumo); por tipo fica no ResumoTipoUsuario.
+    qtdPokemons = models.PositiveIntegerField(default=0)
+    qtdFavoritos = models.PositiveIntegerField(default=0)
 
     objects = UsuarioManager()
 
@@ -41,6 +47,12 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         db_table = "Usuario"
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(qtdEquipeBatalha__lte=LIMITE_EQUIPE_BATALHA),
+                name="usuario_equipe_batalha_limite",
+            ),
+        ]
 
     def __str__(self):
         return self.nome or self.login
@@ -49,6 +61,7 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
 class TipoPokemon(models.Model):
     idTipoPokemon = models.AutoField(primary_key=True)
     descricao = models.CharField(max_length=255, unique=True)
+    codigo = models.IntegerField(unique=True, blank=True, null=True)
 
     class Meta:
         db_table = "TipoPokemon"
@@ -57,12 +70,81 @@ class TipoPokemon(models.Model):
         return self.descricao
 
 
+class Geracao(models.Model):
+    idGeracao = models.IntegerField(primary_key=True)
+    nome = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        db_table = "Geracao"
+
+    def __str__(self):
+        return self.nome
+
+
+class EspeciePokemon(models.Model):
+    idEspecie = models.IntegerField(primary_key=True)
+    nome = models.CharField(max_length=100, unique=True)
+    geracao = models.ForeignKey(
+        Geracao,
+        on_delete=models.CASCADE,
+        related_name="especies"
+    )
+
+    class Meta:
+        db_table = "EspeciePokemon"
+
+    def __str__(self):
+        return self.nome
+
+
+class Pokemon(models.Model):
+    idPokemon = models.IntegerField(primary_key=True)
+    nome = models.CharField(max_length=100, unique=True)
+    imagemUrl = models.URLField(max_length=255, blank=True, null=True)
+    especie = models.ForeignKey(
+        EspeciePokemon,
+        on_delete=models.CASCADE,
+        related_name="pokemons"
+    )
+    tipos = models.ManyToManyField(
+        TipoPokemon,
+        through="PokemonTipo",
+        related_name="catalogo"
+    )
+    dtAtualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "Pokemon"
+
+    def __str__(self):
+        return self.nome
+
+
+class PokemonTipo(models.Model):
+    pokemon = models.ForeignKey(
+        Pokemon,
+        on_delete=models.CASCADE,
+        related_name="slots"
+    )
+    tipo = models.ForeignKey(TipoPokemon, on_delete=models.CASCADE)
+    slot = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        db_table = "PokemonTipo"
+        ordering = ["slot"]
+        constraints = [
+            models.UniqueConstraint(fields=["pokemon", "tipo"], name="pokemontipo_unico"),
+        ]
+
+
 class PokemonUsuario(models.Model):
     idPokemonUsuario = models.AutoField(primary_key=True)
+    # Sem índice próprio: todos os índices compostos abaixo começam por idUsuario.
     idUsuario = models.ForeignKey(
         Usuario,
         on_delete=models.CASCADE,
-        related_name="pokemons"
+        related_name="pokemons",
+        db_index=False,
     )
     codigo = models.CharField(max_length=100)
     imagemUrl = models.URLField(max_length=255, blank=True, null=True)
@@ -77,6 +159,69 @@ class PokemonUsuario(models.Model):
 
     class Meta:
         db_table = "PokemonUsuario"
+        indexes = [
+            models.Index(fields=["idUsuario", "idPokemonUsuario"], name="pokemonusuario_cursor_idx"),
+            models.Index(fields=["idUsuario", "grupoBatalha"], name="pokemonusuario_batalha_idx"),
+            models.Index(fields=["idUsuario", "favorito"], name="pokemonusuario_favorito_idx"),
+            models.Index(fields=["idUsuario", "nome"], name="pokemonusuario_nome_idx"),
+        ]
 
     def __str__(self):
         return f"{self.nome} ({self.idUsuario.nome})"
+
+
+class ResumoTipoUsuario(models.Model):
+    """Quantos pokémons de cada tipo o usuário tem na coleção; mantido pelo poke.resumo."""
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name="resumo_tipos")
+    tipo = models.ForeignKey(TipoPokemon, on_delete=models.CASCADE, related_name="+")
+    quantidade = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "ResumoTipoUsuario"
+        constraints = [
+            models.UniqueConstraint(fields=["usuario", "tipo"], name="resumotipousuario_unico"),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} x {self.tipo_id}: {self.quantidade}"
+
+
+class TiposPokemonNome(models.Model):
+    nome = models.CharField(max_length=100, primary_key=True)
+    tipos = models.JSONField(default=list)
+    dtAtualizacao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "TiposPokemonNome"
+
+    def __str__(self):
+        return f"{self.nome}: {', '.join(self.tipos)}"
+
+
+class TarefaTipos(models.Model):
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    ERRO = "erro"
+    STATUS = [
+        (PENDENTE, "Pendente"),
+        (PROCESSANDO, "Processando"),
+        (ERRO, "Erro"),
+    ]
+
+    idTarefa = models.AutoField(primary_key=True)
+    nome = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS, default=PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True, default="")
+    dtInclusao = models.DateTimeField(auto_now_add=True)
+    dtAlteracao = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "TarefaTipos"
+        indexes = [
+            models.Index(fields=["status", "dtAlteracao"], name="tarefatipos_fila_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.nome} ({self.status})"
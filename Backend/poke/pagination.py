@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ChavePrimariaCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) ordenada pela chave primária do model da view:
+    cada página é um ``WHERE pk > cursor ORDER BY pk LIMIT n``, com custo
+    constante independente de quantas páginas já ficaram para trás.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return (queryset.model._meta.pk.name,)
@@ -0,0 +1,697 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import os
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+import orjson
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import fixtures, metrics
+
+_client = None
+_async_client = None
+_loop = None
+_executor = None
+_lock = threading.Lock()
+_stale = contextvars.ContextVar("pokeapi_stale", default=None)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(httpx.HTTPError):
+    """O circuito está aberto: a PokeAPI não é consultada até o próximo teste."""
+
+
+class CacheStats:
+    FIELDS = (
+        "hits", "memory_hits", "shared_hits", "misses", "coalesced", "evictions", "upstream_calls",
+        "retries", "short_circuited", "stale_served",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+class MemoryCache:
+    """
+    LRU em processo, limitado pelo tamanho (em bytes) dos corpos guardados.
+
+    Entradas vencidas continuam guardadas por POKEAPI_STALE_TTL segundos para
+    ``get_stale``, que as usa enquanto o upstream estiver fora.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.size = 0
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, ttl, size, _ = entry
+        if time.time() - stored_at >= ttl + settings.POKEAPI_STALE_TTL:
+            del self._entries[key]
+            self.size -= size
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None or time.time() - entry[0] >= entry[1]:
+                return None
+            return entry[3]
+
+    def get_stale(self, key):
+        """Devolve ``(data, stored_at)`` mesmo que a entrada já tenha vencido."""
+        with self._lock:
+            entry = self._lookup(key)
+            return None if entry is None else (entry[3], entry[0])
+
+    def set(self, key, data, size, ttl):
+        max_bytes = settings.POKEAPI_MEMORY_CACHE_MAX_BYTES
+        if size > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (time.time(), ttl, size, data)
+            self.size += size
+            while self.size > max_bytes:
+                _, (_, _, evicted_size, _) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.stats.incr("evictions")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Garante uma única chamada ao upstream por chave, mesmo com N misses simultâneos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+
+        if not leader:
+            stats.incr("coalesced")
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+class AsyncSingleFlight:
+    """
+    Versão do SingleFlight para corrotinas, usada só no loop de ``get_loop()``. A busca
+    roda numa task própria que todos (líder incluído) aguardam através de
+    ``asyncio.shield``: um cliente que desconecta cancela só a própria espera, nunca
+    a busca dos outros.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is not None:
+            stats.incr("coalesced")
+        else:
+            task = self._calls[key] = asyncio.get_running_loop().create_task(fn())
+            task.add_done_callback(functools.partial(self._done, key))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Marca a exceção como consumida mesmo que todos os que esperavam tenham desistido.
+        if not task.cancelled():
+            task.exception()
+
+
+class HitCounter:
+    """
+    Conta os acessos das views a cada chave da PokeAPI, para o warm-up aquecer
+    primeiro o que é mais pedido.
+
+    A contagem fica em memória e, a cada POKEAPI_HITS_FLUSH_INTERVAL segundos,
+    é somada (em segundo plano) à do cache compartilhado, onde o ``warm_cache``
+    de outro processo consegue lê-la. A soma não é atômica entre processos:
+    uma ou outra contagem pode se perder, o que não muda a ordem dos quentes.
+    """
+
+    KEY = "pokeapi:hits"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._flushed_at = time.monotonic()
+
+    def record(self, key):
+        with self._lock:
+            self._counts[key] += 1
+            due = time.monotonic() - self._flushed_at >= settings.POKEAPI_HITS_FLUSH_INTERVAL
+            if due:
+                self._flushed_at = time.monotonic()
+        if due:
+            get_executor().submit(self.flush)
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        total = Counter(shared_cache().get(self.KEY) or {})
+        total.update(counts)
+        shared_cache().set(self.KEY, dict(total.most_common(settings.POKEAPI_HITS_MAX_KEYS)), None)
+
+    def most_common(self):
+        self.flush()
+        return Counter(shared_cache().get(self.KEY) or {}).most_common()
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class CircuitBreaker:
+    """
+    Disjuntor do upstream, compartilhado pelas views e pelos comandos do processo.
+
+    Abre depois de POKEAPI_BREAKER_THRESHOLD falhas seguidas e, enquanto aberto,
+    recusa as chamadas na hora. Passados POKEAPI_BREAKER_RESET segundos, deixa
+    uma única chamada de teste passar: se ela funcionar o circuito fecha, se
+    falhar volta a abrir.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = 0.0
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            # Em half-open a sonda também tem prazo: se ela sumir (cancelada), outra pode tentar.
+            if time.monotonic() - self.opened_at < settings.POKEAPI_BREAKER_RESET:
+                stats.incr("short_circuited")
+                raise UpstreamUnavailable("PokeAPI indisponível: circuito aberto")
+            self.state = self.HALF_OPEN
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= settings.POKEAPI_BREAKER_THRESHOLD:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+stats = CacheStats()
+memory_cache = MemoryCache(stats)
+breaker = CircuitBreaker()
+hits = HitCounter()
+single_flight = SingleFlight()
+async_single_flight = AsyncSingleFlight()
+
+
+def is_transient(error):
+    """Falhas de rede, timeouts, 5xx e 429: vale tentar de novo (ou servir cache vencido)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRY_STATUSES
+    return isinstance(error, (httpx.TransportError, UpstreamUnavailable))
+
+
+def backoff_delay(attempt):
+    # "Full jitter": espalha as novas tentativas de vários clientes em vez de sincronizá-las.
+    return random.uniform(0, settings.POKEAPI_RETRY_BACKOFF * 2 ** attempt)
+
+
+@contextlib.contextmanager
+def track_stale():
+    """Coleta, durante o bloco, a idade (em segundos) de cada resposta vencida servida do cache."""
+    ages = []
+    token = _stale.set(ages)
+    try:
+        yield ages
+    finally:
+        _stale.reset(token)
+
+
+def served_stale():
+    return bool(_stale.get())
+
+
+def record_stale(stored_at):
+    stats.incr("stale_served")
+    ages = _stale.get()
+    if ages is not None:
+        ages.append(time.time() - stored_at)
+
+
+def client_options():
+    return {
+        "http2": settings.POKEAPI_HTTP2,
+        "limits": httpx.Limits(
+            max_connections=settings.POKEAPI_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.POKEAPI_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.POKEAPI_POOL_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": request_timeout(None),
+    }
+
+
+def get_client():
+    """Cliente síncrono do processo (comandos e worker), com pool de conexões keep-alive."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = httpx.Client(**client_options())
+    return _client
+
+
+def get_loop():
+    """
+    Event loop do processo em que rodam todas as buscas assíncronas ao upstream.
+
+    Sob WSGI o ``async_to_sync`` abre um loop por requisição: um cliente e um
+    single-flight por loop não seriam compartilhados entre requisição nenhuma. O
+    loop daqui vive numa thread própria enquanto o processo viver (e sobe de novo
+    num worker criado por fork), sirva o Django por WSGI ou ASGI.
+    """
+    global _loop
+    pid = os.getpid()
+    if _loop is None or _loop[0] != pid:
+        with _lock:
+            if _loop is None or _loop[0] != pid:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="pokeapi-loop", daemon=True).start()
+                _loop = (pid, loop)
+    return _loop[1]
+
+
+async def on_loop(coro):
+    """Roda ``coro`` no loop de ``get_loop()``; cancelar a espera cancela a corrotina."""
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def get_async_client():
+    """
+    Cliente assíncrono do processo, com pool de conexões keep-alive. Um
+    ``httpx.AsyncClient`` só pode ser usado no loop em que abriu suas conexões:
+    chame só de dentro do loop de ``get_loop()``.
+    """
+    global _async_client
+    if _async_client is None or _async_client[0] != os.getpid():
+        _async_client = (os.getpid(), httpx.AsyncClient(**client_options()))
+    return _async_client[1]
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.POKEAPI_MAX_WORKERS,
+                    thread_name_prefix="pokeapi",
+                )
+    return _executor
+
+
+def shared_cache():
+    return caches[settings.POKEAPI_CACHE_ALIAS]
+
+
+def shared_cache_is_local():
+    """O POKEAPI_CACHE só existe neste processo (locmem/dummy): outro processo não o vê."""
+    return isinstance(shared_cache(), (LocMemCache, DummyCache))
+
+
+def normalize_path(path):
+    """
+    Reduz um caminho ou URL da PokeAPI à forma canônica usada como chave de cache:
+    ``pokemon/pikachu/``, ``pokemon/?limit=20&offset=0``.
+    """
+    parts = urlsplit(path)
+    resource_path = parts.path
+    base_path = urlsplit(settings.POKEAPI_BASE_URL).path.rstrip("/")
+    if parts.scheme and base_path and resource_path.startswith(base_path):
+        resource_path = resource_path[len(base_path):]
+    resource_path = resource_path.strip("/").lower()
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return f"{resource_path}/?{query}" if query else f"{resource_path}/"
+
+
+def resource_of(key):
+    return key.split("/", 1)[0]
+
+
+def ttl_for(key):
+    ttls = settings.POKEAPI_CACHE_TTLS
+    return ttls.get(resource_of(key), ttls["default"])
+
+
+def build_url(path):
+    if path.startswith("http://") or path.startswith("https://"):
+        return path
+    return f"{settings.POKEAPI_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def request_timeout(timeout):
+    connect = settings.POKEAPI_CONNECT_TIMEOUT
+    timeout = timeout or settings.POKEAPI_TIMEOUT
+    return httpx.Timeout(timeout, connect=min(connect, timeout))
+
+
+def observe(key, response, started):
+    """Latência e status de uma tentativa; ``response`` é ``None`` quando nem houve resposta."""
+    status = str(response.status_code) if response is not None else "error"
+    metrics.record_upstream(resource_of(key), status, time.perf_counter() - started)
+
+
+def parse(key, response):
+    # Com POKEAPI_RECORD_DIR cada resposta também vira fixture para o StubPokeAPI. É
+    # uma escrita síncrona mesmo no afetch: gravar é coisa de sessão de captura.
+    if settings.POKEAPI_RECORD_DIR:
+        fixtures.record(settings.POKEAPI_RECORD_DIR, key, response.content, settings.POKEAPI_BASE_URL)
+    return orjson.loads(response.content), len(response.content)
+
+
+def fetch(key, timeout=None):
+    """
+    GET no upstream com timeout, novas tentativas com backoff para falhas
+    transitórias e o disjuntor na frente de cada tentativa.
+    """
+    attempts = settings.POKEAPI_RETRIES + 1
+    for attempt in range(attempts):
+        breaker.before_call()
+        stats.incr("upstream_calls")
+        started = time.perf_counter()
+        try:
+            response = get_client().get(build_url(key), timeout=request_timeout(timeout))
+            observe(key, response, started)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if not isinstance(e, httpx.HTTPStatusError):
+                observe(key, None, started)
+            if not is_transient(e):
+                # Um 404 é uma resposta válida: o upstream está de pé.
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 == attempts:
+                raise
+            stats.incr("retries")
+            time.sleep(backoff_delay(attempt))
+        else:
+            breaker.record_success()
+            return parse(key, response)
+
+
+async def afetch(key, timeout=None):
+    attempts = settings.POKEAPI_RETRIES + 1
+    for attempt in range(attempts):
+        breaker.before_call()
+        stats.incr("upstream_calls")
+        started = time.perf_counter()
+        try:
+            response = await get_async_client().get(build_url(key), timeout=request_timeout(timeout))
+            observe(key, response, started)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            if not isinstance(e, httpx.HTTPStatusError):
+                observe(key, None, started)
+            if not is_transient(e):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 == attempts:
+                raise
+            stats.incr("retries")
+            await asyncio.sleep(backoff_delay(attempt))
+        else:
+            breaker.record_success()
+            return parse(key, response)
+
+
+def is_fresh(stored_at, key):
+    return time.time() - stored_at < ttl_for(key)
+
+
+def cache_timeout(key):
+    # O cache compartilhado guarda a entrada além do TTL para servir vencida em caso de pane.
+    return ttl_for(key) + settings.POKEAPI_STALE_TTL
+
+
+def get(path, timeout=None, use_cache=True, refresh=False):
+    """
+    Busca ``path`` passando pelo cache em memória e pelo compartilhado.
+
+    ``use_cache=False`` vai direto ao upstream sem gravar nada; ``refresh=True``
+    ignora as cópias ainda válidas, mas grava a resposta nova nos dois níveis.
+    """
+    key = normalize_path(path)
+    if not use_cache:
+        return fetch(key, timeout)[0]
+
+    cache_key = f"pokeapi:{key}"
+    cached = None
+    if not refresh:
+        data = memory_cache.get(key)
+        if data is not None:
+            stats.incr("hits")
+            stats.incr("memory_hits")
+            return data
+
+        cached = shared_cache().get(cache_key)
+        if cached is not None and is_fresh(cached[2], key):
+            data, size, stored_at = cached
+            memory_cache.set(key, data, size, ttl_for(key) - (time.time() - stored_at))
+            stats.incr("hits")
+            stats.incr("shared_hits")
+            return data
+
+    stats.incr("misses")
+
+    def load():
+        data, size = fetch(key, timeout)
+        shared_cache().set(cache_key, (data, size, time.time()), cache_timeout(key))
+        memory_cache.set(key, data, size, ttl_for(key))
+        return data
+
+    try:
+        return single_flight.do(key, load)
+    except httpx.HTTPError as e:
+        stale = memory_cache.get_stale(key) or (cached and (cached[0], cached[2]))
+        if not stale or not is_transient(e):
+            raise
+        record_stale(stale[1])
+        return stale[0]
+
+
+def fetch_many(paths, max_inflight=None, timeout=None, use_cache=True, refresh=False):
+    """
+    Busca vários recursos da PokeAPI em paralelo, no pool compartilhado.
+
+    Devolve uma lista na mesma ordem de ``paths``; cada posição que falhou
+    (erro de rede, timeout ou status != 2xx) fica como ``None``.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+
+    max_inflight = max_inflight or settings.POKEAPI_MAX_INFLIGHT
+    slots = threading.BoundedSemaphore(max_inflight)
+    results = [None] * len(paths)
+    executor = get_executor()
+
+    def fetch_one(index, path):
+        try:
+            results[index] = get(path, timeout=timeout, use_cache=use_cache, refresh=refresh)
+        except (httpx.HTTPError, ValueError):
+            results[index] = None
+        finally:
+            slots.release()
+
+    futures = []
+    for index, path in enumerate(paths):
+        slots.acquire()
+        futures.append(executor.submit(fetch_one, index, path))
+
+    for future in futures:
+        future.result()
+
+    return results
+
+
+def peek(path):
+    """O que o cache em memória já tem para ``path`` (contando o acerto), sem esperar nada."""
+    key = normalize_path(path)
+    data = memory_cache.get(key)
+    if data is not None:
+        hits.record(key)
+        stats.incr("hits")
+        stats.incr("memory_hits")
+    return data
+
+
+async def aget(path, timeout=None, use_cache=True):
+    """
+    Equivalente assíncrono de ``get``. Os acertos de cache saem no loop corrente; as
+    buscas ao upstream rodam no loop de ``get_loop()``, com o cliente e o
+    single-flight do processo.
+    """
+    key = normalize_path(path)
+    if not use_cache:
+        return (await on_loop(afetch(key, timeout)))[0]
+
+    hits.record(key)
+
+    data = memory_cache.get(key)
+    if data is not None:
+        stats.incr("hits")
+        stats.incr("memory_hits")
+        return data
+
+    cache_key = f"pokeapi:{key}"
+    cached = await shared_cache().aget(cache_key)
+    if cached is not None and is_fresh(cached[2], key):
+        data, size, stored_at = cached
+        memory_cache.set(key, data, size, ttl_for(key) - (time.time() - stored_at))
+        stats.incr("hits")
+        stats.incr("shared_hits")
+        return data
+
+    stats.incr("misses")
+
+    async def load():
+        data, size = await afetch(key, timeout)
+        # No pool do processo, não no sync_to_async do aset: a thread da requisição que
+        # disparou a busca pode já ter ido embora quando ela termina.
+        await asyncio.get_running_loop().run_in_executor(
+            get_executor(),
+            functools.partial(shared_cache().set, cache_key, (data, size, time.time()), cache_timeout(key)),
+        )
+        memory_cache.set(key, data, size, ttl_for(key))
+        return data
+
+    try:
+        return await on_loop(async_single_flight.do(key, load))
+    except httpx.HTTPError as e:
+        stale = memory_cache.get_stale(key) or (cached and (cached[0], cached[2]))
+        if not stale or not is_transient(e):
+            raise
+        record_stale(stale[1])
+        return stale[0]
+
+
+async def afetch_many(paths, max_inflight=None, timeout=None, use_cache=True):
+    """Equivalente assíncrono de ``fetch_many``: mesma ordem, ``None`` onde falhou."""
+    slots = asyncio.Semaphore(max_inflight or settings.POKEAPI_MAX_INFLIGHT)
+
+    async def fetch_one(path):
+        async with slots:
+            try:
+                return await aget(path, timeout=timeout, use_cache=use_cache)
+            except (httpx.HTTPError, ValueError):
+                return None
+
+    return await asyncio.gather(*(fetch_one(path) for path in paths))
+
+
+def cache_stats():
+    counters = stats.snapshot()
+    lookups = counters["hits"] + counters["misses"]
+    counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+    counters["memory_entries"] = len(memory_cache)
+    counters["memory_bytes"] = memory_cache.size
+    counters["breaker"] = breaker.state
+    return counters
+
+
+def catalog_version():
+    return shared_cache().get_or_set("pokeapi:catalog-version", 0, None)
+
+
+def bump_catalog_version():
+    """Marca o catálogo como alterado para todos os processos que compartilham o cache."""
+    shared_cache().set("pokeapi:catalog-version", time.time_ns(), None)
+
+
+def clear_cache():
+    memory_cache.clear()
+    shared_cache().clear()
+    # Versão nova: ETags, índices e respostas prontas montados sobre o cache antigo caem junto.
+    bump_catalog_version()
+    stats.reset()
+    breaker.reset()
+    hits.clear()
@@ -0,0 +1,367 @@
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .fixtures import FixtureStore, normalize_key
+
+TYPE_NAMES = [
+    "normal", "fighting", "flying", "poison", "ground", "rock",
+    "bug", "ghost", "steel", "fire", "water", "grass",
+    "electric", "psychic", "ice", "dragon", "dark", "fairy",
+]
+
+SPRITE_SIDE = 475
+
+GENERATION_LIMITS = [151, 251, 386, 493, 649, 721, 809, 905, 1025]
+GENERATION_NAMES = [
+    "generation-i", "generation-ii", "generation-iii", "generation-iv",
+    "generation-v", "generation-vi", "generation-vii", "generation-viii",
+    "generation-ix",
+]
+
+
+class StubCatalog:
+    """Catálogo sintético e determinístico com o formato das respostas da PokeAPI."""
+
+    def __init__(self, size=1025, full=False):
+        self.size = size
+        self.full = full
+        self.pokemon = {}
+        self.by_name = {}
+        for pokemon_id in range(1, size + 1):
+            name = f"pokemon-{pokemon_id}"
+            types = [TYPE_NAMES[pokemon_id % len(TYPE_NAMES)]]
+            if pokemon_id % 3 == 0:
+                second = TYPE_NAMES[(pokemon_id * 5 + 7) % len(TYPE_NAMES)]
+                if second not in types:
+                    types.append(second)
+            self.pokemon[pokemon_id] = {
+                "id": pokemon_id,
+                "name": name,
+                "types": types,
+                "generation": self.generation_of(pokemon_id),
+            }
+            self.by_name[name] = pokemon_id
+
+    @staticmethod
+    def generation_of(pokemon_id):
+        for index, limit in enumerate(GENERATION_LIMITS, start=1):
+            if pokemon_id <= limit:
+                return index
+        return len(GENERATION_LIMITS)
+
+    def find(self, key):
+        if key.isascii() and key.isdigit():
+            return self.pokemon.get(int(key))
+        pokemon_id = self.by_name.get(key.lower())
+        return self.pokemon.get(pokemon_id) if pokemon_id else None
+
+    def pokemon_detail(self, base_url, entry):
+        artwork = f"{base_url}/sprites/official-artwork/{entry['id']}.png"
+        detail = {
+            "id": entry["id"],
+            "name": entry["name"],
+            "types": [
+                {
+                    "slot": slot,
+                    "type": {"name": name, "url": f"{base_url}/type/{TYPE_NAMES.index(name) + 1}/"},
+                }
+                for slot, name in enumerate(entry["types"], start=1)
+            ],
+            "species": {"name": entry["name"], "url": f"{base_url}/pokemon-species/{entry['id']}/"},
+            "sprites": {
+                "front_default": f"{base_url}/sprites/{entry['id']}.png",
+                "other": {"official-artwork": {"front_default": artwork}},
+            },
+        }
+        return self.pad_detail(base_url, entry, detail) if self.full else detail
+
+    def pad_detail(self, base_url, entry, detail):
+        """
+        Completa o detalhe com os campos volumosos da PokeAPI real (moves com o
+        histórico por versão, game_indices, stats, sprites de cada jogo), que o
+        backend descarta mas precisa baixar e parsear: ~150 KB por pokémon.
+        """
+        pokemon_id = entry["id"]
+        versions = [f"version-{i}" for i in range(1, 9)]
+        detail.update({
+            "base_experience": 50 + pokemon_id % 200,
+            "height": 3 + pokemon_id % 20,
+            "weight": 20 + pokemon_id % 900,
+            "order": pokemon_id,
+            "is_default": True,
+            "location_area_encounters": f"{base_url}/pokemon/{pokemon_id}/encounters",
+            "abilities": [
+                {"ability": {"name": f"ability-{(pokemon_id + i) % 300}",
+                             "url": f"{base_url}/ability/{(pokemon_id + i) % 300}/"},
+                 "is_hidden": i == 2, "slot": i + 1}
+                for i in range(3)
+            ],
+            "game_indices": [
+                {"game_index": pokemon_id, "version": {"name": version, "url": f"{base_url}/version/{i}/"}}
+                for i, version in enumerate(versions, start=1)
+            ],
+            "stats": [
+                {"base_stat": 40 + (pokemon_id * (i + 3)) % 100, "effort": i % 2,
+                 "stat": {"name": f"stat-{i}", "url": f"{base_url}/stat/{i}/"}}
+                for i in range(1, 7)
+            ],
+            "moves": [
+                {
+                    "move": {"name": f"move-{move_id}", "url": f"{base_url}/move/{move_id}/"},
+                    "version_group_details": [
+                        {"level_learned_at": (move_id + i) % 60, "order": None,
+                         "move_learn_method": {"name": "level-up", "url": f"{base_url}/move-learn-method/1/"},
+                         "version_group": {"name": f"version-group-{i}", "url": f"{base_url}/version-group/{i}/"}}
+                        for i in range(1, 9)
+                    ],
+                }
+                for move_id in range(pokemon_id % 50 + 1, pokemon_id % 50 + 81)
+            ],
+        })
+        detail["sprites"]["versions"] = {
+            version: {side: f"{base_url}/sprites/{version}/{side}/{pokemon_id}.png"
+                      for side in ("back_default", "back_shiny", "front_default", "front_shiny")}
+            for version in versions
+        }
+        return detail
+
+    def species_detail(self, base_url, entry):
+        generation = entry["generation"]
+        return {
+            "id": entry["id"],
+            "name": entry["name"],
+            "generation": {
+                "name": GENERATION_NAMES[generation - 1],
+                "url": f"{base_url}/generation/{generation}/",
+            },
+        }
+
+    def type_detail(self, base_url, type_id):
+        name = TYPE_NAMES[type_id - 1]
+        return {
+            "id": type_id,
+            "name": name,
+            "pokemon": [
+                {"slot": entry["types"].index(name) + 1,
+                 "pokemon": {"name": entry["name"], "url": f"{base_url}/pokemon/{entry['id']}/"}}
+                for entry in self.pokemon.values() if name in entry["types"]
+            ],
+        }
+
+    def generation_detail(self, base_url, generation_id):
+        return {
+            "id": generation_id,
+            "name": GENERATION_NAMES[generation_id - 1],
+            "pokemon_species": [
+                {"name": entry["name"], "url": f"{base_url}/pokemon-species/{entry['id']}/"}
+                for entry in self.pokemon.values() if entry["generation"] == generation_id
+            ],
+        }
+
+
+def sprite_png(pokemon_id, side=SPRITE_SIDE):
+    """PNG RGBA do tamanho do official-artwork: um losango com a cor do pokémon em fundo transparente."""
+    color = bytes((pokemon_id * 37 % 256, pokemon_id * 91 % 256, pokemon_id * 53 % 256, 255))
+    clear = bytes(4)
+    rows = []
+    for y in range(side):
+        width = max(side - 2 * abs(y - side // 2), 1)
+        margin = (side - width) // 2
+        rows.append(b"\x00" + clear * margin + color * width + clear * (side - margin - width))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def paginate(base_url, resource, names_urls, query):
+    offset = int(query.get("offset", ["0"])[0])
+    limit = int(query.get("limit", ["20"])[0])
+    page = names_urls[offset:offset + limit]
+    count = len(names_urls)
+    next_url = None
+    if offset + limit < count:
+        next_url = f"{base_url}/{resource}/?offset={offset + limit}&limit={limit}"
+    previous_url = None
+    if offset > 0:
+        previous_url = f"{base_url}/{resource}/?offset={max(offset - limit, 0)}&limit={limit}"
+    return {
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+        "results": [{"name": name, "url": url} for name, url in page],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.count_request(self.path)
+        if stub.latency:
+            time.sleep(stub.latency)
+        if stub.should_fail():
+            self.send_json(stub.error_status, {"detail": "Falha injetada pelo stub."})
+            return
+
+        parts = urlsplit(self.path)
+        segments = [s for s in parts.path.split("/") if s]
+        if segments[:2] == ["api", "v2"]:
+            segments = segments[2:]
+        if segments[:1] == ["sprites"]:
+            stem = segments[-1].removesuffix(".png")
+            if not (stem.isascii() and stem.isdigit()) or int(stem) not in stub.catalog.pokemon:
+                self.send_json(404, {"detail": "Not found."})
+            else:
+                self.send_body(200, sprite_png(int(stem)), "image/png")
+            return
+        if stub.fixtures is not None:
+            body = stub.fixtures.get(normalize_key("/".join(segments), parts.query), stub.base_url)
+            if body is None:
+                self.send_json(404, {"detail": "Not found."})
+            else:
+                self.send_body(200, body, "application/json")
+            return
+        payload = self.route(stub, segments, parse_qs(parts.query))
+
+        if payload is None:
+            self.send_json(404, {"detail": "Not found."})
+        else:
+            self.send_json(200, payload)
+
+    def route(self, stub, segments, query):
+        catalog = stub.catalog
+        base_url = stub.base_url
+        if not segments:
+            return None
+        resource, key = segments[0], segments[1] if len(segments) > 1 else None
+
+        if resource == "pokemon":
+            if key is None:
+                entries = [(e["name"], f"{base_url}/pokemon/{e['id']}/") for e in catalog.pokemon.values()]
+                return paginate(base_url, "pokemon", entries, query)
+            entry = catalog.find(key)
+            return catalog.pokemon_detail(base_url, entry) if entry else None
+
+        if resource == "pokemon-species":
+            if key is None:
+                entries = [(e["name"], f"{base_url}/pokemon-species/{e['id']}/") for e in catalog.pokemon.values()]
+                return paginate(base_url, "pokemon-species", entries, query)
+            entry = catalog.find(key)
+            return catalog.species_detail(base_url, entry) if entry else None
+
+        if resource == "type":
+            if key is None:
+                entries = [(name, f"{base_url}/type/{i}/") for i, name in enumerate(TYPE_NAMES, start=1)]
+                return paginate(base_url, "type", entries, query)
+            if key.isascii() and key.isdigit():
+                type_id = int(key)
+            else:
+                type_id = TYPE_NAMES.index(key) + 1 if key in TYPE_NAMES else 0
+            return catalog.type_detail(base_url, type_id) if 1 <= type_id <= len(TYPE_NAMES) else None
+
+        if resource == "generation":
+            if key is None:
+                entries = [(name, f"{base_url}/generation/{i}/") for i, name in enumerate(GENERATION_NAMES, start=1)]
+                return paginate(base_url, "generation", entries, query)
+            generation_id = int(key) if key.isascii() and key.isdigit() else 0
+            if 1 <= generation_id <= len(GENERATION_NAMES):
+                return catalog.generation_detail(base_url, generation_id)
+            return None
+
+        return None
+
+    def send_json(self, status_code, payload):
+        self.send_body(status_code, json.dumps(payload).encode(), "application/json")
+
+    def send_body(self, status_code, body, content_type):
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StubPokeAPI:
+    """
+    Servidor local que imita a PokeAPI para testes e benchmarks.
+
+    Uso::
+
+        with StubPokeAPI(latency=0.02) as stub:
+            settings.POKEAPI_BASE_URL = stub.base_url
+
+    Para simular panes, ``latency``, ``error_rate`` (fração das requisições que
+    falham) e ``error_status`` podem ser alterados com o servidor rodando. Com
+    ``full=True`` os detalhes de pokémon vêm com o tamanho dos da PokeAPI real.
+
+    Com ``fixtures`` (um diretório gravado pelo ``record_pokeapi``) o stub devolve
+    as respostas reais gravadas em vez do catálogo sintético; o que não foi gravado
+    vira 404.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, size=1025, error_rate=0.0, error_status=503, seed=0,
+                 full=False, fixtures=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.catalog = StubCatalog(size, full=full)
+        self.fixtures = FixtureStore(fixtures) if fixtures else None
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self.server = StubServer((host, port), StubHandler)
+        self.server.stub = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/api/v2"
+
+    def count_request(self, path):
+        with self._requests_lock:
+            self.requests += 1
+
+    def should_fail(self):
+        if self.error_rate <= 0:
+            return False
+        with self._requests_lock:
+            return self.error_rate >= 1 or self.random.random() < self.error_rate
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
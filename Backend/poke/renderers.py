@@ -0,0 +1,31 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer sobre o orjson: dicts, listas e as dataclasses com ``__slots__``
+    do catálogo viram bytes em C, sem o ``json.dumps`` nem um dict intermediário.
+    O que o orjson não conhece (Decimal, lazy strings, ...) cai no encoder do DRF.
+    """
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        options = OPTIONS
+        # O orjson só sabe indentar com 2 espaços; basta para o ``; indent=`` do Accept.
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=self.encoder.default, option=options)
+
+
+def dumps(data, sort_keys=False):
+    return orjson.dumps(
+        data, default=ORJSONRenderer.encoder.default,
+        option=OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else OPTIONS,
+    )
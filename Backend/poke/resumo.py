@@ -0,0 +1,158 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .models import LIMITE_EQUIPE_BATALHA, PokemonUsuario, ResumoTipoUsuario, Usuario
+
+Through = PokemonUsuario.tipos.through
+
+
+def variar(campo, variacao):
+    # Linhas gravadas sem passar pelas views (ORM direto) deixam o contador para trás:
+    # uma remoção não pode levá-lo abaixo de zero e derrubar a escrita. O
+    # rebuild_summaries corrige a diferença.
+    if variacao < 0:
+        return Greatest(F(campo) + variacao, 0)
+    return F(campo) + variacao
+
+
+def somar(usuario_id, pokemons=0, favoritos=0):
+    """Soma as variações aos contadores do usuário com uma UPDATE; rode na transação da escrita."""
+    campos = {}
+    if pokemons:
+        campos["qtdPokemons"] = variar("qtdPokemons", pokemons)
+    if favoritos:
+        campos["qtdFavoritos"] = variar("qtdFavoritos", favoritos)
+    if campos:
+        Usuario.objects.filter(pk=usuario_id).update(**campos)
+
+
+def somar_tipos(variacoes):
+    """
+    ``variacoes``: ``{(usuario_id, tipo_id): variação}``. Cria as linhas que faltam e
+    aplica as variações com uma UPDATE por usuário e valor, sem ler nada antes.
+    """
+    variacoes = {chave: variacao for chave, variacao in variacoes.items() if variacao}
+    if not variacoes:
+        return
+    ResumoTipoUsuario.objects.bulk_create(
+        [ResumoTipoUsuario(usuario_id=u, tipo_id=t) for (u, t), variacao in variacoes.items() if variacao > 0],
+        ignore_conflicts=True,
+    )
+    grupos = defaultdict(list)
+    for (usuario_id, tipo_id), variacao in variacoes.items():
+        grupos[usuario_id, variacao].append(tipo_id)
+    for (usuario_id, variacao), tipos_ids in grupos.items():
+        ResumoTipoUsuario.objects.filter(usuario_id=usuario_id, tipo_id__in=tipos_ids).update(
+            quantidade=variar("quantidade", variacao)
+        )
+
+
+def vinculos(pokemons_ids=None, tipos_ids=None):
+    """``Counter`` de (usuario_id, tipo_id) dos vínculos gravados; ``None`` não filtra."""
+    vinculos = Through.objects.all()
+    if pokemons_ids is not None:
+        vinculos = vinculos.filter(pokemonusuario_id__in=pokemons_ids)
+    if tipos_ids is not None:
+        vinculos = vinculos.filter(tipopokemon_id__in=tipos_ids)
+    return Counter(vinculos.values_list("pokemonusuario__idUsuario", "tipopokemon_id"))
+
+
+def remover(pokemons):
+    """Desconta do resumo os ``pokemons`` que vão ser apagados (antes do DELETE)."""
+    pokemons = list(pokemons)
+    if not pokemons:
+        return
+    por_usuario = defaultdict(lambda: [0, 0])
+    for pokemon in pokemons:
+        por_usuario[pokemon.idUsuario_id][0] -= 1
+        por_usuario[pokemon.idUsuario_id][1] -= int(pokemon.favorito)
+    for usuario_id, (total, favoritos) in por_usuario.items():
+        somar(usuario_id, pokemons=total, favoritos=favoritos)
+    somar_tipos({chave: -n for chave, n in vinculos([p.pk for p in pokemons]).items()})
+
+
+@receiver(m2m_changed, sender=Through)
+def tipos_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    ``pokemon.tipos.add/remove/set/clear`` (e o lado do TipoPokemon) fora das views:
+    admin, shell, testes. Os vínculos gravados em lote (tipos.vincular, bulk) já
+    somam no resumo por conta própria.
+    """
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+    if reverse:
+        contagem = vinculos(pk_set, [instance.pk])
+    else:
+        contagem = vinculos([instance.pk], pk_set)
+    sinal = 1 if action == "post_add" else -1
+    somar_tipos({chave: sinal * n for chave, n in contagem.items()})
+
+
+def resumo(usuario_id):
+    """O resumo da coleção em duas queries, independente do tamanho dela."""
+    usuario = Usuario.objects.filter(pk=usuario_id).values("qtdPokemons", "qtdFavoritos", "qtdEquipeBatalha").get()
+    por_tipo = (
+        ResumoTipoUsuario.objects.filter(usuario_id=usuario_id, quantidade__gt=0)
+        .order_by("-quantidade", "tipo__descricao")
+        .values_list("tipo_id", "tipo__descricao", "quantidade")
+    )
+    return {
+        "pokemons": usuario["qtdPokemons"],
+        "favoritos": usuario["qtdFavoritos"],
+        "equipeBatalha": usuario["qtdEquipeBatalha"],
+        "limiteEquipeBatalha": LIMITE_EQUIPE_BATALHA,
+        "tipos": [
+            {"idTipoPokemon": tipo_id, "descricao": descricao, "quantidade": quantidade}
+            for tipo_id, descricao, quantidade in por_tipo
+        ],
+    }
+
+
+def reconstruir(usuarios_ids=None):
+    """
+    Recalcula do zero os contadores e o resumo por tipo (de todos os usuários ou só de
+    ``usuarios_ids``) a partir da coleção; devolve quantos usuários estavam divergentes.
+    """
+    usuarios = Usuario.objects.all()
+    if usuarios_ids is not None:
+        usuarios = usuarios.filter(pk__in=usuarios_ids)
+
+    divergentes = 0
+    for usuario_id in usuarios.values_list("pk", flat=True).iterator():
+        with transaction.atomic():
+            # Trava o usuário: as escritas da coleção dele esperam o recálculo terminar.
+            atual = Usuario.objects.select_for_update().filter(pk=usuario_id).values(
+                "qtdPokemons", "qtdFavoritos", "qtdEquipeBatalha"
+            ).first()
+            if atual is None:
+                continue
+            contagem = PokemonUsuario.objects.filter(idUsuario=usuario_id).aggregate(
+                qtdPokemons=Count("pk"),
+                qtdFavoritos=Count("pk", filter=Q(favorito=True)),
+                qtdEquipeBatalha=Count("pk", filter=Q(grupoBatalha=True)),
+            )
+            contagem["qtdEquipeBatalha"] = min(contagem["qtdEquipeBatalha"], LIMITE_EQUIPE_BATALHA)
+            por_tipo = dict(
+                Through.objects.filter(pokemonusuario__idUsuario=usuario_id)
+                .values("tipopokemon_id").annotate(n=Count("pk")).values_list("tipopokemon_id", "n")
+            )
+            gravado = dict(
+                ResumoTipoUsuario.objects.filter(usuario_id=usuario_id, quantidade__gt=0)
+                .values_list("tipo_id", "quantidade")
+            )
+            if contagem == atual and por_tipo == gravado:
+                continue
+
+            divergentes += 1
+            Usuario.objects.filter(pk=usuario_id).update(**contagem)
+            ResumoTipoUsuario.objects.filter(usuario_id=usuario_id).delete()
+            ResumoTipoUsuario.objects.bulk_create([
+                ResumoTipoUsuario(usuario_id=usuario_id, tipo_id=tipo_id, quantidade=n)
+                for tipo_id, n in por_tipo.items()
+            ])
+    return divergentes
@@ -0,0 +1,181 @@
+import unicodedata
+from bisect import bisect_left
+
+from . import filter_index, sprites
+from .filter_index import iter_ids, to_bitset
+
+EXACT, PREFIX, SUBSTRING, FUZZY = 0, 1, 2, 3
+MATCH_NAMES = {EXACT: "exact", PREFIX: "prefix", SUBSTRING: "substring", FUZZY: "fuzzy"}
+FUZZY_CANDIDATES = 32
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text.strip().lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return "-".join(text.split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(query):
+    # Nomes curtos toleram menos erros: "mew" a 2 edições de distância já é "mr" ou "abra".
+    return 1 if len(query) <= 4 else 2 if len(query) <= 8 else 3
+
+
+def edit_distance(a, b, limit):
+    """
+    Levenshtein bit-paralelo (Myers/Hyyrö): cada coluna da matriz de programação
+    dinâmica vira um punhado de operações sobre um ``int`` com um bit por letra de
+    ``a``. Distâncias acima de ``limit`` saem como ``limit + 1``.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a:
+        return min(len(b), limit + 1)
+
+    peq = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | 1 << i
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    vp, vn, score = full, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | (full & ~(xh | vp))
+        hn = vp & xh
+        if hp & last:
+            score += 1
+        elif hn & last:
+            score -= 1
+        hp = (hp << 1 | 1) & full
+        hn = (hn << 1) & full
+        vp = hn | (full & ~(xv | hp))
+        vn = hp & xv
+    return min(score, limit + 1)
+
+
+class NameIndex:
+    """
+    Índice em memória dos nomes de pokémon: um array ordenado para busca por
+    prefixo (bisect) e um índice invertido de trigramas para busca aproximada,
+    com a distância de edição decidindo o ranking dos candidatos.
+    """
+
+    def __init__(self, names, images):
+        self.images = images
+        entries = sorted((normalize(name), pokemon_id) for pokemon_id, name in names.items() if name)
+        self.keys = [key for key, _ in entries]
+        self.ids = [pokemon_id for _, pokemon_id in entries]
+        self.grams = [trigrams(key) for key in self.keys]
+        positions = {}
+        for position, grams in enumerate(self.grams):
+            for gram in grams:
+                positions.setdefault(gram, []).append(position)
+        # Como no índice de filtros, cada lista invertida é um bitset (bit N = N-ésimo nome).
+        self.postings = {gram: to_bitset(found) for gram, found in positions.items()}
+
+    @classmethod
+    def from_filter_index(cls, index):
+        name_index = cls(index.names, index.images)
+        name_index.source = index
+        return name_index
+
+    def prefix(self, query):
+        start = bisect_left(self.keys, query)
+        end = start
+        while end < len(self.keys) and self.keys[end].startswith(query):
+            end += 1
+        return range(start, end)
+
+    def shared_counts(self, grams):
+        """
+        Soma os bitsets dos trigramas com um somador bit a bit: ``digits[i]`` guarda o
+        i-ésimo bit da contagem de trigramas em comum de cada nome, todos de uma vez.
+        """
+        digits = []
+        for gram in grams:
+            carry = self.postings.get(gram, 0)
+            for i, digit in enumerate(digits):
+                if not carry:
+                    break
+                digits[i], carry = digit ^ carry, digit & carry
+            if carry:
+                digits.append(carry)
+        return digits
+
+    def candidates(self, query, limit):
+        """
+        Os nomes que mais compartilham trigramas com ``query``, com a similaridade
+        (Jaccard). Cada edição destrói no máximo 3 trigramas, então quem compartilha
+        menos que ``len(grams) - 3 * limit`` não pode estar a ``limit`` edições.
+        """
+        grams = trigrams(query)
+        digits = self.shared_counts(grams)
+        everyone = (1 << len(self.keys)) - 1
+        minimum = max(1, len(grams) - 3 * limit)
+        found = 0
+        for count in range(min(len(grams), (1 << len(digits)) - 1), minimum - 1, -1):
+            bits = everyone
+            for i, digit in enumerate(digits):
+                bits &= digit if count >> i & 1 else everyone ^ digit
+            for position in iter_ids(bits):
+                yield position, count / (len(grams) + len(self.grams[position]) - count)
+                found += 1
+                if found >= FUZZY_CANDIDATES:
+                    return
+
+    def search(self, query):
+        """Devolve ``[(posição, tipo do casamento, distância)]`` já ordenado por relevância."""
+        query = normalize(query)
+        if not query:
+            return []
+
+        ranked = {}
+        for position in self.prefix(query):
+            kind = EXACT if self.keys[position] == query else PREFIX
+            ranked[position] = (kind, 0, -1.0, len(self.keys[position]))
+
+        limit = max_distance(query)
+        for position, similarity in self.candidates(query, limit):
+            if position in ranked:
+                continue
+            key = self.keys[position]
+            if query in key:
+                ranked[position] = (SUBSTRING, 0, -similarity, len(key))
+                continue
+            distance = edit_distance(query, key, limit)
+            if distance <= limit:
+                ranked[position] = (FUZZY, distance, -similarity, len(key))
+
+        order = sorted(ranked, key=lambda position: (ranked[position], self.keys[position]))
+        return [(position, ranked[position][0], ranked[position][1]) for position in order]
+
+    def page(self, matches, offset, limit):
+        return [
+            {
+                "id": self.ids[position],
+                "name": self.keys[position],
+                "imagemUrl": sprites.proxy_url(self.images.get(self.ids[position])),
+                "match": MATCH_NAMES[kind],
+                "distance": distance,
+            }
+            for position, kind, distance in matches[offset:offset + limit]
+        ]
+
+
+_index = None
+
+
+def get_index():
+    """Índice de nomes derivado do índice de filtros: é reconstruído junto com ele."""
+    global _index
+    source = filter_index.get_index()
+    index = _index
+    if index is None or index.source is not source:
+        index = _index = NameIndex.from_filter_index(source)
+    return index
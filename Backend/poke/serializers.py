@@ -1,13 +1,38 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from . import sprites
 from .models import Usuario, TipoPokemon, PokemonUsuario
 
-class UsuarioSerializer(serializers.ModelSerializer):
+
+def campos_solicitados(request):
+    if request is None or request.method != "GET":
+        return None
+    fields = request.query_params.get("fields")
+    if not fields:
+        return None
+    return {f.strip() for f in fields.split(",") if f.strip()}
+
+
+class CamposEsparsosMixin:
+    """Permite ao cliente pedir só alguns campos na leitura: ``?fields=nome,codigo``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_solicitados(self.context.get("request"))
+        if campos:
+            for nome in set(self.fields) - campos:
+                self.fields.pop(nome)
+
+
+class UsuarioSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = '__all__'
         extra_kwargs = {
-            'senha': {'write_only': True} 
+            'senha': {'write_only': True},
+            'qtdEquipeBatalha': {'read_only': True},
+            'qtdPokemons': {'read_only': True},
+            'qtdFavoritos': {'read_only': True},
         }
 
     def create(self, validated_data):
@@ -25,14 +50,28 @@ class UsuarioSerializer(serializers.ModelSerializer):
         return instance
 
 
-class TipoPokemonSerializer(serializers.ModelSerializer):
+class TipoPokemonSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
     class Meta:
         model = TipoPokemon
         fields = ['idTipoPokemon', 'descricao']
 
-class PokemonUsuarioSerializer(serializers.ModelSerializer):
+class SpriteURLField(serializers.URLField):
+    """
+    Grava a URL de origem (uma URL do proxy que o frontend devolve é desembrulhada);
+    na leitura aponta para a variante servida em /api/sprites/.
+    """
+
+    def to_internal_value(self, data):
+        return sprites.unwrap(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return sprites.proxy_url(super().to_representation(value))
+
+
+class PokemonUsuarioSerializer(CamposEsparsosMixin, serializers.ModelSerializer):
     tipos = TipoPokemonSerializer(many=True, read_only=True)
     idUsuario = serializers.StringRelatedField()  
+    imagemUrl = SpriteURLField(max_length=255, required=False, allow_blank=True, allow_null=True)
 
     class Meta:
         model = PokemonUsuario
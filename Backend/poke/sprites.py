@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.views.decorators.http import require_safe
+
+from . import pokeapi
+
+try:
+    from PIL import Image
+except ImportError:  # Sem o Pillow só o original é servido.
+    Image = None
+
+# Lado máximo (px) de cada variante WebP; None mantém o tamanho do original.
+VARIANTS = {"thumb": 96, "card": 256, "full": None}
+ORIGINAL = "original"
+IMMUTABLE = "public, max-age=31536000, immutable"
+SIGNATURES = {
+    b"\x89PNG": ("png", "image/png"),
+    b"\xff\xd8\xff": ("jpg", "image/jpeg"),
+    b"GIF8": ("gif", "image/gif"),
+    b"RIFF": ("webp", "image/webp"),
+}
+CONTENT_TYPES = {ext: content_type for ext, content_type in SIGNATURES.values()}
+
+_executor = None
+_pending = {}
+_sizes = {}
+_lock = threading.Lock()
+_evicting = threading.Lock()
+
+
+def pokeapi_host():
+    return urlsplit(settings.POKEAPI_BASE_URL)
+
+
+def allowed(host):
+    return host in settings.SPRITES_ALLOWED_HOSTS or host == pokeapi_host().netloc
+
+
+def unwrap(url):
+    """A URL de origem de uma URL do proxy (``/api/sprites/<variante>/<host>/<caminho>``); as outras voltam como vieram."""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    prefix, _, rest = parts.path.partition("/api/sprites/")
+    variant, _, rest = rest.partition("/")
+    host, _, path = rest.partition("/")
+    base_path = urlsplit(settings.SPRITES_BASE_URL).path.rstrip("/")
+    if prefix != base_path or parts.query or not path or variant != ORIGINAL and variant not in VARIANTS or not allowed(host):
+        return url
+    return source_url(host, path)
+
+
+def proxy_url(source, variant="card"):
+    """
+    URL da ``variant`` de ``source`` servida por esta API. Imagens de hosts fora de
+    SPRITES_ALLOWED_HOSTS (e do host da PokeAPI) voltam como vieram; uma URL que já é
+    do proxy é reescrita para ``variant``, nunca embrulhada de novo.
+    """
+    source = unwrap(source)
+    if not source or not settings.SPRITES_PROXY:
+        return source
+    parts = urlsplit(source)
+    if parts.query or not allowed(parts.netloc):
+        return source
+    return f"{settings.SPRITES_BASE_URL.rstrip('/')}/api/sprites/{variant}/{parts.netloc}{parts.path}"
+
+
+def source_url(host, path):
+    # Só o host da PokeAPI configurada pode ser http (o stub local); o resto é https.
+    upstream = pokeapi_host()
+    scheme = upstream.scheme if host == upstream.netloc else "https"
+    return f"{scheme}://{host}/{path}"
+
+
+def root():
+    return Path(settings.SPRITES_CACHE_DIR)
+
+
+def pointer_file(source):
+    return root() / "sources" / hashlib.sha256(source.encode()).hexdigest()
+
+
+def object_file(digest, ext):
+    return root() / "objects" / digest[:2] / f"{digest}.{ext}"
+
+
+def variant_file(digest, variant):
+    return root() / "variants" / digest[:2] / f"{digest}-{variant}.webp"
+
+
+def touch(path):
+    # O mtime é o "último acesso" da LRU; atualizado no máximo uma vez por intervalo.
+    try:
+        if time.time() - path.stat().st_mtime > settings.SPRITES_TOUCH_INTERVAL:
+            os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def write_atomic(path, data, counted=True):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    partial.write_bytes(data)
+    os.replace(partial, path)
+    if counted:
+        track(len(data))
+
+
+def stored_original(source):
+    try:
+        digest, ext = pointer_file(source).read_text().split(".")
+    except (FileNotFoundError, ValueError):
+        return None
+    path = object_file(digest, ext)
+    return path if touch(path) else None
+
+
+def cached(source, variant):
+    """O arquivo pronto, se já estiver no disco; não baixa nem converte nada."""
+    original = stored_original(source)
+    if original is None or variant == ORIGINAL:
+        return original
+    path = variant_file(original.stem, variant)
+    return path if touch(path) else None
+
+
+def fetch_original(source):
+    path = stored_original(source)
+    if path is not None:
+        return path
+
+    response = pokeapi.get_client().get(source)
+    response.raise_for_status()
+    body = response.content
+    if len(body) > settings.SPRITES_MAX_SOURCE_BYTES:
+        raise ValueError(f"Imagem maior que {settings.SPRITES_MAX_SOURCE_BYTES} bytes: {source}")
+    ext = next((ext for signature, (ext, _) in SIGNATURES.items() if body.startswith(signature)), None)
+    if ext is None:
+        raise ValueError(f"Formato de imagem não reconhecido: {source}")
+
+    # Endereçado pelo conteúdo: URLs diferentes com a mesma imagem dividem o arquivo.
+    digest = hashlib.sha256(body).hexdigest()
+    path = object_file(digest, ext)
+    if not path.exists():
+        write_atomic(path, body)
+    write_atomic(pointer_file(source), f"{digest}.{ext}".encode(), counted=False)
+    return path
+
+
+def render(source, variant):
+    original = fetch_original(source)
+    if variant == ORIGINAL or Image is None:
+        return original
+
+    path = variant_file(original.stem, variant)
+    if touch(path):
+        return path
+    with Image.open(original) as image:
+        image = image.convert("RGBA")
+        side = VARIANTS[variant]
+        if side:
+            image.thumbnail((side, side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, "WEBP", quality=settings.SPRITES_WEBP_QUALITY, method=4)
+    write_atomic(path, buffer.getvalue())
+    return path
+
+
+def get_executor():
+    # O Pillow solta o GIL ao redimensionar e codificar: as variantes saem em paralelo.
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.SPRITES_WORKERS, thread_name_prefix="sprites")
+    return _executor
+
+
+def submit(source, variant):
+    """Gera a variante no pool, uma vez por chave mesmo com N requisições simultâneas."""
+    key = (source, variant)
+    executor = get_executor()
+    with _lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _pending[key] = executor.submit(_render, key)
+    return future
+
+
+def _render(key):
+    try:
+        return render(*key)
+    finally:
+        with _lock:
+            _pending.pop(key, None)
+
+
+def cache_files():
+    for directory in ("objects", "variants"):
+        for path in (root() / directory).glob("*/*"):
+            if not path.name.startswith("."):
+                yield path
+
+
+def track(size):
+    """Soma ``size`` ao total em disco e despeja os menos usados se passar do limite."""
+    key = str(root())
+    with _lock:
+        if key in _sizes:
+            _sizes[key] += size
+        else:
+            # Primeira escrita no diretório: a varredura já inclui o arquivo recém-gravado.
+            _sizes[key] = sum(path.stat().st_size for path in cache_files())
+        over = _sizes[key] > settings.SPRITES_CACHE_MAX_BYTES
+    if over:
+        evict()
+
+
+def evict():
+    """
+    Apaga os arquivos com o mtime mais antigo até o cache ficar em 90% do limite.
+    Um original despejado é baixado de novo na próxima falta; os ponteiros ficam.
+    """
+    if not _evicting.acquire(blocking=False):
+        return
+    try:
+        files = []
+        for path in cache_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = settings.SPRITES_CACHE_MAX_BYTES * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with _lock:
+            _sizes[str(root())] = total
+    finally:
+        _evicting.release()
+
+
+def open_cached(source, variant):
+    """``(caminho, arquivo aberto)`` da variante pronta no disco, ou ``None`` se faltar."""
+    path = cached(source, variant)
+    if path is None:
+        return None
+    try:
+        return path, open(path, "rb")
+    except FileNotFoundError:
+        # Despejado pela LRU entre o stat e o open: é uma falta como outra qualquer.
+        return None
+
+
+def error(message, status):
+    response = JsonResponse({"error": message}, status=status)
+    response["Cache-Control"] = "max-age=60"
+    return response
+
+
+@require_safe
+async def view(request, variant, host, path):
+    """
+    ``/api/sprites/<variante>/<host>/<caminho>``: a imagem de ``host`` baixada uma vez,
+    guardada no disco e servida com ``FileResponse`` (sendfile sob o gunicorn/WSGI).
+    Variantes: thumb, card e full (WebP) ou original.
+    """
+    if variant != ORIGINAL and variant not in VARIANTS or not allowed(host):
+        raise Http404("Sprite não encontrado")
+
+    source = source_url(host, path)
+    if Image is None:
+        variant = ORIGINAL  # Sem o Pillow o render devolve o original.
+    # stat, touch e open vão para uma thread: um disco lento não segura o event loop.
+    read = sync_to_async(open_cached, thread_sensitive=False)
+    opened = await read(source, variant)
+    for _ in range(2):
+        if opened is not None:
+            break
+        try:
+            await asyncio.wrap_future(submit(source, variant))
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise Http404("Sprite não encontrado") from e
+            return error(f"Erro ao baixar o sprite: {e}", 502)
+        except httpx.HTTPError as e:
+            return error(f"Erro ao baixar o sprite: {e}", 503)
+        except (ValueError, OSError) as e:
+            return error(f"Imagem inválida: {e}", 502)
+        opened = await read(source, variant)
+    if opened is None:
+        return error("Sprite despejado do cache durante a leitura", 503)
+
+    file, handle = opened
+    etag = quote_etag(file.stem)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = FileResponse(handle, content_type=CONTENT_TYPES[file.suffix[1:]])
+    else:
+        handle.close()
+    response["ETag"] = etag
+    response["Cache-Control"] = IMMUTABLE
+    return response
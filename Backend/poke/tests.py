@@ -1,3 +1,1370 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import brotli
+import httpx
+import orjson
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import catalog, filter_index, http_cache, metrics, pokeapi, resumo, search, sprites, tipos, warmup
+from .catalog import PokemonResumo
+from .models import EspeciePokemon, Geracao, Pokemon, PokemonTipo, PokemonUsuario, TarefaTipos, TipoPokemon, TiposPokemonNome, Usuario
+from .pokeapi_stub import GENERATION_NAMES, TYPE_NAMES, StubCatalog, StubPokeAPI, sprite_png
+from .renderers import ORJSONRenderer
+
+
+def criar_usuario(login):
+    return Usuario.objects.create_user(
+        email=f"{login}@teste.com", login=login, password="senha-forte-123", nome=login.title()
+    )
+
+
+def sincronizar_catalogo(**opcoes):
+    saida = StringIO()
+    call_command("sync_pokeapi", stdout=saida, stderr=StringIO(), **opcoes)
+    return saida.getvalue()
+
+
+def criar_pokemons(usuario, quantidade, tipos):
+    for i in range(quantidade):
+        pokemon = PokemonUsuario.objects.create(
+            idUsuario=usuario, codigo=str(i + 1), nome=f"pokemon-{i + 1}",
+        )
+        pokemon.tipos.set(tipos)
+
+
+class StubPokeAPITestCase(TestCase):
+    """Aponta POKEAPI_BASE_URL para um stub local durante a classe de testes."""
+
+    stub_latency = 0.0
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubPokeAPI(latency=cls.stub_latency, size=300).start()
+        cls.stub_settings = override_settings(POKEAPI_BASE_URL=cls.stub.base_url)
+        cls.stub_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.stub_settings.disable()
+        cls.stub.stop()
+
+    def setUp(self):
+        super().setUp()
+        warmup.wait_pending()
+        self.stub.latency = self.stub_latency
+        self.stub.error_rate = 0.0
+        self.stub.requests = 0
+        pokeapi.clear_cache()
+        tipos.cache.clear()
+
+
+class PokemonUsuarioQueryCountTests(TestCase):
+    url = "/api/pokemon-usuario/"
+
+    def setUp(self):
+        self.usuario = criar_usuario("ash")
+        self.tipos = [TipoPokemon.objects.create(descricao=d) for d in ("fire", "flying")]
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_list_usa_numero_constante_de_queries(self):
+        for quantidade in (1, 10, 50):
+            PokemonUsuario.objects.all().delete()
+            criar_pokemons(self.usuario, quantidade, self.tipos)
+
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data["results"]), quantidade)
+            self.assertEqual(len(response.data["results"][-1]["tipos"]), 2)
+
+    def test_retrieve_usa_numero_constante_de_queries(self):
+        criar_pokemons(self.usuario, 3, self.tipos)
+        pokemon = PokemonUsuario.objects.first()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{self.url}{pokemon.pk}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["idUsuario"], "Ash")
+
+    def test_lista_apenas_pokemons_do_usuario_autenticado(self):
+        outro = criar_usuario("gary")
+        criar_pokemons(self.usuario, 2, self.tipos)
+        criar_pokemons(outro, 3, self.tipos)
+        pokemon_do_outro = PokemonUsuario.objects.filter(idUsuario=outro).first()
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        response = self.client.get(f"{self.url}{pokemon_do_outro.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+
+class PokemonUsuarioPaginacaoTests(TestCase):
+    url = "/api/pokemon-usuario/"
+
+    def setUp(self):
+        self.usuario = criar_usuario("ash")
+        self.tipos = [TipoPokemon.objects.create(descricao="water")]
+        criar_pokemons(self.usuario, 25, self.tipos)
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_cursor_percorre_todas_as_paginas_em_ordem(self):
+        ids, url = [], f"{self.url}?page_size=10"
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            ids.extend(p["idPokemonUsuario"] for p in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(ids, sorted(PokemonUsuario.objects.values_list("pk", flat=True)))
+
+    def test_fields_limita_campos_e_dispensa_prefetch(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"fields": "idPokemonUsuario,nome,codigo"})
+
+        self.assertEqual(set(response.data["results"][0]), {"idPokemonUsuario", "nome", "codigo"})
+
+    def test_filtra_por_codigo(self):
+        response = self.client.get(self.url, {"codigo": "7"})
+
+        self.assertEqual([p["nome"] for p in response.data["results"]], ["pokemon-7"])
+
+
+class PokemonUsuarioBulkTests(StubPokeAPITestCase):
+    url = "/api/pokemon-usuario/bulk/"
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = criar_usuario("ash")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def importar(self, quantidade):
+        itens = [{"codigo": str(i), "nome": f"pokemon-{i}", "favorito": True} for i in range(1, quantidade + 1)]
+        return self.client.post(self.url, {"create": itens}, format="json")
+
+    def test_importacao_usa_numero_constante_de_queries(self):
+        with self.assertNumQueries(8):
+            response = self.importar(5)
+        PokemonUsuario.objects.all().delete()
+
+        with self.assertNumQueries(8):
+            response = self.importar(50)
+
+        self.assertEqual([r["status"] for r in response.data["create"]], [201] * 50)
+        self.assertEqual(self.stub.requests, 0)
+        self.assertEqual(TarefaTipos.objects.count(), 50)
+
+        tipos.processar_pendentes(limite=100)
+        pokemon = PokemonUsuario.objects.get(nome="pokemon-3")
+        self.assertEqual(sorted(pokemon.tipos.values_list("descricao", flat=True)), ["ground", "poison"])
+        self.assertFalse(TarefaTipos.objects.exists())
+
+    def test_status_por_item(self):
+        existente = PokemonUsuario.objects.create(idUsuario=self.usuario, codigo="1", nome="pokemon-1")
+        response = self.client.post(self.url, {
+            "create": [{"codigo": "2", "nome": "pokemon-2"}, {"codigo": "x", "nome": "nao-existe"}, {"codigo": "3"}],
+            "update": [{"idPokemonUsuario": existente.pk, "favorito": True}, {"idPokemonUsuario": 9999}],
+            "delete": [9998],
+        }, format="json")
+
+        self.assertEqual([r["status"] for r in response.data["create"]], [201, 201, 400])
+        self.assertEqual([r["status"] for r in response.data["update"]], [200, 404])
+        self.assertEqual([r["status"] for r in response.data["delete"]], [404])
+        existente.refresh_from_db()
+        self.assertTrue(existente.favorito)
+
+    def test_limite_da_equipe_vale_para_o_lote(self):
+        criar_pokemons(self.usuario, 4, [])
+        PokemonUsuario.objects.update(grupoBatalha=True)
+        Usuario.objects.filter(pk=self.usuario.pk).update(qtdEquipeBatalha=4)
+        removido = PokemonUsuario.objects.first()
+        itens = [{"codigo": str(i), "nome": f"pokemon-{i}", "grupoBatalha": True} for i in (10, 11, 12)]
+
+        response = self.client.post(self.url, {"create": itens}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(PokemonUsuario.objects.count(), 4)
+
+        response = self.client.post(self.url, {"create": itens, "delete": [removido.pk]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.usuario.pokemons.filter(grupoBatalha=True).count(), 6)
+
+    def test_ids_repetidos_no_lote(self):
+        itens = [{"codigo": str(i), "nome": f"pokemon-{i}", "grupoBatalha": i < 3} for i in (1, 2, 3)]
+        membro, outro, fora = self.client.post(self.url, {"create": itens}, format="json").data["create"]
+
+        response = self.client.post(self.url, {
+            "update": [
+                {"idPokemonUsuario": fora["idPokemonUsuario"], "grupoBatalha": True},
+                {"idPokemonUsuario": fora["idPokemonUsuario"], "grupoBatalha": False},
+            ],
+            "delete": [membro["idPokemonUsuario"], membro["idPokemonUsuario"]],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.data["update"]], [200, 400])
+        self.assertEqual([r["status"] for r in response.data["delete"]], [204, 400])
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 2)
+        self.assertEqual(self.usuario.pokemons.filter(grupoBatalha=True).count(), 2)
+        self.assertEqual(resumo.reconstruir(), 0)
+
+
+class EquipeBatalhaTests(TestCase):
+    url = "/api/pokemon-usuario/"
+
+    def setUp(self):
+        self.usuario = criar_usuario("ash")
+        criar_pokemons(self.usuario, 8, [])
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def promover(self, pokemon, valor=True):
+        return self.client.patch(f"{self.url}{pokemon.pk}/", {"grupoBatalha": valor}, format="json")
+
+    def test_contador_acompanha_promocoes_rebaixamentos_e_remocoes(self):
+        pokemons = list(PokemonUsuario.objects.all())
+        for pokemon in pokemons[:6]:
+            self.assertEqual(self.promover(pokemon).status_code, 200)
+        self.assertEqual(self.promover(pokemons[6]).status_code, 403)
+
+        self.assertEqual(self.promover(pokemons[0], False).status_code, 200)
+        self.assertEqual(self.client.delete(f"{self.url}{pokemons[1].pk}/").status_code, 204)
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 4)
+
+        self.assertEqual(self.promover(pokemons[6]).status_code, 200)
+        self.assertEqual(self.promover(pokemons[6]).status_code, 200)
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 5)
+
+    def test_contador_atrasado_nao_derruba_remocao_nem_rebaixamento(self):
+        # Gravados direto no ORM: a equipe tem 2 membros e o contador continua em 0.
+        membros = list(PokemonUsuario.objects.all()[:2])
+        PokemonUsuario.objects.filter(pk__in=[p.pk for p in membros]).update(grupoBatalha=True)
+
+        self.assertEqual(self.client.delete(f"{self.url}{membros[0].pk}/").status_code, 204)
+        self.assertEqual(self.promover(membros[1], False).status_code, 200)
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 0)
+
+    def test_admin_mantem_o_contador_da_equipe(self):
+        admin = Usuario.objects.create_superuser(
+            email="admin@teste.com", login="admin", password="senha-forte-123", nome="Admin",
+        )
+        self.client.force_login(admin)
+        pokemon = PokemonUsuario.objects.first()
+        tipo = TipoPokemon.objects.create(descricao="fire")
+
+        response = self.client.post(f"/admin/poke/pokemonusuario/{pokemon.pk}/change/", {
+            "idUsuario": self.usuario.pk, "codigo": pokemon.codigo, "nome": pokemon.nome,
+            "grupoBatalha": "on", "tipos": [tipo.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 1)
+
+        self.client.post(f"/admin/poke/pokemonusuario/{pokemon.pk}/delete/", {"post": "yes"})
+        self.assertFalse(PokemonUsuario.objects.filter(pk=pokemon.pk).exists())
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.qtdEquipeBatalha, 0)
+        self.assertEqual(resumo.reconstruir(), 0)
+
+    def test_promocao_custa_uma_unica_query_extra(self):
+        pokemon = PokemonUsuario.objects.first()
+        with self.assertNumQueries(6):
+            self.client.patch(f"{self.url}{pokemon.pk}/", {"codigo": "99"}, format="json")
+        with self.assertNumQueries(7):
+            self.promover(pokemon)
+
+
+class EquipeBatalhaConcorrenciaTests(TransactionTestCase):
+    threads = 16
+
+    def test_promocoes_simultaneas_nunca_passam_de_seis(self):
+        usuario = criar_usuario("ash")
+        criar_pokemons(usuario, self.threads, [])
+        pokemons = list(PokemonUsuario.objects.all())
+        barreira = threading.Barrier(self.threads)
+        respostas = []
+
+        def promover(pokemon):
+            client = APIClient()
+            client.force_authenticate(usuario)
+            barreira.wait()
+            try:
+                response = client.patch(f"/api/pokemon-usuario/{pokemon.pk}/", {"grupoBatalha": True}, format="json")
+                respostas.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=promover, args=(p,)) for p in pokemons]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        usuario.refresh_from_db()
+        self.assertEqual(sorted(respostas), [200] * 6 + [403] * (self.threads - 6))
+        self.assertEqual(usuario.qtdEquipeBatalha, 6)
+        self.assertEqual(usuario.pokemons.filter(grupoBatalha=True).count(), 6)
+
+
+class ResumoColecaoTests(StubPokeAPITestCase):
+    url = "/api/pokemon-usuario/"
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = criar_usuario("ash")
+        self.fogo = TipoPokemon.objects.create(descricao="fire")
+        self.voador = TipoPokemon.objects.create(descricao="flying")
+        TiposPokemonNome.objects.create(nome="charizard", tipos=["fire", "flying"])
+        TiposPokemonNome.objects.create(nome="charmander", tipos=["fire"])
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def resumo(self):
+        response = self.client.get(f"{self.url}summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertResumoConsistente(self):
+        gravado = self.resumo()
+        self.assertEqual(resumo.reconstruir(), 0)
+        self.assertEqual(self.resumo(), gravado)
+        return gravado
+
+    def test_escritas_mantem_o_resumo(self):
+        criado = self.client.post(self.url, {"codigo": "6", "nome": "charizard", "favorito": True}, format="json")
+        self.client.post(self.url, {"codigo": "4", "nome": "charmander", "grupoBatalha": True}, format="json")
+        self.client.patch(f"{self.url}{criado.data['idPokemonUsuario']}/", {"favorito": False}, format="json")
+        lote = self.client.post(f"{self.url}bulk/", {
+            "create": [{"codigo": "4", "nome": "charmander", "favorito": True}, {"codigo": "25", "nome": "pokemon-25"}],
+            "delete": [criado.data["idPokemonUsuario"]],
+        }, format="json")
+        self.assertEqual([r["status"] for r in lote.data["create"]], [201, 201])
+
+        resumo_atual = self.assertResumoConsistente()
+        self.assertEqual(
+            {k: resumo_atual[k] for k in ("pokemons", "favoritos", "equipeBatalha")},
+            {"pokemons": 3, "favoritos": 1, "equipeBatalha": 1},
+        )
+        self.assertEqual(resumo_atual["tipos"], [{"idTipoPokemon": self.fogo.pk, "descricao": "fire", "quantidade": 2}])
+
+        # O tipo do nome desconhecido chega pelo worker, que também soma no resumo.
+        tipos.processar_pendentes()
+        self.assertEqual(len(self.assertResumoConsistente()["tipos"]), 2)
+
+        pokemon = PokemonUsuario.objects.get(nome="charmander", favorito=False)
+        self.assertEqual(self.client.delete(f"{self.url}{pokemon.pk}/").status_code, 204)
+        self.assertEqual(self.assertResumoConsistente()["pokemons"], 2)
+
+    def test_alteracoes_diretas_nos_tipos_atualizam_o_resumo(self):
+        criar_pokemons(self.usuario, 3, [self.fogo])
+        pokemon = PokemonUsuario.objects.first()
+        pokemon.tipos.set([self.voador])
+        self.voador.pokemons.add(*PokemonUsuario.objects.all())
+        self.fogo.pokemons.clear()
+
+        self.assertEqual(resumo.reconstruir(), 1)  # Só os contadores (criados fora das views) divergiam.
+        self.assertEqual(self.resumo()["tipos"], [{"idTipoPokemon": self.voador.pk, "descricao": "flying", "quantidade": 3}])
+
+    def test_resumo_nao_depende_do_tamanho_da_colecao(self):
+        criar_pokemons(self.usuario, 50, [self.fogo, self.voador])
+        # Autenticação forçada não consulta o banco: só as duas queries do resumo.
+        with self.assertNumQueries(2):
+            self.resumo()
+
+    def test_rebuild_summaries_corrige_contadores(self):
+        self.client.post(self.url, {"codigo": "6", "nome": "charizard", "favorito": True}, format="json")
+        outro = criar_usuario("misty")
+        Usuario.objects.filter(pk=self.usuario.pk).update(qtdPokemons=40, qtdFavoritos=0)
+
+        saida = StringIO()
+        call_command("rebuild_summaries", usuario=[self.usuario.pk, outro.pk], stdout=saida)
+
+        self.assertIn("1 usuários corrigidos", saida.getvalue())
+        self.assertEqual((self.resumo()["pokemons"], self.resumo()["favoritos"]), (1, 1))
+
+
+class ResolucaoTiposTests(StubPokeAPITestCase):
+    url = "/api/pokemon-usuario/"
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = criar_usuario("ash")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def criar(self, nome):
+        return self.client.post(self.url, {"codigo": "1", "nome": nome}, format="json")
+
+    def test_create_nao_consulta_a_pokeapi(self):
+        response = self.criar("pokemon-25")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stub.requests, 0)
+        self.assertEqual(list(TarefaTipos.objects.values_list("nome", flat=True)), ["pokemon-25"])
+
+        tipos.processar_pendentes()
+        pokemon = PokemonUsuario.objects.get()
+        self.assertEqual(list(pokemon.tipos.values_list("descricao", flat=True)), ["ghost"])
+        self.assertEqual(TiposPokemonNome.objects.get(nome="pokemon-25").tipos, ["ghost"])
+
+    def test_nome_conhecido_usa_tabela_local_e_cache(self):
+        TiposPokemonNome.objects.create(nome="pokemon-3", tipos=["poison", "ground"])
+        self.criar("pokemon-3")
+
+        with self.assertNumQueries(8):
+            self.criar("Pokemon-3")
+
+        self.assertFalse(TarefaTipos.objects.exists())
+        for pokemon in PokemonUsuario.objects.all():
+            self.assertEqual(sorted(pokemon.tipos.values_list("descricao", flat=True)), ["ground", "poison"])
+
+    def test_tarefa_com_erro_e_reprocessada_ate_o_limite(self):
+        self.criar("nao-existe")
+
+        for _ in range(5):
+            tipos.processar_pendentes()
+
+        tarefa = TarefaTipos.objects.get()
+        self.assertEqual(tarefa.status, TarefaTipos.ERRO)
+        self.assertEqual(tarefa.tentativas, 5)
+
+    def test_novo_pokemon_devolve_a_tarefa_com_erro_para_a_fila(self):
+        self.stub.error_rate = 1.0
+        self.criar("pokemon-25")
+        for _ in range(5):
+            tipos.processar_pendentes()
+        self.assertEqual(TarefaTipos.objects.get().status, TarefaTipos.ERRO)
+
+        self.stub.error_rate = 0.0
+        pokeapi.breaker.reset()
+        self.criar("pokemon-25")
+        tarefa = TarefaTipos.objects.get()
+        self.assertEqual((tarefa.status, tarefa.tentativas, tarefa.erro), (TarefaTipos.PENDENTE, 0, ""))
+
+        tipos.processar_pendentes()
+        self.assertFalse(TarefaTipos.objects.exists())
+        for pokemon in PokemonUsuario.objects.all():
+            self.assertEqual(list(pokemon.tipos.values_list("descricao", flat=True)), ["ghost"])
+
+
+class PokemonAPIAsyncTests(StubPokeAPITestCase):
+    url = "/api/pokemon/"
+
+    @mock.patch.object(warmup, "prefetch")
+    async def test_list_busca_detalhes_no_cliente_compartilhado(self, prefetch):
+        response = await self.async_client.get(self.url, {"offset": 0, "limit": 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["nome"] for p in response.json()["results"]], [f"pokemon-{i}" for i in range(1, 6)])
+        self.assertEqual(self.stub.requests, 6)
+
+        await self.async_client.get(self.url, {"offset": 0, "limit": 5})
+        self.assertEqual(self.stub.requests, 6)
+
+    def test_loops_de_requisicao_dividem_o_cliente_assincrono(self):
+        # Sob WSGI cada requisição roda num loop novo do async_to_sync.
+        async def buscar(path):
+            await pokeapi.aget(path)
+            return await pokeapi.on_loop(cliente())
+
+        async def cliente():
+            return pokeapi.get_async_client()
+
+        primeiro = asyncio.run(buscar("pokemon/1"))
+        segundo = async_to_sync(buscar)("pokemon/2")
+
+        self.assertIs(primeiro, segundo)
+        self.assertFalse(primeiro.is_closed)
+        self.assertEqual(self.stub.requests, 2)
+
+    async def test_retrieve_repassa_404_do_upstream(self):
+        response = await self.async_client.get(f"{self.url}nao-existe/")
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get(f"{self.url}search-name/", {"name": "Pokemon-25"})
+        self.assertEqual(response.json()["tipos"], ["ghost"])
+
+    @override_settings(RESPONSE_CACHE_MAX_BYTES=0)
+    async def test_retrieve_renderiza_o_resumo_com_slots(self):
+        response = await self.async_client.get(f"{self.url}25/")
+
+        self.assertIsInstance(response.data, PokemonResumo)
+        self.assertFalse(hasattr(response.data, "__dict__"))
+        self.assertEqual(response.json(), {
+            "id": 25, "nome": "pokemon-25", "tipos": ["ghost"],
+            "imagemUrl": sprites.proxy_url(f"{self.stub.base_url}/sprites/official-artwork/25.png", "full"),
+        })
+
+
+class BatchTests(StubPokeAPITestCase):
+    url = "/api/pokemon/batch/"
+
+    async def test_busca_chaves_distintas_em_paralelo_na_ordem_pedida(self):
+        await self.async_client.get("/api/pokemon/3/")
+        self.stub.requests = 0
+
+        response = await self.async_client.get(self.url, {"ids": "25, 025,Pokemon-7,pokemon-7,3,nao-existe,,a/b"})
+
+        resultados = response.json()["results"]
+        self.assertEqual([r["key"] for r in resultados], ["25", "pokemon-7", "3", "nao-existe", "a/b"])
+        self.assertEqual([r["status"] for r in resultados], [200, 200, 200, 404, 400])
+        self.assertEqual(resultados[1]["pokemon"]["id"], 7)
+        self.assertEqual(resultados[2]["pokemon"]["nome"], "pokemon-3")
+        # O 3 já estava em cache e o a/b nem vai ao upstream.
+        self.assertEqual(self.stub.requests, 3)
+
+    async def test_digitos_fora_do_ascii_sao_nomes(self):
+        response = await self.async_client.get(self.url, {"ids": "²,٣,3"})
+        geracao = await self.async_client.get("/api/pokemon/filter-generation/", {"id": "²"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["status"] for r in response.json()["results"]], [400, 400, 200])
+        self.assertEqual(geracao.status_code, 400)
+        self.assertEqual(await sync_to_async(catalog.retrieve_many)(["²", "٣"]), {})
+        self.assertIsNone(await sync_to_async(catalog.retrieve)("²"))
+
+    async def test_limite_de_chaves(self):
+        with override_settings(POKEAPI_BATCH_MAX=2):
+            excedido = await self.async_client.get(self.url, {"ids": "1,2,3"})
+        vazio = await self.async_client.get(self.url, {"ids": " , "})
+
+        self.assertEqual(excedido.status_code, 400)
+        self.assertEqual(vazio.status_code, 400)
+
+
+class FiltroCombinadoTests(StubPokeAPITestCase):
+    url = "/api/pokemon/filter-combined/"
+    catalogo = StubCatalog(300)
+
+    def setUp(self):
+        super().setUp()
+        filter_index.invalidate()
+
+    def ids(self, condicao):
+        return [p["id"] for p in self.catalogo.pokemon.values() if condicao(p)]
+
+    def filtrar(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_tipos_combinados_com_e_e_ou(self):
+        fogo, sombrio = TYPE_NAMES.index("fire") + 1, TYPE_NAMES.index("dark") + 1
+
+        ou = self.filtrar(type_id=f"{fogo},{sombrio}")
+        e = self.filtrar(type_id=f"{fogo},{sombrio}", type_op="and")
+
+        self.assertEqual([p["id"] for p in ou["results"]],
+                         self.ids(lambda p: {"fire", "dark"} & set(p["types"])))
+        self.assertEqual([p["id"] for p in e["results"]],
+                         self.ids(lambda p: {"fire", "dark"} <= set(p["types"])))
+        self.assertTrue(0 < e["count"] < ou["count"])
+
+    def test_tipo_com_geracao(self):
+        fantasma = TYPE_NAMES.index("ghost") + 1
+
+        e = self.filtrar(type_id=fantasma, gen_id=2)
+        ou = self.filtrar(type_id=fantasma, gen_id=2, op="or")
+
+        self.assertEqual([p["id"] for p in e["results"]],
+                         self.ids(lambda p: "ghost" in p["types"] and p["generation"] == 2))
+        self.assertEqual(ou["count"], len(self.ids(lambda p: "ghost" in p["types"] or p["generation"] == 2)))
+        self.assertEqual(e["results"][0]["name"], f"pokemon-{e['results'][0]['id']}")
+
+    def test_pagina_com_offset_e_limit(self):
+        pagina = self.filtrar(gen_id=1, offset=10, limit=5)
+
+        self.assertEqual(pagina["count"], 151)
+        self.assertEqual([p["id"] for p in pagina["results"]], [11, 12, 13, 14, 15])
+        self.assertIn("offset=15", pagina["next"])
+        self.assertIn("offset=5", pagina["previous"])
+        self.assertIsNone(self.filtrar(gen_id=1, offset=150, limit=5)["next"])
+        self.assertEqual(self.client.get(self.url, {"limit": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"op": "xor"}).status_code, 400)
+
+    def test_id_zero_nao_filtra(self):
+        self.assertEqual(self.filtrar(gen_id=0)["count"], 300)
+        self.assertEqual(self.filtrar(gen_id="0,3")["count"], len(self.ids(lambda p: p["generation"] == 3)))
+        self.assertEqual(self.filtrar(gen_id=0, type_id=TYPE_NAMES.index("ice") + 1)["count"],
+                         len(self.ids(lambda p: "ice" in p["types"])))
+
+
+@override_settings(POKEAPI_LOCAL_CATALOG=True)
+class FiltroCombinadoLocalTests(FiltroCombinadoTests):
+    """Os mesmos filtros sobre o catálogo local gravado pelo sync_pokeapi."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sincronizar_catalogo()
+
+    def test_sync_invalida_o_indice(self):
+        Pokemon.objects.filter(pk=7).update(nome="antigo")
+        self.assertEqual(self.filtrar(gen_id=1, limit=7)["results"][6]["name"], "antigo")
+        Pokemon.objects.filter(pk=7).update(nome="ignorado")
+        # Índice em memória: a mudança direta no banco só aparece depois do sync.
+        self.assertEqual(self.filtrar(gen_id=1, limit=7)["results"][6]["name"], "antigo")
+
+        requisicoes = self.stub.requests
+        sincronizar_catalogo()
+
+        self.assertEqual(self.filtrar(gen_id=1, limit=7)["results"][6]["name"], "pokemon-7")
+        self.assertGreater(self.stub.requests, requisicoes)
+
+
+class SyncPokeAPITests(StubPokeAPITestCase):
+    catalogo = StubCatalog(300)
+
+    def assertCatalogoCompleto(self):
+        self.assertEqual(TipoPokemon.objects.filter(codigo__isnull=False).count(), len(TYPE_NAMES))
+        self.assertEqual(Geracao.objects.count(), len(GENERATION_NAMES))
+        self.assertEqual(EspeciePokemon.objects.count(), 300)
+        self.assertEqual(Pokemon.objects.count(), 300)
+        self.assertEqual(PokemonTipo.objects.count(), sum(len(p["types"]) for p in self.catalogo.pokemon.values()))
+        pokemon = Pokemon.objects.get(nome="pokemon-152")
+        self.assertEqual(pokemon.especie.geracao_id, 2)
+        self.assertEqual(list(pokemon.slots.order_by("slot").values_list("tipo__descricao", flat=True)),
+                         self.catalogo.pokemon[152]["types"])
+
+    def test_sincroniza_da_api_e_reexecucao_so_busca_as_listagens(self):
+        sincronizar_catalogo()
+        self.assertCatalogoCompleto()
+        atualizado = Pokemon.objects.get(pk=1).dtAtualizacao
+
+        self.stub.requests = 0
+        saida = sincronizar_catalogo()
+
+        self.assertIn("300 no upstream, 0 a sincronizar", saida)
+        self.assertIn("espécies já sincronizadas", saida)
+        self.assertEqual(self.stub.requests, 4)  # type, generation, pokemon-species e pokemon
+        self.assertEqual(Pokemon.objects.get(pk=1).dtAtualizacao, atualizado)
+
+    def test_sincroniza_de_um_dump_offline(self):
+        with tempfile.TemporaryDirectory() as diretorio:
+            cliente = httpx.Client(base_url=self.stub.base_url)
+
+            def gravar(caminho):
+                destino = Path(diretorio, caminho, "index.json")
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                destino.write_bytes(cliente.get(f"/{caminho}/", params={"limit": 100000}).content)
+                return destino
+
+            for recurso in ("type", "generation", "pokemon-species", "pokemon"):
+                gravar(recurso)
+            for geracao in range(1, len(GENERATION_NAMES) + 1):
+                gravar(f"generation/{geracao}")
+            for pokemon_id in range(1, 301):
+                gravar(f"pokemon/{pokemon_id}")
+            cliente.close()
+
+            self.stub.error_rate = 1.0
+            self.stub.requests = 0
+            sincronizar_catalogo(dump=diretorio)
+
+        self.assertCatalogoCompleto()
+        self.assertEqual(self.stub.requests, 0)
+        with self.assertRaises(CommandError):
+            sincronizar_catalogo(dump="/nao/existe")
+
+
+@override_settings(POKEAPI_LOCAL_CATALOG=True)
+class PokemonAPICatalogoLocalTests(PokemonAPIAsyncTests):
+    """As views do catálogo respondendo do banco, sem chamar a PokeAPI."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sincronizar_catalogo()
+
+    async def test_list_busca_detalhes_no_cliente_compartilhado(self):
+        response = await self.async_client.get(self.url, {"offset": 5, "limit": 5})
+
+        dados = response.json()
+        self.assertEqual([p["nome"] for p in dados["results"]], [f"pokemon-{i}" for i in range(6, 11)])
+        self.assertEqual(dados["results"][2]["tipos"], SyncPokeAPITests.catalogo.pokemon[8]["types"])
+        self.assertEqual(dados["count"], 300)
+        self.assertIn("offset=10", dados["next"])
+        self.assertIn("offset=0", dados["previous"])
+        self.assertEqual((await self.async_client.get(self.url, {"limit": "x"})).status_code, 400)
+        self.assertEqual(self.stub.requests, 0)
+
+    async def test_tipos_e_geracoes_vem_do_banco(self):
+        tipos_ = (await self.async_client.get(f"{self.url}types/")).json()["tipos"]
+        geracoes = (await self.async_client.get(f"{self.url}generations/")).json()["generations"]
+        especies = (await self.async_client.get(f"{self.url}filter-generation/", {"id": 2})).json()["results"]
+        inexistente = await self.async_client.get(f"{self.url}filter-generation/", {"id": 42})
+
+        self.assertEqual(tipos_[:2], [{"id": 1, "name": "normal"}, {"id": 2, "name": "fighting"}])
+        self.assertEqual(geracoes[1], {"id": 2, "name": "Geração ii"})
+        self.assertEqual([e["id"] for e in especies], list(range(152, 252)))
+        self.assertEqual(inexistente.status_code, 404)
+        self.assertEqual(self.stub.requests, 0)
+
+class CacheHTTPTests(StubPokeAPITestCase):
+    url = "/api/pokemon/"
+    stub_latency = 0.005
+
+    async def test_revalidacao_devolve_304_sem_remontar_payload(self):
+        started = time.perf_counter()
+        completa = await self.async_client.get(self.url, {"offset": 0, "limit": 50})
+        tempo_completa = time.perf_counter() - started
+        etag = completa.headers["ETag"]
+        warmup.wait_pending()
+        requisicoes = self.stub.requests
+
+        with mock.patch.object(pokeapi, "aget", side_effect=AssertionError), \
+                mock.patch.object(pokeapi, "afetch_many", side_effect=AssertionError):
+            started = time.perf_counter()
+            revalidada = await self.async_client.get(
+                self.url, {"offset": 0, "limit": 50}, headers={"if-none-match": etag}
+            )
+            tempo_revalidada = time.perf_counter() - started
+
+        self.assertEqual(revalidada.status_code, 304)
+        self.assertEqual(revalidada.headers["ETag"], etag)
+        self.assertIn("stale-while-revalidate=3600", revalidada.headers["Cache-Control"])
+        self.assertEqual(len(revalidada.content), 0)
+        self.assertGreater(len(completa.content), 5000)
+        self.assertLess(tempo_revalidada, tempo_completa)
+        self.assertEqual(self.stub.requests, requisicoes)
+
+    async def test_etag_e_politica_por_endpoint(self):
+        lista_tipos = await self.async_client.get(f"{self.url}types/")
+        pokemon = await self.async_client.get(f"{self.url}pokemon-7/")
+        inexistente = await self.async_client.get(f"{self.url}nao-existe/")
+
+        self.assertIn("max-age=86400", lista_tipos.headers["Cache-Control"])
+        self.assertIn("max-age=3600", pokemon.headers["Cache-Control"])
+        self.assertNotEqual(lista_tipos.headers["ETag"], pokemon.headers["ETag"])
+        self.assertNotIn("ETag", inexistente.headers)
+
+        # Payload recalculado (cache limpo) e idêntico: o ETag forte continua valendo.
+        pokeapi.clear_cache()
+        response = await self.async_client.get(f"{self.url}pokemon-7/", headers={"if-none-match": pokemon.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+
+    async def test_cache_stats_so_para_administradores(self):
+        usuario = await sync_to_async(criar_usuario)("ash")
+        admin = await sync_to_async(Usuario.objects.create_superuser)(
+            email="admin@teste.com", login="admin", password="senha-forte-123", nome="Admin",
+        )
+
+        anonimo = await self.async_client.get(f"{self.url}cache-stats/")
+        comum = await self.async_client.get(
+            f"{self.url}cache-stats/", headers={"authorization": f"Bearer {AccessToken.for_user(usuario)}"}
+        )
+        administrador = await self.async_client.get(
+            f"{self.url}cache-stats/", headers={"authorization": f"Bearer {AccessToken.for_user(admin)}"}
+        )
+
+        self.assertEqual(anonimo.status_code, 401)
+        self.assertEqual(comum.status_code, 403)
+        self.assertEqual(administrador.status_code, 200)
+        self.assertIn("breaker", administrador.json())
+
+
+class RespostasProntasTests(StubPokeAPITestCase):
+    url = "/api/pokemon/filter-generation/"
+
+    async def test_serve_o_corpo_pronto_conforme_o_accept_encoding(self):
+        identity = await self.async_client.get(self.url, {"id": 1})
+
+        with mock.patch.object(ORJSONRenderer, "render", side_effect=AssertionError), \
+                mock.patch.object(pokeapi, "aget", side_effect=AssertionError):
+            br = await self.async_client.get(self.url, {"id": 1}, headers={"accept-encoding": "gzip, deflate, br"})
+            gz = await self.async_client.get(self.url, {"id": 1}, headers={"accept-encoding": "gzip;q=1, br;q=0.5"})
+            revalidada = await self.async_client.get(self.url, {"id": 1}, headers={"if-none-match": br["ETag"]})
+
+        self.assertNotIn("Content-Encoding", identity.headers)
+        self.assertEqual(len(identity.json()["results"]), 151)
+        self.assertEqual(br["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(br.content), identity.content)
+        self.assertEqual(gz["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gz.content), identity.content)
+        self.assertLess(len(br.content), len(gz.content))
+        self.assertLess(len(gz.content), len(identity.content) / 4)
+        self.assertEqual(br["ETag"], f"W/{identity['ETag']}")
+        self.assertIn("Accept-Encoding", br["Vary"])
+        self.assertEqual(revalidada.status_code, 304)
+
+    async def test_compressao_roda_fora_do_event_loop(self):
+        threads = []
+        original = http_cache.Blob.__init__
+
+        def montar(blob, *args):
+            threads.append(threading.get_ident())
+            original(blob, *args)
+
+        with mock.patch.object(http_cache.Blob, "__init__", montar):
+            await self.async_client.get(self.url, {"id": 2})
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+    async def test_versao_nova_do_catalogo_descarta_as_respostas(self):
+        await self.async_client.get(self.url, {"id": 1})
+        await sync_to_async(pokeapi.bump_catalog_version)()
+
+        with mock.patch.object(ORJSONRenderer, "render", wraps=ORJSONRenderer().render) as render:
+            await self.async_client.get(self.url, {"id": 1})
+            await self.async_client.get(self.url, {"id": 1})
+
+        self.assertEqual(render.call_count, 1)
+
+
+@override_settings(POKEAPI_RETRIES=2, POKEAPI_RETRY_BACKOFF=0.001, POKEAPI_BREAKER_THRESHOLD=5, POKEAPI_BREAKER_RESET=60)
+class ResilienciaTests(StubPokeAPITestCase):
+    url = "/api/pokemon/"
+
+    async def test_circuito_aberto_serve_cache_vencido(self):
+        with override_settings(POKEAPI_CACHE_TTLS={**settings.POKEAPI_CACHE_TTLS, "pokemon": 0}):
+            fresca = await self.async_client.get(f"{self.url}pokemon-7/")
+            self.stub.error_rate = 1.0
+
+            for _ in range(2):
+                response = await self.async_client.get(f"{self.url}pokemon-7/")
+            self.assertEqual(pokeapi.breaker.state, pokeapi.CircuitBreaker.OPEN)
+            requisicoes = self.stub.requests
+
+            started = time.perf_counter()
+            response = await self.async_client.get(f"{self.url}pokemon-7/")
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), fresca.json())
+        self.assertEqual(response.headers["Warning"], '110 - "Response is Stale"')
+        self.assertIn("max-age=0", response.headers["Cache-Control"])
+        self.assertIn("X-Stale-Age", response.headers)
+        self.assertEqual(self.stub.requests, requisicoes)
+        self.assertLess(elapsed, 0.1)
+
+    async def test_sem_cache_falha_rapido_com_503(self):
+        self.stub.error_rate = 1.0
+
+        response = await self.async_client.get(f"{self.url}pokemon-8/")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.stub.requests, 3)
+
+        await self.async_client.get(f"{self.url}pokemon-8/")
+        requisicoes = self.stub.requests
+        started = time.perf_counter()
+        response = await self.async_client.get(f"{self.url}pokemon-9/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.assertEqual(self.stub.requests, requisicoes)
+        self.assertEqual(pokeapi.cache_stats()["breaker"], "open")
+
+    def test_misses_simultaneos_sob_wsgi_viram_uma_busca(self):
+        # O Client de teste passa pelo WSGIHandler: cada requisição, numa thread, abre o
+        # próprio loop no async_to_sync do adrf.
+        self.stub.latency = 0.2
+        barreira = threading.Barrier(8)
+        respostas = []
+
+        def buscar():
+            client = Client()
+            barreira.wait()
+            respostas.append(client.get(f"{self.url}pokemon-25/"))
+
+        threads = [threading.Thread(target=buscar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([r.status_code for r in respostas], [200] * 8)
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(pokeapi.cache_stats()["coalesced"], 7)
+
+    async def test_lider_cancelado_nao_derruba_quem_espera_a_mesma_chave(self):
+        self.stub.latency = 0.1
+        lider = asyncio.create_task(pokeapi.aget("pokemon/11"))
+        await asyncio.sleep(0.02)
+        seguidor = asyncio.create_task(pokeapi.aget("pokemon/11"))
+        await asyncio.sleep(0.02)
+        lider.cancel()
+
+        self.assertEqual((await seguidor)["id"], 11)
+        self.assertTrue(lider.cancelled())
+        self.assertEqual(self.stub.requests, 1)
+        self.assertEqual(pokeapi.cache_stats()["coalesced"], 1)
+
+    async def test_corpo_invalido_do_upstream_vira_502(self):
+        decodificador = mock.Mock(loads=mock.Mock(side_effect=orjson.JSONDecodeError("corpo inválido", "<html>", 0)))
+        with mock.patch.object(pokeapi, "orjson", decodificador):
+            detalhe = await self.async_client.get(f"{self.url}pokemon-12/")
+            lista = await self.async_client.get(f"{self.url}types/")
+
+        self.assertEqual(detalhe.status_code, 502)
+        self.assertEqual(lista.status_code, 502)
+
+    @override_settings(POKEAPI_TIMEOUT=0.05, POKEAPI_RETRIES=1, POKEAPI_BREAKER_THRESHOLD=1, POKEAPI_BREAKER_RESET=0.1)
+    async def test_timeout_limita_a_latencia_e_circuito_fecha_depois(self):
+        self.stub.latency = 0.5
+
+        started = time.perf_counter()
+        response = await self.async_client.get(f"{self.url}pokemon-10/")
+        self.assertEqual(response.status_code, 503)
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+        self.stub.latency = 0.0
+        await asyncio.sleep(0.15)
+        response = await self.async_client.get(f"{self.url}pokemon-10/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Warning", response.headers)
+        self.assertEqual(pokeapi.breaker.state, pokeapi.CircuitBreaker.CLOSED)
+
+
+class WarmUpTests(StubPokeAPITestCase):
+    url = "/api/pokemon/"
+
+    def test_warm_cache_dispensa_o_upstream_nas_paginas_padrao(self):
+        erros = StringIO()
+        call_command("warm_cache", limits="20", pages=3, stdout=StringIO(), stderr=erros)
+        self.assertIn("POKEAPI_CACHE é local", erros.getvalue())
+        self.stub.requests = 0
+
+        for path in ("types/", "generations/", "filter-generation/?id=1", "?offset=0&limit=20", "?offset=20&limit=20"):
+            self.assertEqual(self.client.get(f"{self.url}{path}").status_code, 200)
+
+        self.assertEqual(self.stub.requests, 0)
+
+    def test_list_pre_busca_a_proxima_pagina(self):
+        self.client.get(self.url, {"offset": 0, "limit": 10})
+        warmup.wait_pending(timeout=5)
+        requisicoes = self.stub.requests
+
+        with mock.patch.object(warmup, "prefetch"):
+            response = self.client.get(self.url, {"offset": 10, "limit": 10})
+
+        self.assertEqual([p["id"] for p in response.json()["results"]], list(range(11, 21)))
+        self.assertEqual(self.stub.requests, requisicoes)
+
+    def test_falha_do_upstream_nao_interrompe_o_warm_up(self):
+        self.stub.error_rate = 1.0
+        with self.assertLogs("poke.warmup", "WARNING") as logs:
+            aquecidas, falhas = warmup.warm_all(limits=[20], pages=2)
+
+        self.assertEqual(aquecidas, 0)
+        self.assertEqual(falhas, 5)  # tipos, gerações, 2 páginas e o índice
+        self.assertIn("Warm-up sem as gerações", logs.output[0])
+
+    def test_plano_comeca_pelas_chaves_mais_acessadas(self):
+        for nome in ("pokemon-300", "pokemon-300", "pokemon-300", "pokemon-5"):
+            self.client.get(f"{self.url}{nome}/")
+
+        self.assertEqual(warmup.plan()[:3], ["pokemon/pokemon-300/", "pokemon/pokemon-5/", "type/"])
+
+
+class BuscaNomeTests(StubPokeAPITestCase):
+    url = "/api/pokemon/search/"
+
+    def setUp(self):
+        super().setUp()
+        filter_index.invalidate()
+        nomes = ["bulbasaur", "ivysaur", "venusaur", "charmander", "charmeleon", "charizard", "pikachu", "mr-mime"]
+        self.indice = search.NameIndex(dict(enumerate(nomes, start=1)), {})
+
+    def buscar(self, consulta):
+        return [(self.indice.keys[posicao], tipo) for posicao, tipo, _ in self.indice.search(consulta)]
+
+    def test_exato_e_prefixo_vem_antes_do_aproximado(self):
+        self.assertEqual(self.buscar("char"), [
+            ("charizard", search.PREFIX), ("charmander", search.PREFIX), ("charmeleon", search.PREFIX),
+        ])
+        self.assertEqual(self.buscar("Mr Mime"), [("mr-mime", search.EXACT)])
+        self.assertEqual(self.buscar("saur")[0], ("ivysaur", search.SUBSTRING))
+
+    def test_tolera_erros_de_digitacao(self):
+        self.assertEqual(self.buscar("pikahcu"), [("pikachu", search.FUZZY)])
+        self.assertEqual(self.buscar("chrizard"), [("charizard", search.FUZZY)])
+        self.assertEqual(self.buscar("xyz"), [])
+
+    def test_endpoint_pagina_os_resultados_do_indice(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+        response = self.client.get(self.url, {"q": "pokemon-2", "limit": 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["name"] for p in response.data["results"]], ["pokemon-2", "pokemon-20", "pokemon-21"])
+        self.assertEqual(response.data["results"][0]["match"], "exact")
+        self.assertIsNotNone(response.data["next"])
+
+        requisicoes = self.stub.requests
+        response = self.client.get(self.url, {"q": "pokemn-250"})
+        self.assertEqual(response.data["results"][0]["name"], "pokemon-250")
+        self.assertEqual(self.stub.requests, requisicoes)
+
+
+@override_settings(POKEAPI_LOCAL_CATALOG=True)
+class BuscaNomeCatalogoLocalTests(BuscaNomeTests):
+    @classmethod
+    def setUpTestData(cls):
+        sincronizar_catalogo()
+
+
+async def ler_stream(response):
+    return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+
+class ExportacaoTests(StubPokeAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.usuario = criar_usuario("ash")
+        self.tipos = [TipoPokemon.objects.create(descricao=d) for d in ("fire", "flying")]
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.usuario)}"}
+
+    @override_settings(EXPORT_UPSTREAM_PAGE=40)
+    async def test_exporta_o_catalogo_do_upstream_em_ndjson(self):
+        response = await self.async_client.get("/api/pokemon/export/")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        linhas = [json.loads(linha) for linha in (await ler_stream(response)).splitlines()]
+        self.assertEqual([p["id"] for p in linhas], list(range(1, 301)))
+        self.assertEqual(linhas[24]["tipos"], ["ghost"])
+
+    @override_settings(EXPORT_CHUNK_SIZE=100)
+    async def test_exporta_a_colecao_do_usuario_em_lotes(self):
+        await sync_to_async(criar_pokemons)(self.usuario, 250, self.tipos)
+        await sync_to_async(criar_pokemons)(await sync_to_async(criar_usuario)("gary"), 5, self.tipos)
+
+        response = await self.async_client.get("/api/pokemon-usuario/export/", {"output": "csv"}, headers=self.headers)
+        linhas = (await ler_stream(response)).splitlines()
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(linhas[0], "idPokemonUsuario,idUsuario,nome,codigo,grupoBatalha,favorito,tipos,imagemUrl")
+        self.assertEqual(len(linhas), 251)
+        self.assertTrue(linhas[1].endswith(",pokemon-1,1,False,False,fire|flying,"))
+
+        response = await self.async_client.get("/api/pokemon-usuario/export/", {"fields": "nome"}, headers=self.headers)
+        self.assertEqual((await ler_stream(response)).splitlines()[-1], '{"nome":"pokemon-250"}')
+
+    @override_settings(EXPORT_CHUNK_SIZE=100, EXPORT_UPSTREAM_PAGE=40)
+    def test_sob_wsgi_cada_lote_sai_sem_esperar_os_outros(self):
+        criar_pokemons(self.usuario, 250, self.tipos)
+
+        response = self.client.get("/api/pokemon-usuario/export/", {"output": "csv"}, headers=self.headers)
+        self.assertFalse(response.is_async)
+        lotes = iter(response.streaming_content)
+        self.assertEqual(len(next(lotes).splitlines()), 101)
+        self.assertEqual([len(lote.splitlines()) for lote in lotes], [100, 50])
+
+        response = self.client.get("/api/pokemon/export/")
+        self.assertFalse(response.is_async)
+        lotes = iter(response.streaming_content)
+        self.assertEqual(len(next(lotes).splitlines()), 40)
+        self.assertEqual(self.stub.requests, 41)
+        self.assertEqual(sum(len(lote.splitlines()) for lote in lotes), 260)
+
+
+@override_settings(METRICS_TOKEN="segredo")
+class MetricasTests(StubPokeAPITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.clear()
+
+    def test_server_timing_e_metrics_contam_upstream_e_latencia(self):
+        primeira = self.client.get("/api/pokemon/pokemon-7/")
+        segunda = self.client.get("/api/pokemon/pokemon-7/")
+
+        self.assertIn('pokeapi;dur=', primeira["Server-Timing"])
+        self.assertIn('desc="1 calls"', primeira["Server-Timing"])
+        self.assertIn('desc="0 calls"', segunda["Server-Timing"])
+
+        response = self.client.get("/metrics", headers={"authorization": "Bearer segredo"})
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        corpo = response.content.decode()
+        self.assertIn('pokeapi_upstream_requests_total{resource="pokemon",status="200"} 1\n', corpo)
+        self.assertIn('http_request_duration_seconds_count{view="pokemon-detail",method="GET",status="200"} 2\n', corpo)
+        # A segunda sai pronta do http_cache.blobs, sem passar pelo cache da PokeAPI.
+        self.assertIn('pokeapi_cache_events_total{event="memory_hits"} 0\n', corpo)
+        self.assertNotIn('view="metrics"', corpo)
+
+    def test_conta_as_queries_da_requisicao(self):
+        usuario = criar_usuario("ash")
+        criar_pokemons(usuario, 3, [TipoPokemon.objects.create(descricao="fire")])
+        client = APIClient()
+        client.force_authenticate(usuario)
+
+        response = client.get("/api/pokemon-usuario/")
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+        corpo = self.client.get("/metrics", headers={"authorization": "Bearer segredo"}).content.decode()
+        self.assertIn('http_request_db_queries_bucket{view="pokemonusuario-list",le="2"} 1\n', corpo)
+
+    def test_metrics_exige_o_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"authorization": "Bearer outro"}).status_code, 403)
+        with override_settings(METRICS_TOKEN=""):
+            response = self.client.get("/metrics", headers={"authorization": "Bearer "})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SPRITES_PROXY=True, SPRITES_BASE_URL="http://testserver")
+class SpritesTests(StubPokeAPITestCase):
+    def setUp(self):
+        super().setUp()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        cache_dir = override_settings(SPRITES_CACHE_DIR=diretorio.name)
+        cache_dir.enable()
+        self.addCleanup(cache_dir.disable)
+
+    async def ler_imagem(self, url, **kwargs):
+        response = await self.async_client.get(urlsplit(url).path, **kwargs)
+        if response.status_code != 200:
+            return response, None
+        return response, response.getvalue()
+
+    async def test_catalogo_aponta_para_variantes_baixadas_uma_vez(self):
+        pagina = (await self.async_client.get("/api/pokemon/", {"limit": 3})).json()
+        url = pagina["results"][0]["imagemUrl"]
+        warmup.wait_pending()
+        requisicoes = self.stub.requests
+
+        card, corpo = await self.ler_imagem(url)
+        _, miniatura = await self.ler_imagem(url.replace("/card/", "/thumb/"))
+        _, original = await self.ler_imagem(url.replace("/card/", "/original/"))
+        revalidada, _ = await self.ler_imagem(url, headers={"if-none-match": card["ETag"]})
+
+        self.assertTrue(url.startswith(f"{settings.SPRITES_BASE_URL}/api/sprites/card/127.0.0.1:"))
+        self.assertEqual(self.stub.requests, requisicoes + 1)
+        self.assertEqual(card["Content-Type"], "image/webp")
+        self.assertEqual(card["Cache-Control"], sprites.IMMUTABLE)
+        with Image.open(io.BytesIO(corpo)) as imagem:
+            self.assertEqual((imagem.format, imagem.size), ("WEBP", (256, 256)))
+        with Image.open(io.BytesIO(miniatura)) as imagem:
+            self.assertEqual(imagem.size, (96, 96))
+        self.assertEqual(original, sprite_png(1))
+        self.assertEqual(revalidada.status_code, 304)
+
+    def test_so_hosts_permitidos_passam_pelo_proxy(self):
+        usuario = criar_usuario("ash")
+        PokemonUsuario.objects.create(
+            idUsuario=usuario, codigo="1", nome="a", imagemUrl=f"{self.stub.base_url}/sprites/official-artwork/1.png",
+        )
+        PokemonUsuario.objects.create(idUsuario=usuario, codigo="2", nome="b", imagemUrl="https://example.com/2.png")
+        client = APIClient()
+        client.force_authenticate(usuario)
+
+        imagens = [p["imagemUrl"] for p in client.get("/api/pokemon-usuario/").json()["results"]]
+
+        self.assertIn("/api/sprites/card/127.0.0.1:", imagens[0])
+        self.assertEqual(imagens[1], "https://example.com/2.png")
+        self.assertEqual(self.client.get("/api/sprites/card/example.com/2.png").status_code, 404)
+        self.assertEqual(self.client.get(urlsplit(imagens[0].replace("/card/", "/huge/")).path).status_code, 404)
+
+    def test_url_do_proxy_grava_a_origem(self):
+        usuario = criar_usuario("ash")
+        client = APIClient()
+        client.force_authenticate(usuario)
+        origem = f"{self.stub.base_url}/sprites/official-artwork/4.png"
+
+        criado = client.post("/api/pokemon-usuario/", {
+            "codigo": "4", "nome": "pokemon-4", "imagemUrl": sprites.proxy_url(origem, "full"),
+        }, format="json")
+
+        self.assertEqual(PokemonUsuario.objects.get().imagemUrl, origem)
+        self.assertEqual(criado.json()["imagemUrl"], sprites.proxy_url(origem))
+        self.assertEqual(sprites.proxy_url(sprites.proxy_url(origem), "thumb"), sprites.proxy_url(origem, "thumb"))
+        self.assertEqual(sprites.unwrap("https://example.com/api/sprites/card/x/1.png"),
+                         "https://example.com/api/sprites/card/x/1.png")
+
+    def test_sem_base_url_o_proxy_usa_caminho_relativo_a_raiz(self):
+        origem = f"{self.stub.base_url}/sprites/official-artwork/3.png"
+        with override_settings(SPRITES_BASE_URL=""):
+            url = sprites.proxy_url(origem)
+            self.assertEqual(url, f"/api/sprites/card/{urlsplit(origem).netloc}/api/v2/sprites/official-artwork/3.png")
+            self.assertEqual(sprites.unwrap(url), origem)
+        with override_settings(SPRITES_PROXY=False):
+            self.assertEqual(sprites.proxy_url(origem), origem)
+
+    async def test_arquivo_despejado_antes_do_open_e_gerado_de_novo(self):
+        url = sprites.proxy_url(f"{self.stub.base_url}/sprites/official-artwork/2.png")
+        await self.ler_imagem(url)
+        original = sprites.cached
+        despejado = iter([Path(settings.SPRITES_CACHE_DIR, "despejado.webp")])
+
+        def cached(source, variant):
+            return next(despejado, None) or original(source, variant)
+
+        with mock.patch.object(sprites, "cached", cached):
+            response, corpo = await self.ler_imagem(url)
+
+        self.assertEqual(response.status_code, 200)
+        with Image.open(io.BytesIO(corpo)) as imagem:
+            self.assertEqual(imagem.format, "WEBP")
+
+    def test_lru_despeja_os_arquivos_menos_usados(self):
+        fontes = [f"{self.stub.base_url}/sprites/official-artwork/{i}.png" for i in range(1, 9)]
+        limite = sum(len(sprite_png(i)) for i in range(1, 5))
+
+        with override_settings(SPRITES_CACHE_MAX_BYTES=limite):
+            for fonte in fontes:
+                sprites.render(fonte, sprites.ORIGINAL)
+
+        restantes = list(sprites.cache_files())
+        self.assertLessEqual(sum(path.stat().st_size for path in restantes), limite)
+        self.assertIsNone(sprites.cached(fontes[0], sprites.ORIGINAL))
+        self.assertIsNotNone(sprites.cached(fontes[-1], sprites.ORIGINAL))
+
+
+class GravacaoPokeAPITests(StubPokeAPITestCase):
+    def setUp(self):
+        super().setUp()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.diretorio = diretorio.name
+
+    def test_stub_reproduz_as_respostas_gravadas(self):
+        call_command("record_pokeapi", output=self.diretorio, base_url=self.stub.base_url, pokemon=25,
+                     stdout=StringIO())
+
+        with StubPokeAPI(fixtures=self.diretorio) as reproducao, \
+                override_settings(POKEAPI_BASE_URL=reproducao.base_url):
+            pokeapi.clear_cache()
+            pagina = self.client.get("/api/pokemon/", {"limit": 20}).json()
+            por_nome = self.client.get("/api/pokemon/search-name/", {"name": "pokemon-7"})
+            nao_gravado = self.client.get("/api/pokemon/40/")
+            warmup.wait_pending()
+
+        self.assertEqual([p["nome"] for p in pagina["results"]], [f"pokemon-{i}" for i in range(1, 21)])
+        self.assertTrue(pagina["results"][0]["imagemUrl"].endswith(
+            f"/{urlsplit(reproducao.base_url).netloc}/api/v2/sprites/official-artwork/1.png"
+        ))
+        self.assertEqual(por_nome.json()["id"], 7)
+        self.assertEqual(nao_gravado.status_code, 404)
+
+    def test_benchmark_salva_e_compara_rodadas(self):
+        opcoes = {
+            "requests": 4, "concurrency": 2, "keys": 3, "latency": 0.0, "output": self.diretorio,
+            "scenarios": "retrieve,usuario-create,usuario-update,usuario-destroy",
+        }
+        call_command("benchmark_suite", stdout=StringIO(), **opcoes)
+        saida = StringIO()
+        call_command("benchmark_suite", stdout=saida, compare="latest", threshold=100, **opcoes)
+
+        rodadas = sorted(Path(self.diretorio).glob("*.json"))
+        resultados = json.loads(rodadas[-1].read_text())["results"]
+        self.assertEqual(list(resultados), ["retrieve", "usuario-create", "usuario-update", "usuario-destroy"])
+        self.assertTrue(all(r["errors"] == 0 for r in resultados.values()))
+        self.assertEqual(resultados["usuario-create"]["upstream"], 0)
+        self.assertGreater(resultados["usuario-create"]["queries"], 0)
+        self.assertIn("Comparado com", saida.getvalue())
+        self.assertFalse(Usuario.objects.filter(login="benchmark-suite").exists())
+
+    def test_benchmark_de_latencia_roda_contra_o_stub(self):
+        # O comando sobe o próprio StubPokeAPI.
+        logger = logging.getLogger("django.request")
+        nivel = logger.level
+        saida = StringIO()
+
+        call_command("benchmark", limits="5", iterations=1, latency=0.0, max_inflight="4", concurrency=4, stdout=saida)
+
+        linhas = saida.getvalue().splitlines()
+        self.assertTrue(linhas[0].startswith("upstream stub: http://127.0.0.1:"))
+        self.assertIn("4 retrieves simultâneos", saida.getvalue())
+        self.assertTrue(any(linha.startswith("/api/pokemon/types/") for linha in linhas))
+        self.assertIn("retrieve com cache quente", linhas[-1])
+        self.assertEqual(logger.level, nivel)
+
+
+@skipUnless(connection.vendor == "sqlite", "pragmas e plano de execução do SQLite")
+class BancoSQLiteTests(TestCase):
+    def test_conexao_usa_wal(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_busca_por_nome_usa_o_indice_composto(self):
+        # Os filtros booleanos viram "WHERE coluna" no SQLite, que não casa com o índice;
+        # no PostgreSQL (idUsuario, grupoBatalha) e (idUsuario, favorito) são usados.
+        usuario = criar_usuario("ash")
+        plano = PokemonUsuario.objects.filter(idUsuario=usuario, nome="pikachu").explain()
+        self.assertIn("pokemonusuario_nome_idx (idUsuario_id=? AND nome=?)", plano)
+
+
+class AutenticacaoCacheTests(TestCase):
+    def setUp(self):
+        self.usuario = criar_usuario("ash")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.usuario)}")
+
+    def test_segunda_requisicao_nao_busca_o_usuario_nem_decodifica_o_token(self):
+        with mock.patch.object(
+            JWTAuthentication, "get_validated_token", autospec=True, side_effect=JWTAuthentication.get_validated_token,
+        ) as validar:
+            with self.assertNumQueries(2):
+                self.client.get("/api/pokemon-usuario/")
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/pokemon-usuario/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(validar.call_count, 1)
+
+    def test_salvar_o_usuario_invalida_o_cache(self):
+        self.assertEqual(self.client.get("/api/pokemon-usuario/").status_code, 200)
+
+        self.usuario.is_active = False
+        self.usuario.save()
+
+        self.assertEqual(self.client.get("/api/pokemon-usuario/").status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_ttl_zero_desliga_o_cache(self):
+        self.client.get("/api/pokemon-usuario/")
+        with self.assertNumQueries(2):
+            self.client.get("/api/pokemon-usuario/")
+
+
+class ArquivosEstaticosTests(TestCase):
+    def test_whitenoise_serve_os_arquivos_com_hash_e_comprimidos(self):
+        with tempfile.TemporaryDirectory() as origem, tempfile.TemporaryDirectory() as static_root:
+            Path(origem, "app.css").write_text("body { color: red; }\n" * 100)
+            # Só o diretório do teste: comprimir os estáticos do admin e do DRF leva segundos.
+            with override_settings(
+                STATIC_ROOT=static_root, STATICFILES_DIRS=[origem],
+                STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            ):
+                call_command("collectstatic", interactive=False, verbosity=0)
+                url = staticfiles_storage.url("app.css")
+                response = Client().get(url, headers={"Accept-Encoding": "br, gzip"})
+
+        self.assertRegex(url, r"app\.[0-9a-f]{12}\.css$")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertIn("immutable", response["Cache-Control"])
@@ -0,0 +1,172 @@
+import threading
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import pokeapi, resumo
+from .models import PokemonTipo, PokemonUsuario, TarefaTipos, TipoPokemon, TiposPokemonNome
+
+
+class CacheTipos:
+    """Cache em processo nome do pokémon -> ids de TipoPokemon, com despejo LRU."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, nome):
+        with self._lock:
+            ids = self._entries.get(nome)
+            if ids is not None:
+                self._entries.move_to_end(nome)
+            return ids
+
+    def set(self, nome, ids):
+        with self._lock:
+            self._entries[nome] = ids
+            self._entries.move_to_end(nome)
+            while len(self._entries) > settings.TIPOS_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+cache = CacheTipos()
+
+
+def normalizar(nome):
+    return nome.strip().lower()
+
+
+def obter_tipos(descricoes):
+    """Resolve (criando se preciso) os TipoPokemon pelo nome com duas queries."""
+    if not descricoes:
+        return {}
+    TipoPokemon.objects.bulk_create(
+        [TipoPokemon(descricao=descricao) for descricao in descricoes],
+        ignore_conflicts=True,
+    )
+    return {t.descricao: t for t in TipoPokemon.objects.filter(descricao__in=descricoes)}
+
+
+def resolver_varios(nomes):
+    """
+    Devolve ``{nome: [ids de TipoPokemon]}`` sem consultar a PokeAPI.
+
+    Procura no cache em processo, depois na tabela TiposPokemonNome e por fim no
+    catálogo local; nomes desconhecidos ficam com ``None``.
+    """
+    resultado = {}
+    faltantes = set()
+    for nome in map(normalizar, nomes):
+        ids = cache.get(nome)
+        if ids is None:
+            faltantes.add(nome)
+        resultado[nome] = ids
+
+    if not faltantes:
+        return resultado
+
+    descricoes = dict(TiposPokemonNome.objects.filter(nome__in=faltantes).values_list("nome", "tipos"))
+    for nome, id_tipo in (
+        PokemonTipo.objects.filter(pokemon__nome__in=faltantes - set(descricoes))
+        .order_by("pokemon_id", "slot").values_list("pokemon__nome", "tipo_id")
+    ):
+        resultado[nome] = (resultado[nome] or []) + [id_tipo]
+
+    tipos = obter_tipos({d for lista in descricoes.values() for d in lista})
+    for nome, lista in descricoes.items():
+        resultado[nome] = [tipos[d].pk for d in lista]
+
+    for nome in faltantes:
+        if resultado[nome] is not None:
+            cache.set(nome, resultado[nome])
+    return resultado
+
+
+def resolver(nome):
+    return resolver_varios([nome])[normalizar(nome)]
+
+
+def vincular(pokemons, tipos_ids):
+    """
+    Grava os vínculos PokemonUsuario x TipoPokemon com um único INSERT e soma no
+    resumo por tipo. ``pokemons``: pares (id do PokemonUsuario, id do Usuario) de
+    pokémons ainda sem tipos.
+    """
+    Through = PokemonUsuario.tipos.through
+    Through.objects.bulk_create(
+        [Through(pokemonusuario_id=p, tipopokemon_id=t) for p, _ in pokemons for t in tipos_ids],
+        ignore_conflicts=True,
+    )
+    resumo.somar_tipos(Counter((usuario_id, t) for _, usuario_id in pokemons for t in tipos_ids))
+
+
+def enfileirar(nomes):
+    nomes = {normalizar(nome) for nome in nomes}
+    if not nomes:
+        return
+    TarefaTipos.objects.bulk_create([TarefaTipos(nome=nome) for nome in nomes], ignore_conflicts=True)
+    # Uma tarefa que esgotou as tentativas volta para a fila: o upstream pode ter voltado,
+    # e sem isso nenhum pokémon novo com esse nome ganharia tipos.
+    TarefaTipos.objects.filter(nome__in=nomes, status=TarefaTipos.ERRO).update(
+        status=TarefaTipos.PENDENTE, tentativas=0, erro="", dtAlteracao=timezone.now()
+    )
+
+
+def reservar_tarefas(limite):
+    expiradas = timezone.now() - timedelta(seconds=settings.TIPOS_TAREFA_TIMEOUT)
+    with transaction.atomic():
+        tarefas = list(
+            TarefaTipos.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=TarefaTipos.PENDENTE) | Q(status=TarefaTipos.PROCESSANDO, dtAlteracao__lt=expiradas))
+            .order_by("dtAlteracao")[:limite]
+        )
+        TarefaTipos.objects.filter(pk__in=[t.pk for t in tarefas]).update(
+            status=TarefaTipos.PROCESSANDO, dtAlteracao=timezone.now()
+        )
+    return tarefas
+
+
+def processar_pendentes(limite=50):
+    """Resolve na PokeAPI os tipos das tarefas pendentes; devolve quantas foram tratadas."""
+    tarefas = reservar_tarefas(limite)
+    if not tarefas:
+        return 0
+
+    detalhes = fetch_tipos([t.nome for t in tarefas])
+    for tarefa, (descricoes, erro) in zip(tarefas, detalhes):
+        with transaction.atomic():
+            if descricoes is None:
+                tarefa.tentativas += 1
+                tarefa.erro = erro
+                tarefa.status = (
+                    TarefaTipos.ERRO if tarefa.tentativas >= settings.TIPOS_TAREFA_MAX_TENTATIVAS
+                    else TarefaTipos.PENDENTE
+                )
+                tarefa.save(update_fields=["tentativas", "erro", "status", "dtAlteracao"])
+                continue
+
+            TiposPokemonNome.objects.update_or_create(nome=tarefa.nome, defaults={"tipos": descricoes})
+            tipos = obter_tipos(descricoes)
+            pendentes = PokemonUsuario.objects.filter(nome__iexact=tarefa.nome, tipos__isnull=True)
+            vincular(list(pendentes.values_list("pk", "idUsuario_id")), [tipos[d].pk for d in descricoes])
+            tarefa.delete()
+
+    return len(tarefas)
+
+
+def fetch_tipos(nomes):
+    resultados = []
+    for nome, data in zip(nomes, pokeapi.fetch_many(f"pokemon/{nome}" for nome in nomes)):
+        if data is None:
+            resultados.append((None, "Pokémon não encontrado ou erro na API externa"))
+        else:
+            resultados.append(([t["type"]["name"] for t in data["types"]], ""))
+    return resultados
@@ -1,64 +1,111 @@
 # poke/views.py
+import asyncio
+import re
+from collections import Counter
+
 from rest_framework import viewsets
 from rest_framework.response import Response
-import requests
-from .models import PokemonUsuario, TipoPokemon, Usuario
-from .serializers import UsuarioSerializer, TipoPokemonSerializer, PokemonUsuarioSerializer
+import httpx
+from adrf.viewsets import ViewSet as AsyncViewSet
+from asgiref.sync import sync_to_async
+from .models import LIMITE_EQUIPE_BATALHA, PokemonUsuario, TipoPokemon, Usuario
+from .serializers import UsuarioSerializer, TipoPokemonSerializer, PokemonUsuarioSerializer, campos_solicitados
 from rest_framework import permissions
 from rest_framework.decorators import action
 from rest_framework import status
-from core.environ import env
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control
+from rest_framework.utils.urls import replace_query_param
+from . import catalog, export, filter_index, pokeapi, resumo, search, tipos, warmup
+from .http_cache import conditional
 
-POKEAPI_BASE_URL = env("POKEAPI_BASE_URL")
+FILTER_MAX_LIMIT = 2000
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+TRUE_VALUES = [True, 'true', 'True', 1, '1']
+POKEMON_KEY = re.compile(r"^[a-z0-9-]+$")
+
+
+def upstream_error_status(error):
+    # ValueError: corpo do upstream que não é JSON válido (orjson.JSONDecodeError).
+    if isinstance(error, ValueError):
+        return status.HTTP_502_BAD_GATEWAY
+    response = getattr(error, "response", None)
+    if response is not None and response.status_code == 404:
+        return status.HTTP_404_NOT_FOUND
+    if pokeapi.is_transient(error):
+        return status.HTTP_503_SERVICE_UNAVAILABLE
+    return status.HTTP_400_BAD_REQUEST
+
+
+def parse_ids(value):
+    # "0" é o "Todas" do frontend: não filtra nada.
+    if not value:
+        return []
+    return [int(v) for v in value.split(",") if v.strip() and int(v) != 0]
+
+def parse_keys(value):
+    # "1, 025,Pikachu,pikachu" -> ["1", "25", "pikachu"]: a ordem pedida, sem repetidos.
+    keys = (key.strip().lower() for key in value.split(","))
+    return list(dict.fromkeys(str(int(key)) if catalog.is_id(key) else key for key in keys if key))
+
+class PokemonAPIViewSet(AsyncViewSet):
+    # O adrf recalcula isso inspecionando todos os métodos a cada requisição.
+    view_is_async = True
+
+    async def async_dispatch(self, request, *args, **kwargs):
+        with pokeapi.track_stale() as stale:
+            response = await super().async_dispatch(request, *args, **kwargs)
+
+        # Upstream fora e resposta montada com cache vencido: avisa o cliente e
+        # impede que CDNs/navegadores guardem essa versão como se fosse nova.
+        if stale:
+            response["Warning"] = '110 - "Response is Stale"'
+            response["X-Stale-Age"] = str(int(max(stale)))
+            patch_cache_control(response, max_age=0)
+        return response
+
+    @conditional("retrieve", resource="pokemon")
+    async def retrieve(self, request, pk=None):
+        if settings.POKEAPI_LOCAL_CATALOG:
+            pokemon_data = await sync_to_async(catalog.retrieve)(pk)
+            if pokemon_data is None:
+                return Response({"error": "Pokémon não encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(pokemon_data)
 
-class PokemonAPIViewSet(viewsets.ViewSet):
-    
-    def retrieve(self, request, pk=None):
         try:
-            response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pk.lower()}")
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
+            data = await pokeapi.aget(f"pokemon/{pk.lower()}")
+        except (httpx.HTTPError, ValueError) as e:
             return Response({"error": f"Pokémon não encontrado ou erro na API externa: {str(e)}"}, 
-                            status=status.HTTP_404_NOT_FOUND if response.status_code == 404 else status.HTTP_400_BAD_REQUEST)
-
-        pokemon_data = {
-            "nome": data["name"],
-            "id": data["id"],
-            "tipos": [t["type"]["name"] for t in data["types"]],
-            "imagemUrl": data["sprites"]["other"]["official-artwork"]["front_default"] if data["sprites"]["other"].get("official-artwork") else data["sprites"]["front_default"], # Adicionado campo imagemUrl
-        }
-        
+                            status=upstream_error_status(e))
+
+        pokemon_data = catalog.PokemonResumo.from_upstream(data, variant="full")
         return Response(pokemon_data)
 
-    def list(self, request):
+    @conditional("list", resource="pokemon")
+    async def list(self, request):
         offset = request.query_params.get('offset', 0)
         limit = request.query_params.get('limit', 20)
+
+        if settings.POKEAPI_LOCAL_CATALOG:
+            return await self.local_list(request, offset, limit)
         
         try:
-            response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/?offset={offset}&limit={limit}")
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-        detailed_results = []
-        for result in data.get("results", []):
-            try:
-                pk_id = result["url"].rstrip("/").split("/")[-1]
-                detail_response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pk_id}")
-                detail_response.raise_for_status()
-                detail_data = detail_response.json()
-                
-                detailed_results.append({
-                    "id": detail_data["id"],
-                    "nome": detail_data["name"],
-                    "tipos": [t["type"]["name"] for t in detail_data["types"]],
-                    "imagemUrl": detail_data["sprites"]["other"]["official-artwork"]["front_default"] if detail_data["sprites"]["other"].get("official-artwork") else detail_data["sprites"]["front_default"],
-                })
-            except requests.exceptions.RequestException:
-                continue
-        
+            data = await pokeapi.aget(warmup.list_path(offset, limit))
+        except (httpx.HTTPError, ValueError) as e:
+            return Response({"error": str(e)}, status=upstream_error_status(e))
+
+        # Quem abriu a página N quase sempre pede a N+1 em seguida.
+        if data.get("next"):
+            warmup.prefetch(data["next"])
+
+        detailed_results = [
+            catalog.PokemonResumo.from_upstream(detail_data)
+            for detail_data in await pokeapi.afetch_many(warmup.detail_paths(data))
+            if detail_data is not None
+        ]
+
         return Response({
             "count": data.get("count"),
             "next": data.get("next"),
@@ -66,14 +113,70 @@ class PokemonAPIViewSet(viewsets.ViewSet):
             "results": detailed_results
         })
     
+    async def local_list(self, request, offset, limit):
+        try:
+            offset, limit = max(int(offset), 0), max(int(limit), 0)
+        except ValueError:
+            return Response({"error": "Parâmetros 'offset' e 'limit' devem ser numéricos"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        count, results = await sync_to_async(catalog.list_page)(offset, limit)
+        url = request.build_absolute_uri()
+        return Response({
+            "count": count,
+            "next": replace_query_param(url, "offset", offset + limit) if offset + limit < count else None,
+            "previous": replace_query_param(url, "offset", max(offset - limit, 0)) if offset > 0 else None,
+            "results": results
+        })
+
+    @action(detail=False, methods=["get"], url_path="batch")
+    async def batch(self, request):
+        keys = parse_keys(request.query_params.get('ids', ''))
+        if not keys:
+            return Response({"error": "Parâmetro 'ids' é obrigatório (ids ou nomes separados por vírgula)"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(keys) > settings.POKEAPI_BATCH_MAX:
+            return Response({"error": f"Máximo de {settings.POKEAPI_BATCH_MAX} pokémons por requisição"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.POKEAPI_LOCAL_CATALOG:
+            found = await sync_to_async(catalog.retrieve_many)(keys)
+            results = [
+                {"key": key, "status": 200, "pokemon": found[key]} if key in found
+                else {"key": key, "status": 404, "error": "Pokémon não encontrado"}
+                for key in keys
+            ]
+        else:
+            slots = asyncio.Semaphore(settings.POKEAPI_MAX_INFLIGHT)
+            results = await asyncio.gather(*(self.batch_item(key, slots) for key in keys))
+
+        return Response({"count": len(results), "results": results})
+
+    async def batch_item(self, key, slots):
+        """Um item do ``batch``: o que está em memória volta na hora; o resto divide ``slots`` buscas."""
+        if not POKEMON_KEY.match(key):
+            return {"key": key, "status": status.HTTP_400_BAD_REQUEST, "error": "Id ou nome inválido"}
+        path = f"pokemon/{key}"
+        data = pokeapi.peek(path)
+        if data is None:
+            async with slots:
+                try:
+                    data = await pokeapi.aget(path)
+                except (httpx.HTTPError, ValueError) as e:
+                    return {"key": key, "status": upstream_error_status(e),
+                            "error": f"Pokémon não encontrado ou erro na API externa: {str(e)}"}
+        return {"key": key, "status": 200, "pokemon": catalog.PokemonResumo.from_upstream(data)}
+
     @action(detail=False, methods=["get"], url_path="types")
-    def tipos(self, request):
+    @conditional("types", resource="type")
+    async def tipos(self, request):
+        if settings.POKEAPI_LOCAL_CATALOG:
+            return Response({"tipos": await sync_to_async(catalog.tipos)()})
+
         try:
-            response = requests.get(f"{POKEAPI_BASE_URL}/type/")
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            data = await pokeapi.aget(warmup.TYPES_PATH)
+        except (httpx.HTTPError, ValueError) as e:
+            return Response({"error": str(e)}, status=upstream_error_status(e))
 
         tipos = [
             {
@@ -86,49 +189,88 @@ class PokemonAPIViewSet(viewsets.ViewSet):
 
 
     @action(detail=False, methods=["get"], url_path="search-name")
-    def search_name(self, request):
+    async def search_name(self, request):
         name = request.query_params.get('name', None)
         if not name:
             return Response({"error": "Parâmetro 'name' é obrigatório"}, 
                             status=status.HTTP_400_BAD_REQUEST)
 
-        return self.retrieve(request, pk=name)
+        return await self.retrieve(request, pk=name)
 
+    @action(detail=False, methods=["get"], url_path="search")
+    async def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Parâmetro 'q' é obrigatório"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT)), 0), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "Parâmetros 'offset' e 'limit' devem ser numéricos"},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=["get"], url_path="generations")
-    def generations(self, request):
         try:
-            response = requests.get(f"{POKEAPI_BASE_URL}/generation/?limit=10") 
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            index = await sync_to_async(search.get_index)()
+        except (httpx.HTTPError, ValueError) as e:
+            return Response({"error": f"Erro na requisição à API externa: {str(e)}"},
+                            status=upstream_error_status(e))
+
+        # A consulta leva microssegundos: roda direto no loop, sem passar por thread.
+        matches = index.search(query)
+        count = len(matches)
+        url = request.build_absolute_uri()
+        return Response({
+            "count": count,
+            "next": replace_query_param(url, "offset", offset + limit) if offset + limit < count else None,
+            "previous": replace_query_param(url, "offset", max(offset - limit, 0)) if offset > 0 else None,
+            "results": index.page(matches, offset, limit)
+        })
+
+
+    @action(detail=False, methods=["get"], url_path="generations")
+    @conditional("generations", resource="generation")
+    async def generations(self, request):
+        if settings.POKEAPI_LOCAL_CATALOG:
+            results = await sync_to_async(catalog.generations)()
+        else:
+            try:
+                data = await pokeapi.aget(warmup.GENERATIONS_PATH)
+            except (httpx.HTTPError, ValueError) as e:
+                return Response({"error": str(e)}, status=upstream_error_status(e))
+
+            results = [(int(g["url"].rstrip("/").split("/")[-1]), g["name"]) for g in data["results"]]
 
         generations = [
             {
-                "id": int(g["url"].rstrip("/").split("/")[-1]), 
-                "name": g["name"].replace("generation-", "Geração ")
+                "id": id_geracao, 
+                "name": nome.replace("generation-", "Geração ")
             }
-            for g in data["results"]
+            for id_geracao, nome in results
         ]
         
         return Response({"generations": generations})
 
 
     @action(detail=False, methods=["get"], url_path="filter-generation")
-    def filter_generation(self, request):
+    @conditional("generations", resource="generation")
+    async def filter_generation(self, request):
         gen_id = request.query_params.get('id', None)
-        if not gen_id or not gen_id.isdigit():
+        if not gen_id or not catalog.is_id(gen_id):
             return Response({"error": "Parâmetro 'id' (da geração) é obrigatório e deve ser numérico"}, 
                             status=status.HTTP_400_BAD_REQUEST)
 
+        if settings.POKEAPI_LOCAL_CATALOG:
+            pokemons = await sync_to_async(catalog.generation_species)(int(gen_id))
+            if pokemons is None:
+                return Response({"error": "Geração não encontrada"}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"results": pokemons})
+
         try:
-            response = requests.get(f"{POKEAPI_BASE_URL}/generation/{gen_id}/")
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
+            data = await pokeapi.aget(f"generation/{gen_id}/")
+        except (httpx.HTTPError, ValueError) as e:
              return Response({"error": f"Geração não encontrada ou erro na API externa: {str(e)}"}, 
-                             status=status.HTTP_404_NOT_FOUND if response.status_code == 404 else status.HTTP_400_BAD_REQUEST)
+                             status=upstream_error_status(e))
         
         pokemons = [
             {
@@ -140,51 +282,68 @@ class PokemonAPIViewSet(viewsets.ViewSet):
 
         return Response({"results": pokemons})
     
+    @action(detail=False, methods=["get"], url_path="export")
+    async def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in export.FORMATS:
+            return Response({"error": "Parâmetro 'output' aceita apenas 'ndjson' ou 'csv'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if settings.POKEAPI_LOCAL_CATALOG:
+            return export.stream(export.local_catalog(export.asynchronous(request)), output, "pokedex",
+                                 settings.EXPORT_CHUNK_SIZE)
+
+        # A primeira página sai antes da resposta: um upstream fora do ar ainda vira 503,
+        # não um corpo vazio com 200.
+        try:
+            page = await pokeapi.aget(warmup.list_path(0, settings.EXPORT_UPSTREAM_PAGE))
+        except (httpx.HTTPError, ValueError) as e:
+            return Response({"error": f"Erro na requisição à API externa: {str(e)}"},
+                            status=upstream_error_status(e))
+        return export.stream(export.upstream_catalog(page, export.asynchronous(request)), output, "pokedex",
+                             settings.EXPORT_UPSTREAM_PAGE)
+
+    # Chaves, taxas de acerto e o estado do disjuntor: só para administradores.
+    @action(detail=False, methods=["get"], url_path="cache-stats", permission_classes=[permissions.IsAdminUser])
+    async def cache_stats(self, request):
+        return Response(pokeapi.cache_stats())
+
     @action(detail=False, methods=["get"], url_path="filter-combined")
-    def filter_combined(self, request):
+    async def filter_combined(self, request):
+        try:
+            gen_ids = parse_ids(request.query_params.get('gen_id'))
+            type_ids = parse_ids(request.query_params.get('type_id'))
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            limit = min(max(int(request.query_params.get('limit', FILTER_MAX_LIMIT)), 0), FILTER_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "Parâmetros 'gen_id', 'type_id', 'offset' e 'limit' devem ser numéricos"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        type_op = request.query_params.get('type_op', 'or').lower()
+        op = request.query_params.get('op', 'and').lower()
+        if type_op not in ("and", "or") or op not in ("and", "or"):
+            return Response({"error": "Parâmetros 'type_op' e 'op' aceitam apenas 'and' ou 'or'"},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        gen_id = request.query_params.get('gen_id', None)
-        type_id = request.query_params.get('type_id', None)
-        
-        if gen_id == 0 or type_id == 0:
-            return
-        
         try:
-            gen_response = requests.get(f"{POKEAPI_BASE_URL}/generation/{gen_id}/")
-            gen_response.raise_for_status()
-            gen_data = gen_response.json()
-            
-            gen_pokemons_urls = {
-                p["name"]: p["url"] 
-                for p in gen_data.get("pokemon_species", [])
-            }
-            
-            type_response = requests.get(f"{POKEAPI_BASE_URL}/type/{type_id}/")
-            type_response.raise_for_status()
-            type_data = type_response.json()
-            
-            type_pokemons_names = {
-                p["pokemon"]["name"]
-                for p in type_data.get("pokemon", [])
-            }
-            
-            combined_pokemons = []
-            for name in type_pokemons_names:
-                if name in gen_pokemons_urls:
-                    url = gen_pokemons_urls[name]
-                    pk_id = int(url.rstrip("/").split("/")[-1]) 
-                    
-                    combined_pokemons.append({
-                        "id": pk_id, 
-                        "name": name, 
-                        "url": url
-                    })
-
-        except requests.exceptions.RequestException as e:
+            index = await sync_to_async(filter_index.get_index)()
+        except (httpx.HTTPError, ValueError) as e:
             return Response({"error": f"Erro na requisição à API externa: {str(e)}"}, 
-                            status=status.HTTP_400_BAD_REQUEST)
-            
-        return Response({"results": combined_pokemons})
+                            status=upstream_error_status(e))
+
+        if gen_ids or type_ids:
+            bits = index.query(type_ids=type_ids, gen_ids=gen_ids, type_op=type_op, op=op)
+        else:
+            bits = index.query(gen_ids=list(index.generations))
+
+        count = bits.bit_count()
+        url = request.build_absolute_uri()
+        return Response({
+            "count": count,
+            "next": replace_query_param(url, "offset", offset + limit) if offset + limit < count else None,
+            "previous": replace_query_param(url, "offset", max(offset - limit, 0)) if offset > 0 else None,
+            "results": index.page(bits, offset, limit)
+        })
 
 class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all()
@@ -206,67 +365,242 @@ class PokemonUsuarioViewSet(viewsets.ModelViewSet):
     queryset = PokemonUsuario.objects.all()
     serializer_class = PokemonUsuarioSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = PokemonUsuario.objects.filter(idUsuario=self.request.user)
+        params = self.request.query_params
+
+        if "codigo" in params:
+            queryset = queryset.filter(codigo=params["codigo"])
+        for campo in ("favorito", "grupoBatalha"):
+            if campo in params:
+                queryset = queryset.filter(**{campo: params[campo] in TRUE_VALUES})
+
+        if self.action in ("update", "partial_update", "destroy"):
+            queryset = queryset.select_for_update(of=("self",))
+
+        campos = campos_solicitados(self.request)
+        if campos is None or "idUsuario" in campos:
+            queryset = queryset.select_related("idUsuario")
+        if campos is None or "tipos" in campos:
+            queryset = queryset.prefetch_related("tipos")
+        return queryset
     
-    def checkEquipeBatalhaLimit(self, user, grupo_batalha):
-        if grupo_batalha in [True, 'true', 'True', 1, '1']:
-            equipe_count = user.pokemons.filter(grupoBatalha=True).count()
-            if equipe_count >= 6:
-                return Response(
-                    {"erro": "Só é permitido 6 pokémons na equipe de batalha"},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+    def checkEquipeBatalhaLimit(self, user, variacao):
+        # Reserva (ou devolve) vagas com uma única UPDATE condicional: o banco serializa
+        # as escritas na linha do usuário, então duas requisições simultâneas nunca
+        # passam juntas pela checagem. Deve rodar dentro da transação da escrita.
+        # As devoluções param em zero (resumo.variar), mesmo com o contador atrasado.
+        if variacao == 0:
+            return None
+
+        usuario = Usuario.objects.filter(pk=user.pk)
+        if variacao > 0:
+            usuario = usuario.filter(qtdEquipeBatalha__lte=LIMITE_EQUIPE_BATALHA - variacao)
+
+        if usuario.update(qtdEquipeBatalha=resumo.variar("qtdEquipeBatalha", variacao)) == 0:
+            return Response(
+                {"erro": f"Só é permitido {LIMITE_EQUIPE_BATALHA} pokémons na equipe de batalha"},
+                status=status.HTTP_403_FORBIDDEN
+            )
         return None
 
     def create(self, request, *args, **kwargs):
-        resp = self.checkEquipeBatalhaLimit(request.user, request.data.get('grupoBatalha', False))
-        
-        if resp:
-            return resp
-        
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         nomePokemon = serializer.validated_data.get("nome")
-        response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{nomePokemon}")
-        response.raise_for_status()
-        data = response.json().get("types")
-        
-        tipos = []
-        
-        for element in data:
-            type_name = element.get("type").get("name")
-            pokemon = TipoPokemon.objects.filter(descricao = type_name)
-            
-            if not pokemon.exists():
-                pokemon = TipoPokemon.objects.create(descricao = type_name)
+        tiposIds = tipos.resolver(nomePokemon)
+
+        with transaction.atomic():
+            resp = self.checkEquipeBatalhaLimit(request.user, int(serializer.validated_data.get('grupoBatalha', False)))
+
+            if resp:
+                return resp
+
+            pokemon = self.perform_create(serializer)
+            resumo.somar(request.user.pk, pokemons=1, favoritos=int(pokemon.favorito))
+
+            # Nome ainda desconhecido localmente: o worker (processar_tipos) busca os
+            # tipos na PokeAPI depois, sem segurar esta requisição.
+            if tiposIds is None:
+                tipos.enfileirar([nomePokemon])
             else:
-                pokemon = pokemon.first()
-            
-            tipos.append(pokemon)    
-        
-        pokemon = self.perform_create(serializer)
-        pokemon.tipos.set(tipos)
-        
-        pokemon.save()
+                tipos.vincular([(pokemon.pk, request.user.pk)], tiposIds)
+
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
-        instance = self.get_object()
-        novoGrupoBatalha = request.data.get('grupoBatalha')
-        
-        estaTentandoPromoverParaEquipe = (
-            (novoGrupoBatalha in [True, 'true', 'True', 1, '1']) and 
-            (instance.grupoBatalha == False) 
-        )
+        partial = kwargs.pop('partial', False)
+
+        with transaction.atomic():
+            instance = self.get_object()
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+
+            novoGrupoBatalha = serializer.validated_data.get('grupoBatalha', instance.grupoBatalha)
+            resp = self.checkEquipeBatalhaLimit(request.user, int(novoGrupoBatalha) - int(instance.grupoBatalha))
 
-        if estaTentandoPromoverParaEquipe:
-            resp = self.checkEquipeBatalhaLimit(request.user, novoGrupoBatalha)
-            
             if resp:
                 return resp
-            
-        return super().update(request, *args, **kwargs)
+
+            eraFavorito = instance.favorito
+            self.perform_update(serializer)
+            resumo.somar(request.user.pk, favoritos=int(instance.favorito) - int(eraFavorito))
+
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
+
+        return Response(serializer.data)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            instance = self.get_object()
+            self.checkEquipeBatalhaLimit(request.user, -int(instance.grupoBatalha))
+            resumo.remover([instance])
+            self.perform_destroy(instance)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_create(self, serializer):
-       return serializer.save(idUsuario=self.request.user)
\ No newline at end of file
+       return serializer.save(idUsuario=self.request.user)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in export.FORMATS:
+            return Response({"erro": "Parâmetro 'output' aceita apenas 'ndjson' ou 'csv'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.get_queryset().order_by("idPokemonUsuario")
+        serializer = self.get_serializer()
+        return export.stream(export.user_collection(queryset, serializer, export.asynchronous(request)),
+                             output, "pokemons", settings.EXPORT_CHUNK_SIZE)
+
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        # Contadores mantidos a cada escrita: o custo não cresce com a coleção.
+        return Response(resumo.resumo(request.user.pk))
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        criar = request.data.get("create", [])
+        atualizar = request.data.get("update", [])
+        remover = request.data.get("delete", [])
+
+        if (
+            not all(isinstance(v, list) for v in (criar, atualizar, remover))
+            or not all(isinstance(i, dict) and isinstance(i.get("idPokemonUsuario"), int) for i in atualizar)
+            or not all(isinstance(pk, int) for pk in remover)
+        ):
+            return Response({"erro": "'create', 'update' e 'delete' devem ser listas; 'update' de objetos "
+                                     "com 'idPokemonUsuario' e 'delete' de ids"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(criar) + len(atualizar) + len(remover) > settings.POKEMON_USUARIO_BULK_MAX:
+            return Response({"erro": f"Máximo de {settings.POKEMON_USUARIO_BULK_MAX} itens por lote"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        resultado = {"create": [], "update": [], "delete": []}
+
+        validos = []
+        for index, item in enumerate(criar):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                validos.append((index, serializer.validated_data))
+            else:
+                resultado["create"].append({"index": index, "status": 400, "erros": serializer.errors})
+
+        tipos_por_item = tipos.resolver_varios(dados["nome"] for _, dados in validos)
+
+        with transaction.atomic():
+            existentes = {
+                p.pk: p for p in PokemonUsuario.objects.select_for_update().filter(
+                    idUsuario=request.user,
+                    pk__in=[i["idPokemonUsuario"] for i in atualizar] + remover,
+                )
+            }
+
+            # Um id repetido seria contado duas vezes no saldo da equipe e no resumo.
+            repetido = {"idPokemonUsuario": ["Repetido no lote."]}
+            alterados, campos_alterados, vistos = [], set(), set()
+            for index, item in enumerate(atualizar):
+                if item["idPokemonUsuario"] in vistos:
+                    resultado["update"].append({"index": index, "status": 400, "erros": repetido})
+                    continue
+                vistos.add(item["idPokemonUsuario"])
+                instance = existentes.get(item["idPokemonUsuario"])
+                if instance is None:
+                    resultado["update"].append({"index": index, "status": 404})
+                    continue
+                serializer = self.get_serializer(instance, data=item, partial=True)
+                if not serializer.is_valid():
+                    resultado["update"].append({"index": index, "status": 400, "erros": serializer.errors})
+                    continue
+                alterados.append((index, instance, instance.grupoBatalha, instance.favorito))
+                for campo, valor in serializer.validated_data.items():
+                    setattr(instance, campo, valor)
+                    campos_alterados.add(campo)
+
+            removidos, vistos = [], set()
+            for index, pk in enumerate(remover):
+                if pk in vistos:
+                    resultado["delete"].append({"index": index, "status": 400, "erros": repetido})
+                    continue
+                vistos.add(pk)
+                if pk in existentes:
+                    removidos.append(pk)
+                resultado["delete"].append({"index": index, "status": 204 if pk in existentes else 404})
+
+            # Regra das 6 vagas, avaliada uma vez para o saldo do lote inteiro.
+            variacao = sum(1 for _, dados in validos if dados.get("grupoBatalha"))
+            variacao += sum(
+                int(instance.grupoBatalha) - int(estavaNaEquipe)
+                for _, instance, estavaNaEquipe, _ in alterados
+            )
+            variacao -= sum(1 for pk in removidos if existentes[pk].grupoBatalha)
+            resp = self.checkEquipeBatalhaLimit(request.user, variacao)
+            if resp:
+                return resp
+
+            pokemons = PokemonUsuario.objects.bulk_create([
+                PokemonUsuario(idUsuario=request.user, **dados) for _, dados in validos
+            ])
+            Through = PokemonUsuario.tipos.through
+            vinculos = Through.objects.bulk_create([
+                Through(pokemonusuario_id=pokemon.pk, tipopokemon_id=id_tipo)
+                for (_, dados), pokemon in zip(validos, pokemons)
+                for id_tipo in tipos_por_item[tipos.normalizar(dados["nome"])] or []
+            ])
+            tipos.enfileirar(
+                dados["nome"] for _, dados in validos
+                if tipos_por_item[tipos.normalizar(dados["nome"])] is None
+            )
+            if alterados and campos_alterados:
+                PokemonUsuario.objects.bulk_update([instance for _, instance, _, _ in alterados], list(campos_alterados))
+
+            # Resumo da coleção: o saldo do lote em uma UPDATE, mais as do resumo por tipo.
+            resumo.somar(
+                request.user.pk,
+                pokemons=len(pokemons),
+                favoritos=sum(int(p.favorito) for p in pokemons) + sum(
+                    int(instance.favorito) - int(eraFavorito) for _, instance, _, eraFavorito in alterados
+                ),
+            )
+            resumo.somar_tipos(Counter((request.user.pk, v.tipopokemon_id) for v in vinculos))
+            if removidos:
+                resumo.remover(existentes[pk] for pk in removidos)
+                PokemonUsuario.objects.filter(pk__in=removidos).delete()
+
+        resultado["create"].extend(
+            {"index": index, "status": 201, "idPokemonUsuario": pokemon.pk}
+            for (index, _), pokemon in zip(validos, pokemons)
+        )
+        resultado["update"].extend(
+            {"index": index, "status": 200, "idPokemonUsuario": instance.pk}
+            for index, instance, _, _ in alterados
+        )
+        for chave in resultado:
+            resultado[chave].sort(key=lambda r: r["index"])
+        return Response(resultado)
+
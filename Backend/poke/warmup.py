@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import httpx
+from django.conf import settings
+
+from . import filter_index, pokeapi
+from .catalog import id_from_url
+
+logger = logging.getLogger(__name__)
+
+TYPES_PATH = "type/"
+GENERATIONS_PATH = "generation/?limit=10"
+
+_executor = None
+_pending = {}
+_lock = threading.Lock()
+
+
+def list_path(offset, limit):
+    return f"pokemon/?offset={offset}&limit={limit}"
+
+
+def detail_paths(page):
+    """Detalhes de cada pokémon de uma página do ``list``."""
+    return [f"pokemon/{id_from_url(result['url'])}" for result in page.get("results", [])]
+
+
+def is_list_page(key):
+    return key.startswith("pokemon/?")
+
+
+def default_paths(limits=None, pages=None):
+    """
+    O que o frontend sempre abre: tipos, gerações, cada geração e as primeiras páginas
+    do list (``limits`` e ``pages``; padrão POKEAPI_WARM_LIMITS e POKEAPI_WARM_PAGES).
+    """
+    limits = settings.POKEAPI_WARM_LIMITS if limits is None else limits
+    pages = settings.POKEAPI_WARM_PAGES if pages is None else pages
+    paths = [TYPES_PATH, GENERATIONS_PATH]
+    try:
+        generations = pokeapi.get(GENERATIONS_PATH)
+    except (httpx.HTTPError, ValueError) as e:
+        # Sem a lista, as gerações ficam para a próxima rodada; o resto do plano segue.
+        logger.warning("Warm-up sem as gerações: %s", e)
+    else:
+        paths.extend(f"generation/{id_from_url(g['url'])}/" for g in generations["results"])
+    for limit in limits:
+        paths.extend(list_path(page * limit, limit) for page in range(pages))
+    return paths
+
+
+def plan(max_keys=None, limits=None, pages=None):
+    """Chaves a aquecer: as mais acessadas primeiro, depois as padrão que faltarem."""
+    keys = [key for key, _ in pokeapi.hits.most_common()]
+    seen = set(keys)
+    for path in default_paths(limits, pages):
+        key = pokeapi.normalize_path(path)
+        if key not in seen:
+            seen.add(key)
+            keys.append(key)
+    return keys[:max_keys] if max_keys else keys
+
+
+def warm(path, refresh=False, max_inflight=None):
+    """Aquece ``path``; páginas do list levam junto os detalhes dos seus pokémons."""
+    data = pokeapi.get(path, refresh=refresh)
+    if is_list_page(pokeapi.normalize_path(path)):
+        pokeapi.fetch_many(detail_paths(data), max_inflight=max_inflight, refresh=refresh)
+    return data
+
+
+def warm_all(refresh=False, max_keys=None, max_inflight=None, limits=None, pages=None):
+    """
+    Aquece o plano inteiro e o índice do filter-combined; devolve ``(aquecidas, falhas)``.
+    Uma chave que falha é registrada no log e não interrompe as outras.
+    """
+    warmed = failed = 0
+    for key in plan(max_keys, limits, pages):
+        try:
+            warm(key, refresh=refresh, max_inflight=max_inflight)
+            warmed += 1
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Warm-up de %s falhou: %s", key, e)
+            failed += 1
+
+    try:
+        filter_index.get_index()
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("Warm-up do índice de filtros falhou: %s", e)
+        failed += 1
+    return warmed, failed
+
+
+def get_executor():
+    # Separado do pool do pokeapi: o warm usa fetch_many, que já ocupa aquele pool.
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pokeapi-warm")
+    return _executor
+
+
+def prefetch(path):
+    """Aquece ``path`` em segundo plano, uma vez por chave, se ainda não estiver em memória."""
+    key = pokeapi.normalize_path(path)
+    if pokeapi.memory_cache.get(key) is not None:
+        return None
+    executor = get_executor()
+    with _lock:
+        if key in _pending:
+            return None
+        future = _pending[key] = executor.submit(_prefetch, key)
+    return future
+
+
+def _prefetch(key):
+    try:
+        warm(key)
+    except (httpx.HTTPError, ValueError):
+        pass
+    finally:
+        with _lock:
+            _pending.pop(key, None)
+
+
+def wait_pending(timeout=None):
+    with _lock:
+        futures = list(_pending.values())
+    wait(futures, timeout=timeout)
+
+
+def start_scheduler(interval=None):
+    """Thread daemon que roda ``warm_all`` a cada ``interval`` segundos."""
+    interval = interval or settings.POKEAPI_WARM_INTERVAL
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                warm_all()
+            except Exception:
+                logger.exception("Falha no warm-up periódico do cache da PokeAPI")
+
+    thread = threading.Thread(target=loop, name="pokeapi-warm-scheduler", daemon=True)
+    thread.start()
+    return thread
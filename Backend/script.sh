@@ -6,4 +6,31 @@ set -o nounset
 
 python3 manage.py migrate --no-input
 python3 manage.py collectstatic --no-input
-python3 manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+
+# SERVER escolhe como a API é servida:
+#   gunicorn  (padrão) master com preload + workers; config em gunicorn.conf.py.
+#             Serve o core.wsgi com threads (gthread); GUNICORN_WORKER_CLASS com o
+#             worker do uvicorn serve o core.asgi (opcional, ver gunicorn.conf.py).
+#   uvicorn   um processo uvicorn com WEB_CONCURRENCY workers, sem preload.
+#   runserver servidor de desenvolvimento do Django, com autoreload.
+# O exec deixa o servidor como PID 1: o SIGTERM do docker chega direto nele e o
+# desligamento espera as requisições em andamento.
+case "${SERVER:-gunicorn}" in
+    gunicorn)
+        case "${GUNICORN_WORKER_CLASS:-gthread}" in
+            *Uvicorn*) exec python3 -m gunicorn core.asgi:application ;;
+            *) exec python3 -m gunicorn core.wsgi:application ;;
+        esac
+        ;;
+    uvicorn)
+        exec python3 -m uvicorn core.asgi:application --host 0.0.0.0 --port 8000 \
+            --workers "${WEB_CONCURRENCY:-1}" --timeout-graceful-shutdown "${GUNICORN_GRACEFUL_TIMEOUT:-30}"
+        ;;
+    runserver)
+        exec python3 manage.py runserver 0.0.0.0:8000
+        ;;
+    *)
+        echo "SERVER inválido: ${SERVER} (use gunicorn, uvicorn ou runserver)" >&2
+        exit 1
+        ;;
+esac
@@ -2,7 +2,9 @@ import { inject, Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
 import { catchError, map, Observable, of } from 'rxjs';
 import { AuthService } from './auth.service';
-import { Generation, Pokemon, Type, UserPokemonData, UserPokemonRecord } from '../types/types';
+import { Generation, Page, Pokemon, Type, UserPokemonData, UserPokemonRecord } from '../types/types';
+
+const USER_POKEMON_FIELDS = 'idPokemonUsuario,codigo,nome,imagemUrl,grupoBatalha,favorito';
 
 @Injectable({
   providedIn: 'root',
@@ -162,9 +164,12 @@ export class PokemonService {
     let params = new HttpParams()
       .set('idUsuario', userId.toString())
       .set(filter, 'true')
+      .set('fields', USER_POKEMON_FIELDS)
+      .set('page_size', '500')
       .set('timestamp', new Date().getTime().toString());
 
-    return this.http.get<UserPokemonRecord[]>(this.userPokemonUrl, { headers, params }).pipe(
+    return this.http.get<Page<UserPokemonRecord>>(this.userPokemonUrl, { headers, params }).pipe(
+      map((page) => page.results ?? []),
       catchError((error) => {
         console.error(`Erro ao buscar Pokémon de usuário com filtro ${filter}:`, error);
         return of([]);
@@ -174,10 +179,10 @@ export class PokemonService {
 
   getUserPokemonRecord(pokemonCodigo: string): Observable<UserPokemonRecord | null> {
     const headers = this.getAuthHeaders();
-    const params = new HttpParams().set('codigo', pokemonCodigo);
+    const params = new HttpParams().set('codigo', pokemonCodigo).set('fields', USER_POKEMON_FIELDS);
 
-    return this.http.get<UserPokemonRecord[]>(`${this.userPokemonUrl}`, { headers, params }).pipe(
-      map((records) => records.find((r) => r.codigo === pokemonCodigo) || null),
+    return this.http.get<Page<UserPokemonRecord>>(`${this.userPokemonUrl}`, { headers, params }).pipe(
+      map((page) => (page.results ?? []).find((r) => r.codigo === pokemonCodigo) || null),
       catchError((error) => {
         console.error('Erro ao buscar registro do usuário:', error);
         return of(null);
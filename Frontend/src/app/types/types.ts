@@ -31,6 +31,12 @@ export interface UserPokemonData {
   tipos: Type[];
 }
 
+export interface Page<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface JwtPayload {
   user_id: number;
 }